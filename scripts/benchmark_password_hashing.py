@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmark de latencia de las configuraciones de hash de contraseñas.
+
+Mide el tiempo de ``hash`` y ``verify`` de cada configuración con el mismo
+``build_password_context`` que usa la API, para elegir el punto de seguridad
+y latencia de forma deliberada. Conviene ejecutarlo con la misma memoria
+asignada que la Lambda (la CPU de Lambda escala con la memoria).
+
+Uso:
+    python scripts/benchmark_password_hashing.py --iterations 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.auth_service import build_password_context  # pylint: disable=wrong-import-position
+
+CONFIGURATIONS = [
+    {'scheme': 'bcrypt', 'bcrypt_rounds': 10},
+    {'scheme': 'bcrypt', 'bcrypt_rounds': 11},
+    {'scheme': 'bcrypt', 'bcrypt_rounds': 12},
+    {'scheme': 'argon2', 'argon2_time_cost': 2, 'argon2_memory_cost': 19456, 'argon2_parallelism': 1},
+    {'scheme': 'argon2', 'argon2_time_cost': 3, 'argon2_memory_cost': 12288, 'argon2_parallelism': 1},
+    {'scheme': 'argon2', 'argon2_time_cost': 1, 'argon2_memory_cost': 47104, 'argon2_parallelism': 1},
+]
+
+
+def describe(configuration):
+    if configuration['scheme'] == 'bcrypt':
+        return f"bcrypt rounds={configuration['bcrypt_rounds']}"
+    return (
+        f"argon2id t={configuration['argon2_time_cost']} "
+        f"m={configuration['argon2_memory_cost']}KiB p={configuration['argon2_parallelism']}"
+    )
+
+
+def measure(function, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95_index = min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))
+    return statistics.median(samples), samples[p95_index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de hash de contraseñas")
+    parser.add_argument('--iterations', type=int, default=10, help="Mediciones por configuración")
+    parser.add_argument('--password', default='Sup3r-Secreta!', help="Contraseña de prueba")
+    args = parser.parse_args()
+
+    print(f"{'configuración':<40} {'hash p50':>10} {'hash p95':>10} {'verify p50':>11} {'verify p95':>11}")
+    for configuration in CONFIGURATIONS:
+        try:
+            context = build_password_context(**configuration)
+            hashed = context.hash(args.password)
+        except Exception as e:  # pylint: disable=broad-except
+            # P. ej. falta argon2-cffi
+            print(f"{describe(configuration):<40} no disponible: {e}")
+            continue
+        hash_p50, hash_p95 = measure(
+            lambda context=context: context.hash(args.password), args.iterations
+        )
+        verify_p50, verify_p95 = measure(
+            lambda context=context, hashed=hashed: context.verify(args.password, hashed), args.iterations
+        )
+        print(
+            f"{describe(configuration):<40} {hash_p50:>8.1f}ms {hash_p95:>8.1f}ms "
+            f"{verify_p50:>9.1f}ms {verify_p95:>9.1f}ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Generar una llave RSA para firmar los tokens con RS256.
+
+Imprime la llave privada (para ``JWT_PRIVATE_KEY``), la pública (para
+``JWT_ADDITIONAL_PUBLIC_KEYS`` al preparar una rotación) y su ``kid``.
+
+Uso:
+    python scripts/generate_jwt_key.py --bits 2048
+"""
+
+import argparse
+import os
+import sys
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.jwks import key_thumbprint, public_jwk  # pylint: disable=wrong-import-position
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar una llave de firma RS256")
+    parser.add_argument('--bits', type=int, default=2048, help="Tamaño de la llave RSA")
+    args = parser.parse_args()
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=args.bits)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode('ascii')
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('ascii')
+
+    print(f"kid: {key_thumbprint(public_jwk(public_pem))}\n")
+    print("# JWT_PRIVATE_KEY")
+    print(private_pem)
+    print("# Llave pública (JWT_ADDITIONAL_PUBLIC_KEYS)")
+    print(public_pem)
+
+
+if __name__ == '__main__':
+    main()
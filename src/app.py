@@ -1,39 +1,47 @@
+import logging
 from datetime import timedelta, datetime
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
-import boto3
-from fastapi import FastAPI, HTTPException, Depends, status
+from botocore.exceptions import ClientError
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 from dotenv import load_dotenv
 
 # Importar servicios
-from .services.auth_service import AuthService
-from .services.user_service import UserService
-from .services.fund_service import FundService
-from .services.transaction_service import TransactionService
-from .services.notification_service import NotificationService
+from .services.auth_service import AuthService, AsyncAuthService, password_hash_executor
+from .services.user_service import AsyncUserService
+from .services.fund_service import AsyncFundService, fund_catalog_cache
+from .services.transaction_service import AsyncTransactionService
+from .services.subscription_service import AsyncSubscriptionService
+from .services.notification_service import AsyncNotificationService
+from .services.idempotency_service import AsyncIdempotencyService
+from .services.session_service import AsyncSessionService
 
 # Importar modelos
 from .models.schemas import (
     UserCreate, UserLogin, Token, User, Fund,
-    SubscriptionRequest, CancellationRequest, DepositRequest
+    SubscriptionRequest, CancellationRequest, DepositRequest, NotificationReadRequest,
+    RefreshTokenRequest
 )
-# Removed unused enum imports
+from .models.enums import FundCategory
 from .config.settings import settings
+from .config.async_database import get_async_table, close_async_resources
 from .utils.auth import get_current_user
+from .utils.dataloader import request_loader_scope
+from .utils.unit_of_work import unit_of_work_scope
+from .utils.jwks import get_key_ring
+from .utils.tokens import verified_token_cache
 
 # Cargar variables de entorno
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Constantes
 INITIAL_BALANCE = Decimal('500000')  # Balance inicial de 500,000 COP
 
-# Configurar DynamoDB
-dynamodb = boto3.resource('dynamodb', region_name=settings.AWS_REGION)
-users_table = dynamodb.Table(settings.USERS_TABLE_NAME)
-
 app = FastAPI(
     title=settings.APP_TITLE,
     version=settings.APP_VERSION,
@@ -47,13 +55,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Idempotent-Replayed"],
 )
 
 
+@app.middleware("http")
+async def dynamodb_loader_scope(request: Request, call_next):
+    """Agrupar en BatchGetItem las lecturas puntuales de cada request y
+    compartir un mapa de identidad entre sus servicios."""
+    with request_loader_scope(), unit_of_work_scope():
+        return await call_next(request)
+
+
+@app.on_event("shutdown")
+async def close_dynamodb():
+    """Cerrar las conexiones asíncronas a DynamoDB al detener el servidor local.
+
+    En Lambda no se ejecuta: la conexión vive lo mismo que el contenedor.
+    """
+    await close_async_resources()
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Bienvenido a Invierte Ya - Sistema de Fondos",
         "version": settings.APP_VERSION,
@@ -63,7 +87,7 @@ def read_root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Endpoint de salud para verificar el estado de la API y DynamoDB"""
     health_status = {
         "status": "healthy",
@@ -75,36 +99,54 @@ def health_check():
             "user_funds": settings.USER_FUNDS_TABLE_NAME is not None,
             "transactions": settings.TRANSACTIONS_TABLE_NAME is not None,
             "notifications": settings.NOTIFICATIONS_TABLE_NAME is not None
-        }
+        },
+        "caches": {
+            "funds": fund_catalog_cache.stats(),
+            "verified_tokens": verified_token_cache.stats()
+        },
+        "password_hashing": password_hash_executor.stats()
     }
     return health_status
 
 
+def build_access_token(email: str) -> str:
+    """Crear el token de acceso de corta duración."""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return AuthService.create_access_token(data={"sub": email}, expires_delta=access_token_expires)
+
+
+async def issue_tokens(email: str) -> dict:
+    """Abrir una sesión y retornar el token de acceso con su refresh token."""
+    return {
+        "access_token": build_access_token(email),
+        "token_type": "bearer",
+        "refresh_token": await AsyncSessionService.create_session(email)
+    }
+
+
+@app.get("/.well-known/jwks.json")
+async def get_jwks(response: Response):
+    """Llaves públicas para verificar los tokens de acceso fuera de esta API."""
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}"
+    return get_key_ring().jwks()
+
+
 @app.post("/auth/register", response_model=Token)
-def register_user(user_data: UserCreate):
+async def register_user(user_data: UserCreate):
     """Registrar un nuevo usuario."""
     try:
         # Crear hash de la contraseña
-        hashed_password = AuthService.get_password_hash(user_data.password)
+        hashed_password = await AsyncAuthService.get_password_hash(user_data.password)
         
         # Crear usuario usando el servicio
-        UserService.create_user(
+        await AsyncUserService.create_user(
             email=user_data.email,
             phone=user_data.phone,
             hashed_password=hashed_password,
             notification_preference=user_data.notification_preference.value
         )
         
-        # Crear token de acceso
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = AuthService.create_access_token(
-            data={"sub": user_data.email}, expires_delta=access_token_expires
-        )
-        
-        return {
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
+        return await issue_tokens(user_data.email)
     
     except HTTPException:
         raise
@@ -116,11 +158,11 @@ def register_user(user_data: UserCreate):
 
 
 @app.post("/auth/login", response_model=Token)
-def login_user(user_credentials: UserLogin):
+async def login_user(user_credentials: UserLogin):
     """Autenticar usuario y retornar token de acceso"""
     try:
         # Buscar usuario por email
-        user = UserService.get_user_with_password(user_credentials.email)
+        user = await AsyncUserService.get_user_with_password(user_credentials.email)
         
         if not user:
             raise HTTPException(
@@ -130,22 +172,46 @@ def login_user(user_credentials: UserLogin):
             )
         
         # Verificar contraseña
-        if not AuthService.verify_password(user_credentials.password, user['password_hash']):
+        password_valid, new_hash = await AsyncAuthService.verify_and_update_password(
+            user_credentials.password, user['password_hash']
+        )
+        if not password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales incorrectas",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Crear token de acceso
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = AuthService.create_access_token(
-            data={"sub": user['email']}, expires_delta=access_token_expires
-        )
+        # Actualizar hashes con esquema o costo anterior; no debe impedir el login
+        if new_hash is not None:
+            try:
+                await AsyncUserService.update_password_hash(user['user_id'], new_hash)
+            except ClientError:
+                logger.warning("No se pudo actualizar el hash de la contraseña de %s", user['user_id'], exc_info=True)
         
+        return await issue_tokens(user['email'])
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@app.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshTokenRequest):
+    """Renovar el token de acceso con un refresh token, sin volver a pedir la contraseña.
+
+    El refresh token se rota en cada uso; el anterior deja de ser válido.
+    """
+    try:
+        email, refresh_token = await AsyncSessionService.rotate(request.refresh_token)
         return {
-            "access_token": access_token,
-            "token_type": "bearer"
+            "access_token": build_access_token(email),
+            "token_type": "bearer",
+            "refresh_token": refresh_token
         }
     
     except HTTPException:
@@ -157,8 +223,24 @@ def login_user(user_credentials: UserLogin):
         )
 
 
+@app.post("/auth/logout")
+async def logout(request: RefreshTokenRequest):
+    """Revocar la sesión del refresh token."""
+    try:
+        await AsyncSessionService.revoke(request.refresh_token)
+        return {"message": "Sesión cerrada exitosamente"}
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
 @app.post("/users", response_model=User)
-def create_user(user_data: UserCreate):
+async def create_user(user_data: UserCreate):
     """Crear un nuevo usuario con saldo inicial"""
     try:
         timestamp = datetime.utcnow().isoformat()
@@ -175,7 +257,8 @@ def create_user(user_data: UserCreate):
             'updated_at': timestamp
         }
         
-        users_table.put_item(Item=user_item)
+        users_table = await get_async_table(settings.USERS_TABLE_NAME)
+        await users_table.put_item(Item=user_item)
         
         return User(**user_item)
     
@@ -187,10 +270,10 @@ def create_user(user_data: UserCreate):
 
 
 @app.get("/users/me", response_model=User)
-def get_user(current_user: str = Depends(get_current_user)):
+async def get_user(current_user: str = Depends(get_current_user)):
     """Obtener información del usuario autenticado."""
     try:
-        return UserService.get_user_by_email(current_user)
+        return await AsyncUserService.get_user_by_email(current_user)
     except HTTPException:
         raise
     except Exception as e:
@@ -201,10 +284,29 @@ def get_user(current_user: str = Depends(get_current_user)):
 
 
 @app.get("/funds", response_model=List[Fund])
-def get_funds():
-    """Obtener lista de fondos disponibles."""
+async def get_funds(
+    response: Response,
+    category: Optional[FundCategory] = None,
+    active_only: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """Obtener lista de fondos disponibles.
+
+    El cursor de la siguiente página se retorna en el encabezado ``X-Next-Cursor``.
+    """
     try:
-        return FundService.get_all_funds()
+        funds, next_cursor = await AsyncFundService.list_funds(
+            category=category.value if category else None,
+            active_only=active_only,
+            limit=limit,
+            cursor=cursor
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return funds
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -213,86 +315,24 @@ def get_funds():
 
 
 @app.post("/funds/subscribe")
-def subscribe_to_fund(
+async def subscribe_to_fund(
     subscription: SubscriptionRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Suscribirse a un fondo."""
     try:
-        # Obtener información del usuario
-        user = UserService.get_user_by_email(current_user)
-        current_balance = Decimal(str(user['balance']))
-        
-        # Obtener información del fondo
-        fund = FundService.get_fund_by_id(subscription.fund_id)
-        minimum_amount = Decimal(str(fund['minimum_amount']))
-        
-        # Determinar monto de inversión
-        investment_amount = subscription.amount or minimum_amount
-        
-        # Verificar que el monto sea suficiente
-        if investment_amount < minimum_amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"El monto mínimo para este fondo es COP ${minimum_amount:,.0f}"
+        return await AsyncIdempotencyService.execute(
+            current_user,
+            "subscribe",
+            idempotency_key,
+            subscription.dict(),
+            lambda: AsyncSubscriptionService.subscribe(
+                user_id=current_user,
+                fund_id=subscription.fund_id,
+                amount=subscription.amount
             )
-        
-        # Verificar saldo disponible
-        if current_balance < investment_amount:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No tiene saldo disponible para vincularse al fondo"
-            )
-        
-        # Verificar si ya está suscrito
-        existing_subscription = FundService.get_user_subscription(current_user, subscription.fund_id)
-        if existing_subscription:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Ya está suscrito a este fondo"
-            )
-        
-        # Calcular nuevo balance
-        new_balance = current_balance - investment_amount
-        
-        # Crear transacción
-        transaction_id = TransactionService.create_transaction(
-            user_id=current_user,
-            fund_id=subscription.fund_id,
-            transaction_type="subscription",
-            amount=investment_amount,
-            balance_before=current_balance,
-            balance_after=new_balance
         )
-        
-        # Actualizar saldo del usuario
-        UserService.update_user_balance(current_user, new_balance)
-        
-        # Crear suscripción
-        FundService.subscribe_user_to_fund(
-            user_id=current_user,
-            fund_id=subscription.fund_id,
-            amount=investment_amount,
-            transaction_id=transaction_id
-        )
-        
-        # Crear notificación
-        NotificationService.create_subscription_notification(
-            user_id=current_user,
-            transaction_id=transaction_id,
-            fund_name=fund['name'],
-            amount=investment_amount,
-            notification_type=user['notification_preference']
-        )
-        
-        return {
-            "message": "Suscripción exitosa",
-            "transaction_id": transaction_id,
-            "fund_name": fund['name'],
-            "invested_amount": investment_amount,
-            "new_balance": new_balance,
-            "notification_sent": user['notification_preference']
-        }
     
     except HTTPException:
         raise
@@ -304,82 +344,23 @@ def subscribe_to_fund(
 
 
 @app.post("/funds/cancel")
-def cancel_fund_subscription(
+async def cancel_fund_subscription(
     cancellation: CancellationRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Cancelar suscripción a un fondo"""
     try:
-        # Verificar suscripción activa
-        subscription = FundService.get_user_subscription(
-            user_id=current_user,
-            fund_id=cancellation.fund_id
-        )
-        
-        if not subscription:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No se encontró suscripción a este fondo"
-            )
-        
-        if subscription['status'] != 'active':
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="La suscripción ya está cancelada"
+        return await AsyncIdempotencyService.execute(
+            current_user,
+            "cancel",
+            idempotency_key,
+            cancellation.dict(),
+            lambda: AsyncSubscriptionService.cancel(
+                user_id=current_user,
+                fund_id=cancellation.fund_id
             )
-        
-        # Obtener información del usuario
-        user = UserService.get_user_by_email(current_user)
-        current_balance = Decimal(str(user['balance']))
-        invested_amount = Decimal(str(subscription['invested_amount']))
-        
-        # Obtener información del fondo
-        fund = FundService.get_fund_by_id(cancellation.fund_id)
-        
-        # Generar ID de transacción
-        transaction_id = TransactionService.generate_transaction_id()
-        
-        # Devolver dinero al usuario
-        new_balance = current_balance + invested_amount
-        UserService.update_user_balance(
-            email=current_user,
-            new_balance=new_balance
-        )
-        
-        # Cancelar suscripción
-        FundService.cancel_user_subscription(
-            user_id=current_user,
-            fund_id=cancellation.fund_id,
-            transaction_id=transaction_id
         )
-        
-        # Registrar transacción
-        TransactionService.create_transaction(
-            user_id=current_user,
-            fund_id=cancellation.fund_id,
-            transaction_type='cancellation',
-            amount=invested_amount,
-            balance_before=current_balance,
-            balance_after=new_balance
-        )
-        
-        # Crear notificación
-        NotificationService.create_cancellation_notification(
-            user_id=current_user,
-            transaction_id=transaction_id,
-            fund_name=fund['name'],
-            amount=invested_amount,
-            notification_type=user['notification_preference']
-        )
-        
-        return {
-            "message": "Cancelación exitosa",
-            "transaction_id": transaction_id,
-            "fund_name": fund['name'],
-            "returned_amount": invested_amount,
-            "new_balance": new_balance,
-            "notification_sent": user['notification_preference']
-        }
     
     except HTTPException:
         raise
@@ -391,21 +372,30 @@ def cancel_fund_subscription(
 
 
 @app.get("/users/me/transactions")
-def get_user_transactions(
+async def get_user_transactions(
     current_user: str = Depends(get_current_user),
-    limit: int = 20
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
 ):
     """Obtener historial de transacciones del usuario autenticado"""
     try:
-        transactions = TransactionService.get_user_transactions(
+        transactions, next_cursor = await AsyncTransactionService.get_user_transactions(
             user_id=current_user,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            since=since,
+            until=until
         )
         
         return {
-            "transactions": transactions
+            "transactions": transactions,
+            "next_cursor": next_cursor
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -414,12 +404,12 @@ def get_user_transactions(
 
 
 @app.get("/users/me/subscriptions")
-def get_user_subscriptions(
+async def get_user_subscriptions(
     current_user: str = Depends(get_current_user)
 ):
     """Obtener suscripciones activas del usuario autenticado"""
     try:
-        subscriptions = FundService.get_user_active_subscriptions(
+        subscriptions = await AsyncFundService.get_user_active_subscriptions(
             user_id=current_user
         )
         
@@ -437,61 +427,111 @@ def get_user_subscriptions(
 
 
 @app.post("/users/me/deposit")
-def deposit_money(
+async def deposit_money(
     deposit: DepositRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: str = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Depositar dinero en la cuenta del usuario"""
     try:
-        # Obtener balance actual del usuario
-        user = UserService.get_user_by_email(current_user)
-        current_balance = Decimal(str(user['balance']))
-        
-        # Procesar depósito usando el servicio
-        result = TransactionService.process_deposit(
-            user_id=current_user,
-            amount=deposit.amount,
-            current_balance=current_balance
+        return await AsyncIdempotencyService.execute(
+            current_user,
+            "deposit",
+            idempotency_key,
+            deposit.dict(),
+            lambda: AsyncTransactionService.process_deposit(
+                user_id=current_user,
+                amount=deposit.amount
+            )
         )
         
-        # Actualizar balance del usuario en la base de datos
-        new_balance = result['balance_after']
-        UserService.update_user_balance(current_user, new_balance)
-        
-        # Obtener información del usuario para la notificación
-        user = UserService.get_user_by_email(current_user)
-        
-        # Crear notificación
-        NotificationService.create_deposit_notification(
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al procesar depósito: {str(e)}"
+        )
+
+
+@app.get("/users/me/notifications")
+async def get_user_notifications(
+    current_user: str = Depends(get_current_user),
+    unread: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """Obtener la bandeja de notificaciones del usuario autenticado"""
+    try:
+        notifications, next_cursor = await AsyncNotificationService.list_notifications(
             user_id=current_user,
-            transaction_id=result['transaction_id'],
-            amount=deposit.amount,
-            notification_type=user['notification_preference']
+            unread_only=unread,
+            limit=limit,
+            cursor=cursor
         )
         
         return {
-            'message': 'Depósito realizado exitosamente',
-            'transaction_id': result['transaction_id'],
-            'amount_deposited': deposit.amount,
-            'previous_balance': result['balance_before'],
-            'new_balance': result['balance_after'],
-            'timestamp': result['timestamp']
+            "notifications": notifications,
+            "next_cursor": next_cursor
         }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener notificaciones: {str(e)}"
+        )
+
+
+@app.get("/users/me/notifications/unread-count")
+async def get_unread_notifications_count(
+    current_user: str = Depends(get_current_user)
+):
+    """Obtener el número de notificaciones sin leer (contador atómico)"""
+    unread_count = await AsyncNotificationService.get_unread_count(current_user)
+    return {"unread_count": unread_count}
+
+
+@app.post("/users/me/notifications/read")
+async def mark_notifications_read(
+    request: NotificationReadRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """Marcar notificaciones como leídas"""
+    if not request.all and not request.notification_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar notification_ids o all=true"
+        )
+    try:
+        if request.all:
+            marked = await AsyncNotificationService.mark_all_as_read(current_user)
+        else:
+            marked = await AsyncNotificationService.mark_as_read(
+                current_user, request.notification_ids
+            )
+        unread_count = await AsyncNotificationService.get_unread_count(current_user)
         
+        return {
+            "marked": marked,
+            "unread_count": unread_count
+        }
+    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al procesar depósito: {str(e)}"
+            detail=f"Error al marcar notificaciones: {str(e)}"
         )
 
 
 @app.post("/init-funds")
-def initialize_funds():
+async def initialize_funds():
     """Inicializar fondos predefinidos (solo para desarrollo)"""
     try:
-        result = FundService.initialize_default_funds()
+        result = await AsyncFundService.initialize_default_funds()
         return result
     
     except Exception as e:
@@ -501,4 +541,6 @@ def initialize_funds():
         )
 
 
-handler = Mangum(app)
+# Sin lifespan: Mangum lo ejecutaría en cada invocación y cerraría la conexión
+# a DynamoDB que se reutiliza entre invocaciones del mismo contenedor
+handler = Mangum(app, lifespan="off")
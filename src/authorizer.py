@@ -0,0 +1,59 @@
+"""Lambda authorizer de API Gateway para las rutas protegidas.
+
+Verifica el token de acceso con ``verify_access_token`` antes de que la solicitud
+llegue a la función principal. API Gateway guarda en caché la política por
+token durante ``ReauthorizeEvery`` segundos; el email verificado viaja en el
+contexto del authorizer para que la API no vuelva a decodificar el token.
+"""
+
+import logging
+from typing import Any, Dict
+
+from .utils.tokens import InvalidTokenError, verify_access_token
+
+logger = logging.getLogger(__name__)
+
+# API Gateway responde 401 cuando el authorizer falla con este mensaje exacto
+UNAUTHORIZED = 'Unauthorized'
+
+
+def _api_resource(method_arn: str) -> str:
+    """Todas las rutas del stage.
+
+    La política en caché se reutiliza para cualquier ruta protegida con el
+    mismo token, así que no puede limitarse al ``methodArn`` de la primera.
+    """
+    # arn:aws:execute-api:<region>:<cuenta>:<api_id>/<stage>/<método>/<ruta>
+    api_arn, stage = method_arn.split('/')[:2]
+    return f"{api_arn}/{stage}/*/*"
+
+
+def build_policy(principal_id: str, effect: str, resource: str, context: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        'principalId': principal_id,
+        'policyDocument': {
+            'Version': '2012-10-17',
+            'Statement': [{
+                'Action': 'execute-api:Invoke',
+                'Effect': effect,
+                'Resource': resource
+            }]
+        },
+        'context': context
+    }
+
+
+def handler(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Authorizer de tipo TOKEN: ``authorizationToken`` trae ``Bearer <jwt>``."""
+    scheme, _, token = event.get('authorizationToken', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        raise Exception(UNAUTHORIZED)
+    try:
+        email = verify_access_token(token)
+    except InvalidTokenError:
+        raise Exception(UNAUTHORIZED)
+    except Exception:  # pylint: disable=broad-except
+        # Un token que no se puede verificar no pasa
+        logger.exception("Error al verificar el token")
+        raise Exception(UNAUTHORIZED)
+    return build_policy(email, 'Allow', _api_resource(event['methodArn']), {'email': email})
@@ -0,0 +1,105 @@
+"""Capa compartida de acceso asíncrono a DynamoDB.
+
+Equivalente asíncrono de ``database``: un recurso de aioboto3 por event loop,
+configurado con los mismos parámetros de conexión, que se reutiliza entre
+invocaciones mientras el contenedor está caliente.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Dict, Iterable, List, Optional
+
+import aioboto3
+
+from .settings import settings
+from .database import (
+    dynamodb_config, build_projection, backoff_delay, unprocessed_keys_error,
+    BATCH_GET_MAX_KEYS
+)
+
+async_session = aioboto3.Session(region_name=settings.AWS_REGION)
+
+# Recursos abiertos por event loop; el cliente HTTP subyacente no puede
+# compartirse entre loops.
+_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_contexts: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+async def get_async_resource():
+    """Obtener el recurso DynamoDB asíncrono del event loop actual."""
+    loop = asyncio.get_running_loop()
+    resource = _resources.get(loop)
+    if resource is None:
+        context = async_session.resource('dynamodb', config=dynamodb_config)
+        # Se guarda la tarea para que llamadas concurrentes esperen la misma apertura
+        resource = loop.create_task(context.__aenter__())
+        _resources[loop] = resource
+        _contexts[loop] = context
+    try:
+        return await resource
+    except Exception:
+        # Permitir un nuevo intento de apertura en la siguiente llamada
+        _resources.pop(loop, None)
+        _contexts.pop(loop, None)
+        raise
+
+
+async def get_async_client():
+    """Obtener el cliente asíncrono; acepta y devuelve tipos nativos de Python."""
+    resource = await get_async_resource()
+    return resource.meta.client
+
+
+async def get_async_table(table_name: str):
+    """Obtener una tabla de DynamoDB sobre la conexión asíncrona compartida."""
+    resource = await get_async_resource()
+    return await resource.Table(table_name)
+
+
+async def close_async_resources() -> None:
+    """Cerrar el recurso del event loop actual."""
+    loop = asyncio.get_running_loop()
+    context = _contexts.pop(loop, None)
+    _resources.pop(loop, None)
+    if context is not None:
+        await context.__aexit__(None, None, None)
+
+
+async def async_batch_get_request(request_items: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Ejecutar un BatchGetItem, posiblemente sobre varias tablas.
+
+    ``request_items`` tiene el formato de ``RequestItems`` y no debe superar
+    100 llaves en total. Las ``UnprocessedKeys`` se reintentan con backoff
+    exponencial con jitter.
+    """
+    resource = await get_async_resource()
+    responses: Dict[str, List[Dict[str, Any]]] = {table_name: [] for table_name in request_items}
+    attempt = 0
+    while request_items:
+        response = await resource.batch_get_item(RequestItems=request_items)
+        for table_name, items in response.get('Responses', {}).items():
+            responses.setdefault(table_name, []).extend(items)
+        request_items = response.get('UnprocessedKeys') or {}
+        if not request_items:
+            break
+        attempt += 1
+        if attempt > settings.DYNAMODB_BATCH_MAX_RETRIES:
+            raise unprocessed_keys_error(', '.join(request_items))
+        await asyncio.sleep(backoff_delay(attempt))
+    return responses
+
+
+async def async_batch_get_items(
+    table_name: str,
+    keys: List[Dict[str, Any]],
+    attributes: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """Leer varios items de una tabla con BatchGetItem, en bloques de 100 llaves."""
+    items: List[Dict[str, Any]] = []
+    projection = build_projection(attributes)
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        responses = await async_batch_get_request({
+            table_name: {'Keys': keys[start:start + BATCH_GET_MAX_KEYS], **projection}
+        })
+        items.extend(responses.get(table_name, []))
+    return items
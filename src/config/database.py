@@ -0,0 +1,105 @@
+"""Capa compartida de acceso a DynamoDB.
+
+Todos los servicios reutilizan la misma sesión, recurso y cliente para que el
+contenedor Lambda construya una sola vez el pool de conexiones y lo mantenga
+vivo entre invocaciones.
+"""
+
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from .settings import settings
+
+# Configuración de conexiones de botocore
+dynamodb_config = Config(
+    region_name=settings.AWS_REGION,
+    max_pool_connections=settings.DYNAMODB_MAX_POOL_CONNECTIONS,
+    connect_timeout=settings.DYNAMODB_CONNECT_TIMEOUT,
+    read_timeout=settings.DYNAMODB_READ_TIMEOUT,
+    tcp_keepalive=settings.DYNAMODB_TCP_KEEPALIVE,
+    retries={
+        'mode': settings.DYNAMODB_RETRY_MODE,
+        'max_attempts': settings.DYNAMODB_MAX_ATTEMPTS
+    }
+)
+
+# Sesión, recurso y cliente únicos por contenedor. El cliente es el del
+# recurso, así que acepta y devuelve tipos nativos de Python.
+session = boto3.session.Session(region_name=settings.AWS_REGION)
+dynamodb = session.resource('dynamodb', config=dynamodb_config)
+dynamodb_client = dynamodb.meta.client
+
+_deserializer = TypeDeserializer()
+
+# Límites de las operaciones por lotes de DynamoDB
+BATCH_GET_MAX_KEYS = 100
+
+
+def get_table(table_name: str):
+    """Obtener una tabla de DynamoDB sobre la conexión compartida."""
+    return dynamodb.Table(table_name)
+
+
+def build_projection(attributes: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """Traducir un conjunto de atributos en parámetros de ``ProjectionExpression``.
+
+    Los nombres se aliasan para no chocar con palabras reservadas de DynamoDB
+    (``status``, ``name``, ``type``...). Sin atributos retorna ``{}`` y se lee
+    el item completo.
+    """
+    if not attributes:
+        return {}
+    names = {f'#p{index}': attribute for index, attribute in enumerate(dict.fromkeys(attributes))}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+
+def backoff_delay(attempt: int) -> float:
+    """Calcular la espera de un reintento con backoff exponencial y jitter completo."""
+    delay = min(settings.DYNAMODB_BATCH_MAX_BACKOFF, settings.DYNAMODB_BATCH_BASE_BACKOFF * (2 ** attempt))
+    return random.uniform(0, delay)
+
+
+def unprocessed_keys_error(table_name: str) -> ClientError:
+    """Error para llaves que siguen sin procesarse tras agotar los reintentos."""
+    return ClientError(
+        {'Error': {
+            'Code': 'UnprocessedKeys',
+            'Message': f'Quedaron llaves sin procesar en {table_name}'
+        }},
+        'BatchGetItem'
+    )
+
+
+def get_cancellation_codes(error: ClientError) -> List[str]:
+    """Obtener los códigos de cancelación de un TransactWriteItems fallido.
+
+    El orden de los códigos coincide con el de los items enviados; ``'None'``
+    indica que ese item no causó la cancelación.
+    """
+    reasons = error.response.get('CancellationReasons', [])
+    return [reason.get('Code') for reason in reasons]
+
+
+def get_cancellation_item(error: ClientError, index: int) -> Dict[str, Any]:
+    """Obtener el item previo devuelto por ReturnValuesOnConditionCheckFailure."""
+    reasons = error.response.get('CancellationReasons', [])
+    if index >= len(reasons):
+        return {}
+    # Los errores no pasan por la transformación del recurso
+    return deserialize_item(reasons[index].get('Item', {}))
+
+
+def deserialize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertir un item en formato tipado de DynamoDB (errores, streams) a tipos nativos."""
+    return {
+        key: _deserializer.deserialize(value) if isinstance(value, dict) else value
+        for key, value in item.items()
+    }
@@ -10,18 +10,97 @@ class Settings:
     
     # Configuración de autenticación
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key')
-    JWT_ALGORITHM = "HS256"
+    JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+    # Firma asimétrica (RS256): llave privada activa y llaves públicas PEM adicionales
+    # publicadas en el JWKS durante la rotación (ver ``src/utils/jwks.py``)
+    JWT_PRIVATE_KEY = os.environ.get('JWT_PRIVATE_KEY') or None
+    JWT_ADDITIONAL_PUBLIC_KEYS = os.environ.get('JWT_ADDITIONAL_PUBLIC_KEYS') or None
+    JWKS_CACHE_MAX_AGE_SECONDS = int(os.environ.get('JWKS_CACHE_MAX_AGE_SECONDS', '86400'))
+    # Confiar en la identidad que deja el Lambda authorizer de API Gateway en el
+    # contexto del request; solo activar si todas las rutas protegidas lo usan
+    TRUST_AUTHORIZER_CONTEXT = os.environ.get('TRUST_AUTHORIZER_CONTEXT', 'false').lower() == 'true'
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    # Refresh tokens: las sesiones vencen a los N días; el HMAC usa la llave JWT si no hay una propia
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get('REFRESH_TOKEN_EXPIRE_DAYS', '30'))
+    REFRESH_TOKEN_SECRET_KEY = os.environ.get('REFRESH_TOKEN_SECRET_KEY')
+    
+    # Hash de contraseñas: 'argon2' (argon2id) o 'bcrypt'. Los hashes con otro
+    # esquema o costo se actualizan en el siguiente login exitoso.
+    PASSWORD_HASH_SCHEME = os.environ.get('PASSWORD_HASH_SCHEME', 'bcrypt')
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+    ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', '2'))
+    ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', '19456'))  # KiB
+    ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', '1'))
+    # Pool dedicado al hash: hilos en paralelo y solicitudes en espera antes de responder 503
+    PASSWORD_HASH_MAX_WORKERS = int(os.environ.get('PASSWORD_HASH_MAX_WORKERS', '2'))
+    PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '8'))
+    PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER_SECONDS', '1'))
     
     # Configuración de AWS
     AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
     
+    # Configuración de conexiones a DynamoDB
+    DYNAMODB_MAX_POOL_CONNECTIONS = int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '25'))
+    DYNAMODB_CONNECT_TIMEOUT = float(os.environ.get('DYNAMODB_CONNECT_TIMEOUT', '1'))
+    DYNAMODB_READ_TIMEOUT = float(os.environ.get('DYNAMODB_READ_TIMEOUT', '3'))
+    DYNAMODB_TCP_KEEPALIVE = os.environ.get('DYNAMODB_TCP_KEEPALIVE', 'true').lower() == 'true'
+    DYNAMODB_RETRY_MODE = os.environ.get('DYNAMODB_RETRY_MODE', 'standard')
+    DYNAMODB_MAX_ATTEMPTS = int(os.environ.get('DYNAMODB_MAX_ATTEMPTS', '3'))
+    DYNAMODB_BATCH_MAX_RETRIES = int(os.environ.get('DYNAMODB_BATCH_MAX_RETRIES', '5'))
+    DYNAMODB_BATCH_BASE_BACKOFF = float(os.environ.get('DYNAMODB_BATCH_BASE_BACKOFF', '0.05'))
+    DYNAMODB_BATCH_MAX_BACKOFF = float(os.environ.get('DYNAMODB_BATCH_MAX_BACKOFF', '1'))
+    BATCH_WRITER_MAX_AGE_SECONDS = float(os.environ.get('BATCH_WRITER_MAX_AGE_SECONDS', '1'))
+    
     # Configuración de DynamoDB
     USERS_TABLE_NAME = os.environ.get('USERS_TABLE_NAME')
     FUNDS_TABLE_NAME = os.environ.get('FUNDS_TABLE_NAME')
     USER_FUNDS_TABLE_NAME = os.environ.get('USER_FUNDS_TABLE_NAME')
     TRANSACTIONS_TABLE_NAME = os.environ.get('TRANSACTIONS_TABLE_NAME')
     NOTIFICATIONS_TABLE_NAME = os.environ.get('NOTIFICATIONS_TABLE_NAME')
+    IDEMPOTENCY_TABLE_NAME = os.environ.get('IDEMPOTENCY_TABLE_NAME')
+    SESSIONS_TABLE_NAME = os.environ.get('SESSIONS_TABLE_NAME')
+    
+    # Configuración de llaves de idempotencia
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS', '30'))
+    
+    # Configuración de cachés en memoria
+    FUND_CACHE_TTL_SECONDS = int(os.environ.get('FUND_CACHE_TTL_SECONDS', '300'))
+    TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '1024'))
+    
+    # Configuración de paginación
+    FUNDS_DEFAULT_PAGE_SIZE = int(os.environ.get('FUNDS_DEFAULT_PAGE_SIZE', '50'))
+    FUNDS_MAX_PAGE_SIZE = int(os.environ.get('FUNDS_MAX_PAGE_SIZE', '100'))
+    TRANSACTIONS_DEFAULT_PAGE_SIZE = int(os.environ.get('TRANSACTIONS_DEFAULT_PAGE_SIZE', '20'))
+    TRANSACTIONS_MAX_PAGE_SIZE = int(os.environ.get('TRANSACTIONS_MAX_PAGE_SIZE', '100'))
+    NOTIFICATIONS_DEFAULT_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_DEFAULT_PAGE_SIZE', '20'))
+    NOTIFICATIONS_MAX_PAGE_SIZE = int(os.environ.get('NOTIFICATIONS_MAX_PAGE_SIZE', '100'))
+    CURSOR_SECRET_KEY = os.environ.get('CURSOR_SECRET_KEY', JWT_SECRET_KEY)
+    
+    # Configuración del worker de notificaciones
+    NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', '5'))
+    
+    # Retención de notificaciones: se archivan tras NOTIFICATION_ARCHIVE_AFTER_DAYS
+    # y el TTL de DynamoDB las elimina a los NOTIFICATION_RETENTION_DAYS
+    NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+    NOTIFICATION_ARCHIVE_AFTER_DAYS = int(os.environ.get('NOTIFICATION_ARCHIVE_AFTER_DAYS', '30'))
+    NOTIFICATION_ARCHIVE_DIR = os.environ.get('NOTIFICATION_ARCHIVE_DIR', 'archive')
+    
+    # Configuración de proveedores de entrega (sin host/URL se usa el proveedor falso si ALLOW_FAKE_DELIVERY)
+    SMTP_HOST = os.environ.get('SMTP_HOST')
+    SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+    SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_FROM_ADDRESS = os.environ.get('SMTP_FROM_ADDRESS', 'notificaciones@invierteya.com')
+    SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '10'))
+    SMS_GATEWAY_URL = os.environ.get('SMS_GATEWAY_URL')
+    SMS_GATEWAY_TOKEN = os.environ.get('SMS_GATEWAY_TOKEN')
+    SMS_GATEWAY_BATCH_SIZE = int(os.environ.get('SMS_GATEWAY_BATCH_SIZE', '50'))
+    SMS_GATEWAY_TIMEOUT = float(os.environ.get('SMS_GATEWAY_TIMEOUT', '10'))
+    EMAIL_MAX_CONCURRENCY = int(os.environ.get('EMAIL_MAX_CONCURRENCY', '4'))
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '20'))
+    SMS_MAX_CONCURRENCY = int(os.environ.get('SMS_MAX_CONCURRENCY', '8'))
     
     # Configuración de usuario
     INITIAL_USER_BALANCE = Decimal('500000')  # COP $500.000
@@ -32,6 +111,10 @@ class Settings:
     
     # Configuración del entorno
     ENVIRONMENT = os.environ.get('ENVIRONMENT', 'development')
+    # Proveedores en memoria para canales sin configurar; por defecto solo en local
+    ALLOW_FAKE_DELIVERY = os.environ.get(
+        'ALLOW_FAKE_DELIVERY', 'true' if ENVIRONMENT == 'development' else 'false'
+    ).lower() == 'true'
 
 
 settings = Settings()
\ No newline at end of file
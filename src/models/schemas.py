@@ -1,5 +1,5 @@
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -22,6 +22,11 @@ class UserLogin(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -80,4 +85,9 @@ class CancellationRequest(BaseModel):
 
 
 class DepositRequest(BaseModel):
-    amount: Decimal
\ No newline at end of file
+    amount: Decimal
+
+
+class NotificationReadRequest(BaseModel):
+    notification_ids: List[str] = []
+    all: bool = False  # Marcar todas las notificaciones sin leer
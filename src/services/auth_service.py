@@ -1,14 +1,50 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from ..config.settings import settings
+from ..utils.jwks import get_key_ring
+from ..utils.tokens import InvalidTokenError, verify_access_token
+from ..utils.bounded_executor import BoundedExecutor, ExecutorSaturatedError
+
+PASSWORD_HASH_SCHEMES = ("argon2", "bcrypt")
+
+
+def build_password_context(
+    scheme: Optional[str] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None
+) -> CryptContext:
+    """Construir el contexto de hash con el esquema y costos configurados.
+
+    El esquema elegido es el de los hashes nuevos; el otro se mantiene solo
+    para verificar hashes existentes y queda marcado para actualizarse.
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEME
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"Esquema de hash no soportado: {scheme}")
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_HASH_SCHEMES if other != scheme],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds or settings.BCRYPT_ROUNDS,
+        argon2__type="ID",
+        argon2__time_cost=argon2_time_cost or settings.ARGON2_TIME_COST,
+        argon2__memory_cost=argon2_memory_cost or settings.ARGON2_MEMORY_COST,
+        argon2__parallelism=argon2_parallelism or settings.ARGON2_PARALLELISM
+    )
+
 
 # Configuración de hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_password_context()
+
+# Pool propio para el hash: un pico de logins no ocupa los hilos del resto de la API
+password_hash_executor = BoundedExecutor(
+    settings.PASSWORD_HASH_MAX_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE, 'password-hash'
+)
 
 
 class AuthService:
@@ -17,6 +53,14 @@ class AuthService:
         """Verificar contraseña plana contra hash."""
         return pwd_context.verify(plain_password, hashed_password)
 
+    @staticmethod
+    def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verificar la contraseña y, si el hash usa un esquema o costo anterior, generar uno nuevo.
+
+        Retorna ``(valida, nuevo_hash)``; ``nuevo_hash`` es ``None`` si no hace falta actualizar.
+        """
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
     @staticmethod
     def get_password_hash(password: str) -> str:
         """Generar hash de contraseña."""
@@ -31,22 +75,44 @@ class AuthService:
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        encoded_jwt = get_key_ring().sign(to_encode)
         return encoded_jwt
 
     @staticmethod
     def get_current_user(token: str) -> str:
         """Obtener usuario actual desde token JWT."""
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
         try:
-            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-            email: str = payload.get("sub")
-            if email is None:
-                raise credentials_exception
-        except JWTError:
-            raise credentials_exception
-        return email
\ No newline at end of file
+            return verify_access_token(token)
+        except InvalidTokenError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+
+class AsyncAuthService:
+    """Operaciones de contraseña en el pool acotado, para los handlers async."""
+
+    @staticmethod
+    async def _run_hashing(function, *args):
+        try:
+            return await password_hash_executor.run(function, *args)
+        except ExecutorSaturatedError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiadas solicitudes de autenticación, intente de nuevo",
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
+
+    @staticmethod
+    async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verificar la contraseña en el pool acotado (ver ``AuthService.verify_and_update_password``)."""
+        return await AsyncAuthService._run_hashing(
+            AuthService.verify_and_update_password, plain_password, hashed_password
+        )
+
+    @staticmethod
+    async def get_password_hash(password: str) -> str:
+        """Generar el hash en el pool acotado."""
+        return await AsyncAuthService._run_hashing(AuthService.get_password_hash, password)
@@ -0,0 +1,376 @@
+"""Entrega de notificaciones por canal (email y SMS).
+
+Cada canal tiene un proveedor que recibe lotes de notificaciones y retorna
+``{notification_id: error o None}``. El despachador limita la concurrencia por
+canal con un pool de hilos propio y reutiliza las conexiones de los
+proveedores entre lotes e invocaciones del contenedor.
+"""
+
+import functools
+import json
+import queue
+import smtplib
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.message import EmailMessage
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from ..config.settings import settings
+from ..models.enums import NotificationType
+
+DeliveryResult = Dict[str, Optional[str]]
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones reutilizables.
+
+    Como mucho ``size`` conexiones abiertas a la vez. Solo vuelven al pool las
+    conexiones cuyo uso terminó sin excepción; cualquier falla deja la
+    conexión en un estado desconocido, así que se cierra.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        factory: Callable[[], Any],
+        close: Callable[[Any], None]
+    ):
+        self._factory = factory
+        self._close = close
+        self._idle: 'queue.LifoQueue[Any]' = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.opened = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._factory()
+                self.opened += 1
+            try:
+                yield conn
+            except BaseException:
+                self._discard(conn)
+                raise
+            else:
+                self._idle.put(conn)
+
+    def _discard(self, conn: Any) -> None:
+        try:
+            self._close(conn)
+        except Exception:  # pylint: disable=broad-except
+            # La conexión ya estaba rota
+            pass
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class DeliveryProvider(ABC):
+    """Proveedor de un canal de entrega."""
+
+    channel: str = ''
+    max_batch_size: int = 1
+
+    @abstractmethod
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> DeliveryResult:
+        """Enviar un lote y retornar el error de cada notificación, o ``None`` si salió."""
+
+    def close(self) -> None:
+        pass
+
+
+class SMTPEmailProvider(DeliveryProvider):
+    """Envío de emails por SMTP reutilizando conexiones autenticadas."""
+
+    channel = NotificationType.EMAIL.value
+
+    def __init__(self, pool_size: int, batch_size: int):
+        self.max_batch_size = batch_size
+        self.pool = ConnectionPool(
+            pool_size,
+            self._connect,
+            lambda smtp: smtp.quit()
+        )
+
+    @staticmethod
+    def _connect() -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT)
+        if settings.SMTP_USE_TLS:
+            smtp.starttls()
+        if settings.SMTP_USERNAME:
+            smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD or '')
+        return smtp
+
+    @staticmethod
+    def _build_message(notification: Dict[str, Any]) -> EmailMessage:
+        message = EmailMessage()
+        message['From'] = settings.SMTP_FROM_ADDRESS
+        message['To'] = notification['recipient']
+        message['Subject'] = "Invierte Ya - Notificación de transacción"
+        message.set_content(notification['content'])
+        return message
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> DeliveryResult:
+        results: DeliveryResult = {}
+        try:
+            with self.pool.connection() as smtp:
+                for notification in notifications:
+                    try:
+                        smtp.send_message(self._build_message(notification))
+                        results[notification['notification_id']] = None
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                        results[notification['notification_id']] = str(e)
+        except (smtplib.SMTPException, OSError) as e:
+            # La conexión se perdió: lo que no alcanzó a enviarse se reintenta
+            for notification in notifications:
+                results.setdefault(notification['notification_id'], str(e))
+        return results
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class HTTPSMSGatewayProvider(DeliveryProvider):
+    """Envío de SMS a un gateway HTTP genérico con conexiones keep-alive.
+
+    Cada lote se envía en un ``POST`` con ``{"messages": [{"id", "to", "body"}]}``.
+    El gateway puede responder ``{"failed": {"<id>": "<motivo>"}}`` para
+    reportar fallas individuales; cualquier respuesta 2xx sin ese campo
+    cuenta como entrega de todo el lote.
+    """
+
+    channel = NotificationType.SMS.value
+
+    def __init__(self, url: str, pool_size: int, batch_size: int):
+        self.max_batch_size = batch_size
+        parts = urlsplit(url)
+        self._path = parts.path or '/'
+        connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.pool = ConnectionPool(
+            pool_size,
+            lambda: connection_class(parts.netloc, timeout=settings.SMS_GATEWAY_TIMEOUT),
+            lambda conn: conn.close()
+        )
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> DeliveryResult:
+        body = json.dumps({
+            'messages': [
+                {
+                    'id': notification['notification_id'],
+                    'to': notification['recipient'],
+                    'body': notification['content']
+                }
+                for notification in notifications
+            ]
+        })
+        headers = {'Content-Type': 'application/json'}
+        if settings.SMS_GATEWAY_TOKEN:
+            headers['Authorization'] = f"Bearer {settings.SMS_GATEWAY_TOKEN}"
+        try:
+            with self.pool.connection() as conn:
+                conn.request('POST', self._path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+        except (OSError, HTTPException) as e:
+            return {notification['notification_id']: str(e) for notification in notifications}
+
+        if not 200 <= response.status < 300:
+            error = f"Gateway SMS respondió {response.status}"
+            return {notification['notification_id']: error for notification in notifications}
+        try:
+            failed = json.loads(payload or b'{}').get('failed', {})
+        except (ValueError, AttributeError):
+            failed = {}
+        return {
+            notification['notification_id']: failed.get(notification['notification_id'])
+            for notification in notifications
+        }
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class FakeProvider(DeliveryProvider):
+    """Proveedor en memoria para pruebas y ejecución local."""
+
+    def __init__(
+        self,
+        channel: str,
+        batch_size: int = 100,
+        latency_seconds: float = 0.0,
+        fail_ids: Iterable[str] = ()
+    ):
+        self.channel = channel
+        self.max_batch_size = batch_size
+        self.latency_seconds = latency_seconds
+        self.fail_ids = set(fail_ids)
+        self.sent: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def send_batch(self, notifications: List[Dict[str, Any]]) -> DeliveryResult:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        results: DeliveryResult = {}
+        for notification in notifications:
+            notification_id = notification['notification_id']
+            if notification_id in self.fail_ids:
+                results[notification_id] = "Falla simulada"
+                continue
+            with self._lock:
+                self.sent.append(notification)
+            results[notification_id] = None
+        return results
+
+
+class ChannelStats:
+    """Contadores y latencias de entrega de un canal."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.latencies: List[float] = []
+        self.busy_seconds = 0.0
+
+    def record(self, results: DeliveryResult, latency: float) -> None:
+        failed = sum(1 for error in results.values() if error is not None)
+        with self._lock:
+            self.batches += 1
+            self.sent += len(results) - failed
+            self.failed += failed
+            self.latencies.append(latency)
+            self.busy_seconds += latency
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))
+        return ordered[index]
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self.latencies)
+            report = {
+                'sent': self.sent,
+                'failed': self.failed,
+                'batches': self.batches,
+                'messages_per_second': round(self.sent / elapsed, 1) if elapsed > 0 else 0.0
+            }
+        if latencies:
+            report['batch_latency_ms'] = {
+                'p50': round(self._percentile(latencies, 0.5) * 1000, 1),
+                'p95': round(self._percentile(latencies, 0.95) * 1000, 1),
+                'max': round(max(latencies) * 1000, 1)
+            }
+        return report
+
+
+class DeliveryDispatcher:
+    """Reparte notificaciones entre proveedores con concurrencia acotada por canal."""
+
+    def __init__(self, providers: Dict[str, DeliveryProvider], concurrency: Dict[str, int]):
+        self.providers = providers
+        self._executors = {
+            channel: ThreadPoolExecutor(
+                max_workers=max(1, concurrency.get(channel, 1)),
+                thread_name_prefix=f'delivery-{channel}'
+            )
+            for channel in providers
+        }
+        self._stats = {channel: ChannelStats() for channel in providers}
+        self._started = time.monotonic()
+
+    def _send(self, channel: str, batch: List[Dict[str, Any]]) -> DeliveryResult:
+        started = time.monotonic()
+        try:
+            results = self.providers[channel].send_batch(batch)
+        except Exception as e:  # pylint: disable=broad-except
+            # Cualquier falla del proveedor es reintentable
+            results = {notification['notification_id']: str(e) for notification in batch}
+        self._stats[channel].record(results, time.monotonic() - started)
+        return results
+
+    def deliver(self, notifications_by_channel: Dict[str, List[Dict[str, Any]]]) -> DeliveryResult:
+        """Entregar todos los lotes en paralelo y retornar el resultado por notificación."""
+        futures = []
+        results: DeliveryResult = {}
+        for channel, notifications in notifications_by_channel.items():
+            provider = self.providers.get(channel)
+            if provider is None:
+                for notification in notifications:
+                    results[notification['notification_id']] = f"Canal no soportado: {channel}"
+                continue
+            size = max(1, provider.max_batch_size)
+            for start in range(0, len(notifications), size):
+                futures.append(self._executors[channel].submit(
+                    self._send, channel, notifications[start:start + size]
+                ))
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        """Reporte de rendimiento y latencia por canal desde que se creó el despachador."""
+        elapsed = time.monotonic() - self._started
+        return {channel: stats.report(elapsed) for channel, stats in self._stats.items()}
+
+    def close(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        for provider in self.providers.values():
+            provider.close()
+
+
+def build_dispatcher() -> DeliveryDispatcher:
+    """Construir el despachador según la configuración del entorno.
+
+    Los proveedores en memoria solo se usan con ``ALLOW_FAKE_DELIVERY``; sin
+    esa opción un canal sin configurar es un error, para no marcar como
+    enviadas notificaciones que nunca salieron.
+    """
+    email_channel = NotificationType.EMAIL.value
+    sms_channel = NotificationType.SMS.value
+    if not settings.ALLOW_FAKE_DELIVERY:
+        missing = [
+            name for name, value in (('SMTP_HOST', settings.SMTP_HOST), ('SMS_GATEWAY_URL', settings.SMS_GATEWAY_URL))
+            if not value
+        ]
+        if missing:
+            raise ValueError(
+                f"Falta configurar {', '.join(missing)} para entregar notificaciones en {settings.ENVIRONMENT}"
+            )
+    providers: Dict[str, DeliveryProvider] = {
+        email_channel: (
+            SMTPEmailProvider(settings.EMAIL_MAX_CONCURRENCY, settings.EMAIL_BATCH_SIZE)
+            if settings.SMTP_HOST else FakeProvider(email_channel)
+        ),
+        sms_channel: (
+            HTTPSMSGatewayProvider(
+                settings.SMS_GATEWAY_URL, settings.SMS_MAX_CONCURRENCY, settings.SMS_GATEWAY_BATCH_SIZE
+            )
+            if settings.SMS_GATEWAY_URL else FakeProvider(sms_channel)
+        )
+    }
+    return DeliveryDispatcher(
+        providers,
+        {email_channel: settings.EMAIL_MAX_CONCURRENCY, sms_channel: settings.SMS_MAX_CONCURRENCY}
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_dispatcher() -> DeliveryDispatcher:
+    """Despachador compartido mientras el contenedor está caliente."""
+    return build_dispatcher()
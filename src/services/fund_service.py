@@ -1,196 +1,112 @@
+import asyncio
 from decimal import Decimal
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import uuid
 
-import boto3
+from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
 from ..config.settings import settings
+from ..config.database import build_projection
+from ..config.async_database import get_async_table, async_batch_get_items
+from ..utils.cache import VersionedTTLCache
+from ..utils.dataloader import load_item
+from ..utils.pagination import encode_cursor, decode_cursor, clamp_page_size
 
-# Configuración de DynamoDB
-dynamodb = boto3.resource('dynamodb')
-funds_table = dynamodb.Table(settings.FUNDS_TABLE_NAME)
-user_funds_table = dynamodb.Table(settings.USER_FUNDS_TABLE_NAME)
+# Atributos de suscripción leídos en los listados
+ACTIVE_SUBSCRIPTION_ATTRIBUTES = (
+    'fund_id', 'invested_amount', 'subscription_date', 'transaction_id'
+)
+
+
+# Caché del catálogo de fondos por contenedor
+fund_catalog_cache = VersionedTTLCache(settings.FUND_CACHE_TTL_SECONDS)
 
 
 class FundService:
+    """Construcción de consultas, items y respuestas de fondos, sin acceso a DynamoDB."""
+
     @staticmethod
-    def get_all_funds() -> List[Dict[str, Any]]:
-        """Obtener todos los fondos disponibles."""
-        try:
-            response = funds_table.scan()
-            funds = []
-            for item in response['Items']:
-                funds.append({
-                    'fund_id': item['fund_id'],
-                    'name': item['name'],
-                    'minimum_amount': item['minimum_amount'],
-                    'category': item['category'],
-                    'is_active': item.get('is_active', True),
-                    'created_at': item['created_at']
-                })
-            return funds
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al obtener fondos: {str(e)}"
-            )
+    def format_fund(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Convertir un item de DynamoDB en la representación pública del fondo."""
+        return {
+            'fund_id': item['fund_id'],
+            'name': item['name'],
+            'minimum_amount': item['minimum_amount'],
+            'category': item['category'],
+            'is_active': item.get('is_active', True),
+            'created_at': item['created_at']
+        }
     
     @staticmethod
-    def get_fund_by_id(fund_id: str) -> Dict[str, Any]:
-        """Obtener fondo por ID."""
-        try:
-            response = funds_table.get_item(Key={'fund_id': fund_id})
-            if 'Item' not in response:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Fondo no encontrado"
-                )
-            
-            fund = response['Item']
-            return {
-                'fund_id': fund['fund_id'],
-                'name': fund['name'],
-                'minimum_amount': fund['minimum_amount'],
-                'category': fund['category'],
-                'is_active': fund.get('is_active', True),
-                'created_at': fund['created_at']
-            }
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al obtener fondo: {str(e)}"
+    def list_request(category: Optional[str], active_only: bool) -> Dict[str, Any]:
+        """Parámetros base de la consulta del listado de fondos."""
+        request_kwargs: Dict[str, Any] = {}
+        if category:
+            request_kwargs['IndexName'] = 'CategoryIndex'
+            request_kwargs['KeyConditionExpression'] = Key('category').eq(category)
+        if active_only:
+            request_kwargs['FilterExpression'] = (
+                Attr('is_active').not_exists() | Attr('is_active').eq(True)
             )
+        return request_kwargs
     
     @staticmethod
-    def subscribe_user_to_fund(user_id: str, fund_id: str, amount: Decimal, transaction_id: str) -> Dict[str, Any]:
-        """Suscribir usuario a un fondo."""
-        timestamp = datetime.utcnow().isoformat()
-        subscription_id = str(uuid.uuid4())
-        
-        subscription_item = {
-            'user_id': user_id,
-            'fund_id': fund_id,
-            'subscription_id': subscription_id,
-            'invested_amount': amount,
-            'subscription_date': timestamp,
-            'status': 'active',
-            'transaction_id': transaction_id
-        }
-        
-        try:
-            user_funds_table.put_item(Item=subscription_item)
-            return subscription_item
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al crear suscripción: {str(e)}"
-            )
+    def list_scope(category: Optional[str], active_only: bool) -> str:
+        """Alcance del cursor: no se puede reutilizar entre filtros del listado."""
+        return f"funds:{category or ''}:{'active' if active_only else 'all'}"
     
     @staticmethod
-    def get_user_subscription(user_id: str, fund_id: str) -> Optional[Dict[str, Any]]:
-        """Obtener suscripción activa del usuario a un fondo."""
-        try:
-            response = user_funds_table.query(
-                KeyConditionExpression='user_id = :user_id AND fund_id = :fund_id',
-                FilterExpression='#status = :status',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':user_id': user_id,
-                    ':fund_id': fund_id,
-                    ':status': 'active'
-                }
-            )
-            
-            if response['Items']:
-                return response['Items'][0]
-            return None
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al verificar suscripción: {str(e)}"
-            )
+    def split_cached_funds(fund_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Separar los fondos disponibles en caché de los que hay que leer."""
+        funds: Dict[str, Dict[str, Any]] = {}
+        missing_ids = []
+        for fund_id in dict.fromkeys(fund_ids):
+            fund = fund_catalog_cache.get(('fund', fund_id))
+            if fund is not None:
+                funds[fund_id] = dict(fund)
+            else:
+                missing_ids.append(fund_id)
+        return funds, missing_ids
     
     @staticmethod
-    def cancel_user_subscription(user_id: str, fund_id: str, transaction_id: str) -> Dict[str, Any]:
-        """Cancelar suscripción del usuario a un fondo."""
-        timestamp = datetime.utcnow().isoformat()
-        
-        # Buscar la suscripción activa
-        subscription = FundService.get_user_subscription(user_id, fund_id)
-        if not subscription:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No tienes una suscripción activa a este fondo"
-            )
-        
-        try:
-            # Actualizar el estado de la suscripción
-            user_funds_table.update_item(
-                Key={
-                    'user_id': user_id,
-                    'fund_id': fund_id
-                },
-                UpdateExpression='SET #status = :status, cancellation_date = :date, cancellation_transaction_id = :transaction_id',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':status': 'cancelled',
-                    ':date': timestamp,
-                    ':transaction_id': transaction_id
-                }
-            )
-            
-            return subscription
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al cancelar suscripción: {str(e)}"
-            )
+    def cache_fund_items(
+        items: List[Dict[str, Any]],
+        funds: Dict[str, Dict[str, Any]],
+        version: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """Guardar en caché los fondos leídos y agregarlos al resultado."""
+        for item in items:
+            fund = FundService.format_fund(item)
+            fund_id = fund['fund_id']
+            fund_catalog_cache.set(('fund', fund_id), fund, version)
+            funds[fund_id] = dict(fund)
+        return funds
     
     @staticmethod
-    def get_user_subscriptions(user_id: str) -> List[Dict[str, Any]]:
-        """Obtener todas las suscripciones del usuario."""
-        try:
-            response = user_funds_table.query(
-                KeyConditionExpression='user_id = :user_id',
-                ExpressionAttributeValues={':user_id': user_id}
-            )
-            
-            subscriptions = []
-            for item in response['Items']:
-                # Obtener información del fondo
-                fund = FundService.get_fund_by_id(item['fund_id'])
-                
-                subscription = {
-                    'user_id': item['user_id'],
-                    'fund_id': item['fund_id'],
-                    'fund_name': fund['name'],
-                    'invested_amount': item['invested_amount'],
-                    'subscription_date': item['subscription_date'],
-                    'status': item['status'],
-                    'transaction_id': item['transaction_id']
-                }
-                
-                if 'cancellation_date' in item:
-                    subscription['cancellation_date'] = item['cancellation_date']
-                if 'cancellation_transaction_id' in item:
-                    subscription['cancellation_transaction_id'] = item['cancellation_transaction_id']
-                
-                subscriptions.append(subscription)
-            
-            return subscriptions
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al obtener suscripciones: {str(e)}"
-            )
+    def invalidate_fund_cache() -> None:
+        """Invalidar el catálogo en caché; debe llamarse tras cualquier escritura de fondos."""
+        fund_catalog_cache.invalidate()
+    
+    @staticmethod
+    def build_subscription_item(user_id: str, fund_id: str, amount: Decimal, transaction_id: str) -> Dict[str, Any]:
+        """Construir el item de una suscripción activa."""
+        return {
+            'user_id': user_id,
+            'fund_id': fund_id,
+            'subscription_id': str(uuid.uuid4()),
+            'invested_amount': amount,
+            'subscription_date': datetime.utcnow().isoformat(),
+            'status': 'active',
+            'transaction_id': transaction_id
+        }
     
     @staticmethod
-    def initialize_default_funds():
-        """Inicializar fondos predefinidos"""
-        funds_data = [
+    def default_funds() -> List[Dict[str, Any]]:
+        """Catálogo inicial de fondos."""
+        return [
             {
                 "fund_id": "1",
                 "name": "FPV_EL CLIENTE_RECAUDADORA",
@@ -232,51 +148,197 @@ class FundService:
                 "created_at": datetime.utcnow().isoformat()
             }
         ]
-        
-        for fund_data in funds_data:
-            funds_table.put_item(Item=fund_data)
-        
+    
+    @staticmethod
+    def active_subscriptions_request(user_id: str) -> Dict[str, Any]:
+        """Parámetros de la consulta de suscripciones activas del usuario."""
+        projection = build_projection(ACTIVE_SUBSCRIPTION_ATTRIBUTES)
         return {
-            "message": "Fondos inicializados exitosamente",
-            "funds_created": len(funds_data)
+            'KeyConditionExpression': 'user_id = :user_id',
+            'FilterExpression': '#status = :status',
+            'ProjectionExpression': projection['ProjectionExpression'],
+            'ExpressionAttributeNames': {
+                '#status': 'status',
+                **projection['ExpressionAttributeNames']
+            },
+            'ExpressionAttributeValues': {
+                ':user_id': user_id,
+                ':status': 'active'
+            }
         }
     
     @staticmethod
-    def get_user_active_subscriptions(user_id: str):
-        """Obtener suscripciones activas del usuario"""
+    def format_active_subscriptions(
+        items: List[Dict[str, Any]],
+        funds: Dict[str, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Combinar las suscripciones activas con la información de sus fondos."""
+        subscriptions = []
+        for item in items:
+            fund = funds.get(item['fund_id'], {})
+            
+            subscription = {
+                "fund_id": item['fund_id'],
+                "fund_name": fund.get('name', 'Fondo no encontrado'),
+                "fund_category": fund.get('category', 'N/A'),
+                "invested_amount": item['invested_amount'],
+                "subscription_date": item['subscription_date'],
+                "transaction_id": item['transaction_id']
+            }
+            subscriptions.append(subscription)
+        
+        return subscriptions
+
+
+class AsyncFundService:
+    """Operaciones de fondos sobre el cliente aioboto3 y la caché del catálogo."""
+
+    @staticmethod
+    async def list_funds(
+        category: Optional[str] = None,
+        active_only: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Listar fondos por páginas, opcionalmente filtrados."""
+        page_size = clamp_page_size(
+            limit, settings.FUNDS_DEFAULT_PAGE_SIZE, settings.FUNDS_MAX_PAGE_SIZE
+        )
+        cursor_scope = FundService.list_scope(category, active_only)
+        start_key = decode_cursor(cursor, scope=cursor_scope)
+        
+        async def load_page() -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+            table = await get_async_table(settings.FUNDS_TABLE_NAME)
+            request_kwargs = FundService.list_request(category, active_only)
+            
+            items: List[Dict[str, Any]] = []
+            last_key = start_key
+            while True:
+                if last_key:
+                    request_kwargs['ExclusiveStartKey'] = last_key
+                request_kwargs['Limit'] = page_size - len(items)
+                if category:
+                    response = await table.query(**request_kwargs)
+                else:
+                    response = await table.scan(**request_kwargs)
+                items.extend(response['Items'])
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key or len(items) >= page_size:
+                    break
+            
+            return [FundService.format_fund(item) for item in items], last_key
+        
+        cache_key = ('page', category, active_only, page_size, cursor)
+        try:
+            funds, last_key = await fund_catalog_cache.get_or_load_async(cache_key, load_page)
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener fondos: {str(e)}"
+            )
+        
+        return [dict(fund) for fund in funds], encode_cursor(last_key, scope=cursor_scope)
+    
+    @staticmethod
+    async def get_fund_by_id(fund_id: str) -> Dict[str, Any]:
+        """Obtener fondo por ID."""
+        async def load_fund() -> Optional[Dict[str, Any]]:
+            item = await load_item(settings.FUNDS_TABLE_NAME, {'fund_id': fund_id})
+            if item is None:
+                return None
+            return FundService.format_fund(item)
+        
+        try:
+            fund = await fund_catalog_cache.get_or_load_async(('fund', fund_id), load_fund)
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener fondo: {str(e)}"
+            )
+        
+        if fund is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Fondo no encontrado"
+            )
+        return dict(fund)
+    
+    @staticmethod
+    async def get_funds_by_ids(fund_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Obtener varios fondos por ID con un único BatchGetItem."""
+        funds, missing_ids = FundService.split_cached_funds(fund_ids)
+        if not missing_ids:
+            return funds
+        
+        version = fund_catalog_cache.version
+        try:
+            items = await async_batch_get_items(
+                settings.FUNDS_TABLE_NAME,
+                [{'fund_id': fund_id} for fund_id in missing_ids]
+            )
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener fondos: {str(e)}"
+            )
+        
+        return FundService.cache_fund_items(items, funds, version)
+    
+    @staticmethod
+    async def get_subscription(
+        user_id: str,
+        fund_id: str,
+        attributes: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener la suscripción del usuario a un fondo, sin importar su estado."""
+        try:
+            return await load_item(
+                settings.USER_FUNDS_TABLE_NAME,
+                {'user_id': user_id, 'fund_id': fund_id},
+                attributes
+            )
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al verificar suscripción: {str(e)}"
+            )
+    
+    @staticmethod
+    async def get_user_active_subscriptions(user_id: str) -> List[Dict[str, Any]]:
+        """Obtener suscripciones activas del usuario."""
+        table = await get_async_table(settings.USER_FUNDS_TABLE_NAME)
         try:
-            response = user_funds_table.query(
-                KeyConditionExpression='user_id = :user_id',
-                FilterExpression='#status = :status',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':user_id': user_id,
-                    ':status': 'active'
-                }
+            response = await table.query(
+                **FundService.active_subscriptions_request(user_id)
             )
             
-            subscriptions = []
-            for item in response['Items']:
-                # Obtener información del fondo
-                fund_response = funds_table.get_item(
-                    Key={'fund_id': item['fund_id']}
-                )
-                fund = fund_response.get('Item', {})
-                
-                subscription = {
-                    "fund_id": item['fund_id'],
-                    "fund_name": fund.get('name', 'Fondo no encontrado'),
-                    "fund_category": fund.get('category', 'N/A'),
-                    "invested_amount": item['invested_amount'],
-                    "subscription_date": item['subscription_date'],
-                    "transaction_id": item['transaction_id']
-                }
-                subscriptions.append(subscription)
+            # Obtener información de los fondos en un solo lote
+            funds = await AsyncFundService.get_funds_by_ids(
+                [item['fund_id'] for item in response['Items']]
+            )
             
-            return subscriptions
+            return FundService.format_active_subscriptions(response['Items'], funds)
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al obtener suscripciones activas: {str(e)}"
-            )
\ No newline at end of file
+            )
+    
+    @staticmethod
+    async def initialize_default_funds() -> Dict[str, Any]:
+        """Inicializar fondos predefinidos."""
+        funds_data = FundService.default_funds()
+        table = await get_async_table(settings.FUNDS_TABLE_NAME)
+        
+        try:
+            await asyncio.gather(*(table.put_item(Item=fund_data) for fund_data in funds_data))
+        finally:
+            FundService.invalidate_fund_cache()
+        
+        return {
+            "message": "Fondos inicializados exitosamente",
+            "funds_created": len(funds_data)
+        }
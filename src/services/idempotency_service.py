@@ -0,0 +1,221 @@
+import hashlib
+import json
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..config.settings import settings
+from ..config.database import deserialize_item
+from ..config.async_database import get_async_table
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+class IdempotencyScope:
+    """Llave de idempotencia de la solicitud en curso.
+
+    Las operaciones que escriben con TransactWriteItems agregan
+    ``completion_item`` a su transacción: la respuesta queda guardada en la
+    misma escritura que aplica la operación, así que un reintento con la misma
+    llave nunca la vuelve a aplicar, aunque la primera respuesta se haya perdido.
+    """
+
+    def __init__(self, record_key: str):
+        self.record_key = record_key
+        self.completed_in_transaction = False
+
+    def completion_item(self, body: Any, status_code: int = status.HTTP_200_OK) -> Dict[str, Any]:
+        request = AsyncIdempotencyService.completion_request(self.record_key, status_code, body)
+        request['ConditionExpression'] = '#status = :in_progress'
+        request['ExpressionAttributeValues'][':in_progress'] = 'in_progress'
+        self.completed_in_transaction = True
+        return {'Update': {'TableName': settings.IDEMPOTENCY_TABLE_NAME, **request}}
+
+
+_current_scope: ContextVar[Optional[IdempotencyScope]] = ContextVar('idempotency_scope', default=None)
+
+
+def append_idempotency_completion(transact_items: List[Dict[str, Any]], body: Any) -> None:
+    """Agregar a la transacción el cierre de la llave de idempotencia en curso, si hay una."""
+    scope = _current_scope.get()
+    if scope is not None:
+        transact_items.append(scope.completion_item(body))
+
+
+class AsyncIdempotencyService:
+    """Respuestas guardadas por ``Idempotency-Key`` para endpoints que mueven dinero.
+
+    La primera solicitud toma un bloqueo corto (``in_progress``) con una
+    escritura condicional; las repeticiones reciben la respuesta guardada sin
+    tocar las tablas de negocio. Los registros expiran por TTL.
+    """
+
+    @staticmethod
+    def record_key(user_id: str, operation: str, idempotency_key: str) -> str:
+        """Llave del registro: la misma llave en otro usuario u operación es otro registro."""
+        return f"{user_id}#{operation}#{idempotency_key}"
+
+    @staticmethod
+    def request_hash(payload: Dict[str, Any]) -> str:
+        """Huella del cuerpo para detectar una llave reutilizada con otros datos."""
+        encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    async def begin(record_key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        """Tomar el bloqueo de la llave.
+
+        Retorna ``None`` si la solicitud debe ejecutarse, o el registro
+        completado si es una repetición.
+        """
+        now = int(time.time())
+        table = await get_async_table(settings.IDEMPOTENCY_TABLE_NAME)
+        try:
+            await table.put_item(
+                Item={
+                    'idempotency_key': record_key,
+                    'status': 'in_progress',
+                    'request_hash': request_hash,
+                    'lock_expires_at': now + settings.IDEMPOTENCY_LOCK_SECONDS,
+                    'expires_at': now + settings.IDEMPOTENCY_TTL_SECONDS
+                },
+                # Un bloqueo vencido (proceso caído) se puede volver a tomar
+                ConditionExpression=(
+                    'attribute_not_exists(idempotency_key) OR '
+                    '(#status = :in_progress AND lock_expires_at < :now)'
+                ),
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':in_progress': 'in_progress', ':now': now},
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+            return None
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Error al registrar la llave de idempotencia: {str(e)}"
+                )
+            # Los errores no pasan por la transformación del recurso
+            existing = deserialize_item(e.response.get('Item', {}))
+
+        if existing.get('request_hash') != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="La llave de idempotencia ya se usó con otros datos"
+            )
+        if existing.get('status') != 'completed':
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Hay una solicitud con esta llave de idempotencia en proceso"
+            )
+        return existing
+
+    @staticmethod
+    def completion_request(record_key: str, status_code: int, body: Any) -> Dict[str, Any]:
+        """Parámetros del ``UpdateItem`` que guarda la respuesta final."""
+        return {
+            'Key': {'idempotency_key': record_key},
+            'UpdateExpression': (
+                'SET #status = :completed, response_status = :status_code, '
+                'response_body = :body, expires_at = :expires_at REMOVE lock_expires_at'
+            ),
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': {
+                ':completed': 'completed',
+                ':status_code': status_code,
+                ':body': json.dumps(jsonable_encoder(body)),
+                ':expires_at': int(time.time()) + settings.IDEMPOTENCY_TTL_SECONDS
+            }
+        }
+
+    @staticmethod
+    async def complete(record_key: str, status_code: int, body: Any) -> None:
+        """Guardar la respuesta final para las repeticiones."""
+        table = await get_async_table(settings.IDEMPOTENCY_TABLE_NAME)
+        await table.update_item(**AsyncIdempotencyService.completion_request(record_key, status_code, body))
+
+    @staticmethod
+    async def release(record_key: str) -> None:
+        """Liberar el bloqueo para que el cliente pueda reintentar."""
+        table = await get_async_table(settings.IDEMPOTENCY_TABLE_NAME)
+        try:
+            await table.delete_item(
+                Key={'idempotency_key': record_key},
+                ConditionExpression='#status = :in_progress',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues={':in_progress': 'in_progress'}
+            )
+        except ClientError:
+            # Si no se pudo liberar, el bloqueo vence solo
+            pass
+
+    @staticmethod
+    async def execute(
+        user_id: str,
+        operation: str,
+        idempotency_key: Optional[str],
+        payload: Dict[str, Any],
+        action: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Ejecutar ``action`` una sola vez por llave de idempotencia.
+
+        Sin llave se ejecuta siempre. Los errores del cliente (4xx) se guardan
+        como respuesta final y los conflictos (409), donde no se escribió nada,
+        liberan la llave. Ante errores del servidor el resultado es incierto
+        (la escritura pudo confirmarse), así que la llave queda bloqueada hasta
+        vencer; como las operaciones cierran la llave en su propia transacción
+        (``append_idempotency_completion``), el reintento posterior repite la
+        respuesta si la escritura se aplicó y solo se ejecuta si no.
+        """
+        if idempotency_key is None:
+            return await action()
+        if not 0 < len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key debe tener entre 1 y {IDEMPOTENCY_KEY_MAX_LENGTH} caracteres"
+            )
+
+        record_key = AsyncIdempotencyService.record_key(user_id, operation, idempotency_key)
+        stored = await AsyncIdempotencyService.begin(
+            record_key, AsyncIdempotencyService.request_hash(payload)
+        )
+        if stored is not None:
+            return JSONResponse(
+                status_code=int(stored['response_status']),
+                content=json.loads(stored['response_body']),
+                headers={REPLAY_HEADER: 'true'}
+            )
+
+        scope = IdempotencyScope(record_key)
+        token = _current_scope.set(scope)
+        try:
+            result = await action()
+        except HTTPException as e:
+            if e.status_code == status.HTTP_409_CONFLICT:
+                await AsyncIdempotencyService.release(record_key)
+            elif e.status_code < 500:
+                await AsyncIdempotencyService._complete_quietly(
+                    record_key, e.status_code, {'detail': e.detail}
+                )
+            raise
+        finally:
+            _current_scope.reset(token)
+
+        if not scope.completed_in_transaction:
+            await AsyncIdempotencyService._complete_quietly(record_key, status.HTTP_200_OK, result)
+        return result
+
+    @staticmethod
+    async def _complete_quietly(record_key: str, status_code: int, body: Any) -> None:
+        # La operación ya se aplicó: un fallo al guardar la respuesta no debe
+        # convertirla en error para el cliente. El bloqueo queda hasta vencer.
+        try:
+            await AsyncIdempotencyService.complete(record_key, status_code, body)
+        except ClientError:
+            pass
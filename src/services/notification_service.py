@@ -1,122 +1,352 @@
+import time
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
 from ..config.settings import settings
+from ..config.database import build_projection, get_cancellation_codes
+from ..config.async_database import get_async_table, get_async_client
+from ..utils.pagination import encode_cursor, decode_cursor, clamp_page_size
+from ..utils.unit_of_work import load_entity, forget_entity
 
-# Configuración de DynamoDB
-dynamodb = boto3.resource('dynamodb')
-notifications_table = dynamodb.Table(settings.NOTIFICATIONS_TABLE_NAME)
+# Atributos de cada notificación en la bandeja del usuario
+INBOX_ATTRIBUTES = (
+    'notification_id', 'transaction_id', 'type', 'status',
+    'content', 'created_at', 'read_at'
+)
+
+# Una escritura transaccional admite 100 items: 99 notificaciones y el contador
+MARK_READ_CHUNK_SIZE = 99
 
 
 class NotificationService:
+    """Construcción de notificaciones y de las consultas de la bandeja, sin acceso a DynamoDB."""
+
+    @staticmethod
+    def build_notification_item(
+        user_id: str,
+        transaction_id: str,
+        notification_type: str,
+        content: str,
+        notification_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Construir el item de una notificación pendiente."""
+        return {
+            'notification_id': notification_id or str(uuid.uuid4()),
+            'user_id': user_id,
+            'transaction_id': transaction_id,
+            'type': notification_type,
+            'status': 'pending',
+            'content': content,
+            'created_at': datetime.utcnow().isoformat(),
+            # Índice disperso de no leídas: se elimina al marcarla como leída
+            'unread_user_id': user_id,
+            # TTL de DynamoDB (epoch en segundos)
+            'expires_at': int(time.time()) + settings.NOTIFICATION_RETENTION_DAYS * 86400
+        }
+    
     @staticmethod
-    def create_subscription_notification(
+    def build_subscription_notification(
         user_id: str,
         transaction_id: str,
         fund_name: str,
         amount: Decimal,
-        notification_type: str
-    ) -> str:
-        """Crear notificación de suscripción."""
-        notification_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat()
-        
+        notification_type: str,
+        notification_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Construir notificación de suscripción."""
         notification_content = (
             f"Tu suscripción al fondo {fund_name} por COP ${amount:,.0f} "
             f"ha sido procesada exitosamente. ID de transacción: {transaction_id}"
         )
-        
-        notification_item = {
-            'notification_id': notification_id,
-            'user_id': user_id,
-            'transaction_id': transaction_id,
-            'type': notification_type,
-            'status': 'pending',
-            'content': notification_content,
-            'created_at': timestamp
-        }
-        
-        try:
-            notifications_table.put_item(Item=notification_item)
-            return notification_id
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al crear notificación: {str(e)}"
-            )
+        return NotificationService.build_notification_item(
+            user_id, transaction_id, notification_type, notification_content, notification_id
+        )
     
     @staticmethod
-    def create_cancellation_notification(
+    def build_cancellation_notification(
         user_id: str,
         transaction_id: str,
         fund_name: str,
         amount: Decimal,
-        notification_type: str
-    ) -> str:
-        """Crear notificación de cancelación."""
-        notification_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat()
-        
+        notification_type: str,
+        notification_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Construir notificación de cancelación."""
         notification_content = (
             f"Tu cancelación del fondo {fund_name} por COP ${amount:,.0f} "
             f"ha sido procesada exitosamente. ID de transacción: {transaction_id}"
         )
-        
-        notification_item = {
-            'notification_id': notification_id,
-            'user_id': user_id,
-            'transaction_id': transaction_id,
-            'type': notification_type,
-            'status': 'pending',
-            'content': notification_content,
-            'created_at': timestamp
-        }
-        
-        try:
-            notifications_table.put_item(Item=notification_item)
-            return notification_id
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al crear notificación: {str(e)}"
-            )
+        return NotificationService.build_notification_item(
+            user_id, transaction_id, notification_type, notification_content, notification_id
+        )
     
     @staticmethod
-    def create_deposit_notification(
+    def build_deposit_notification(
         user_id: str,
         transaction_id: str,
         amount: Decimal,
-        notification_type: str
-    ) -> str:
-        """Crear notificación de depósito."""
-        notification_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat()
-        
+        notification_type: str,
+        notification_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Construir notificación de depósito."""
         notification_content = (
             f"Tu depósito por COP ${amount:,.0f} ha sido procesado exitosamente. "
             f"ID de transacción: {transaction_id}"
         )
+        return NotificationService.build_notification_item(
+            user_id, transaction_id, notification_type, notification_content, notification_id
+        )
+    
+    @staticmethod
+    def build_outbox_entry(
+        user_id: str,
+        user: Dict[str, Any],
+        fund_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Datos de la notificación pendiente que viajan dentro de la transacción.
+
+        El worker de notificaciones los lee del stream de la tabla de
+        transacciones para construir y entregar la notificación. ``user``
+        necesita ``notification_preference`` y, para SMS, ``phone``.
+        """
+        channel = user['notification_preference']
+        recipient = user.get('phone') if channel == 'sms' else user_id
+        entry = {'channel': channel, 'recipient': recipient or user_id}
+        if fund_name is not None:
+            entry['fund_name'] = fund_name
+        return entry
+    
+    @staticmethod
+    def render_from_transaction(transaction: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Construir la notificación de una transacción con entrada en el outbox.
+
+        El ID de la notificación es el de la transacción, así que reprocesar el
+        mismo registro del stream no genera duplicados.
+        """
+        outbox = transaction.get('notification')
+        if not outbox:
+            return None
         
-        notification_item = {
-            'notification_id': notification_id,
-            'user_id': user_id,
-            'transaction_id': transaction_id,
-            'type': notification_type,
-            'status': 'pending',
-            'content': notification_content,
-            'created_at': timestamp
+        builder_kwargs = {
+            'user_id': transaction['user_id'],
+            'transaction_id': transaction['transaction_id'],
+            'amount': Decimal(str(transaction['amount'])),
+            'notification_type': outbox['channel'],
+            'notification_id': transaction['transaction_id']
         }
+        transaction_type = transaction['transaction_type']
+        if transaction_type == 'subscription':
+            notification = NotificationService.build_subscription_notification(
+                fund_name=outbox.get('fund_name', transaction['fund_id']), **builder_kwargs
+            )
+        elif transaction_type == 'cancellation':
+            notification = NotificationService.build_cancellation_notification(
+                fund_name=outbox.get('fund_name', transaction['fund_id']), **builder_kwargs
+            )
+        elif transaction_type == 'deposit':
+            notification = NotificationService.build_deposit_notification(**builder_kwargs)
+        else:
+            return None
         
+        # La fecha de la notificación es la de la transacción, no la del worker
+        notification['created_at'] = transaction['timestamp']
+        notification['recipient'] = outbox.get('recipient', transaction['user_id'])
+        return notification
+    
+    @staticmethod
+    def inbox_query(
+        user_id: str,
+        unread_only: bool,
+        limit: Optional[int],
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        """Parámetros de la consulta de la bandeja, de la más reciente a la más antigua."""
+        page_size = clamp_page_size(
+            limit,
+            settings.NOTIFICATIONS_DEFAULT_PAGE_SIZE,
+            settings.NOTIFICATIONS_MAX_PAGE_SIZE
+        )
+        projection = build_projection(INBOX_ATTRIBUTES)
+        if unread_only:
+            index_name, partition_key = 'UnreadIndex', 'unread_user_id'
+        else:
+            index_name, partition_key = 'UserIndex', 'user_id'
+        projection['ExpressionAttributeNames']['#pk'] = partition_key
+        query_kwargs: Dict[str, Any] = {
+            'IndexName': index_name,
+            'KeyConditionExpression': '#pk = :user_id',
+            'ExpressionAttributeValues': {':user_id': user_id},
+            'ScanIndexForward': False,
+            'Limit': page_size,
+            **projection
+        }
+        start_key = decode_cursor(cursor, scope=NotificationService.inbox_scope(user_id, unread_only))
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        return query_kwargs
+    
+    @staticmethod
+    def inbox_scope(user_id: str, unread_only: bool) -> str:
+        """Alcance del cursor: no se puede reutilizar entre usuarios ni entre filtros."""
+        return f"{user_id}#{'unread' if unread_only else 'all'}"
+    
+    @staticmethod
+    def inbox_page(
+        user_id: str,
+        unread_only: bool,
+        response: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Formatear una página de la bandeja y su cursor siguiente."""
+        notifications = []
+        for item in response['Items']:
+            notification = {attribute: item[attribute] for attribute in INBOX_ATTRIBUTES if attribute in item}
+            notification['read'] = 'read_at' in item
+            notifications.append(notification)
+        next_cursor = encode_cursor(
+            response.get('LastEvaluatedKey'),
+            scope=NotificationService.inbox_scope(user_id, unread_only)
+        )
+        return notifications, next_cursor
+    
+    @staticmethod
+    def mark_read_items(user_id: str, notification_ids: List[str], read_at: str) -> List[Dict[str, Any]]:
+        """Items transaccionales para marcar notificaciones como leídas y descontar el contador.
+
+        La condición sobre ``unread_user_id`` verifica a la vez que la
+        notificación pertenezca al usuario y que siga sin leer.
+        """
+        transact_items = [
+            {
+                'Update': {
+                    'TableName': settings.NOTIFICATIONS_TABLE_NAME,
+                    'Key': {'notification_id': notification_id},
+                    'UpdateExpression': 'SET read_at = :read_at REMOVE unread_user_id',
+                    'ConditionExpression': 'unread_user_id = :user_id',
+                    'ExpressionAttributeValues': {':read_at': read_at, ':user_id': user_id}
+                }
+            }
+            for notification_id in notification_ids
+        ]
+        transact_items.append({
+            'Update': {
+                'TableName': settings.USERS_TABLE_NAME,
+                'Key': {'user_id': user_id},
+                'UpdateExpression': 'ADD unread_notifications :delta',
+                'ExpressionAttributeValues': {':delta': -len(notification_ids)}
+            }
+        })
+        return transact_items
+
+
+class AsyncNotificationService:
+    """Bandeja de notificaciones del usuario sobre el cliente aioboto3."""
+
+    @staticmethod
+    async def list_notifications(
+        user_id: str,
+        unread_only: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Obtener la bandeja del usuario por páginas desde los índices por usuario."""
+        query_kwargs = NotificationService.inbox_query(user_id, unread_only, limit, cursor)
+        table = await get_async_table(settings.NOTIFICATIONS_TABLE_NAME)
+        try:
+            response = await table.query(**query_kwargs)
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener notificaciones: {str(e)}"
+            )
+        return NotificationService.inbox_page(user_id, unread_only, response)
+    
+    @staticmethod
+    async def get_unread_count(user_id: str) -> int:
+        """Leer el contador de notificaciones sin leer del usuario."""
         try:
-            notifications_table.put_item(Item=notification_item)
-            return notification_id
+            user = await load_entity(
+                settings.USERS_TABLE_NAME, {'user_id': user_id}, ['unread_notifications']
+            )
         except ClientError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al crear notificación: {str(e)}"
-            )
\ No newline at end of file
+                detail=f"Error al obtener notificaciones: {str(e)}"
+            )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+        # El contador es eventual frente a marcas concurrentes; nunca se muestra negativo
+        return max(0, int(user.get('unread_notifications', 0)))
+    
+    @staticmethod
+    async def mark_as_read(user_id: str, notification_ids: Iterable[str]) -> int:
+        """Marcar notificaciones como leídas; retorna cuántas pasaron a leídas.
+
+        Las ya leídas o de otro usuario se ignoran.
+        """
+        pending = list(dict.fromkeys(notification_ids))
+        client = await get_async_client()
+        marked = 0
+        read_at = datetime.utcnow().isoformat()
+        for start in range(0, len(pending), MARK_READ_CHUNK_SIZE):
+            chunk = pending[start:start + MARK_READ_CHUNK_SIZE]
+            while chunk:
+                try:
+                    await client.transact_write_items(
+                        TransactItems=NotificationService.mark_read_items(user_id, chunk, read_at)
+                    )
+                    marked += len(chunk)
+                    break
+                except ClientError as e:
+                    codes = get_cancellation_codes(e)
+                    rejected = {
+                        index for index, code in enumerate(codes[:len(chunk)])
+                        if code == 'ConditionalCheckFailed'
+                    }
+                    if not rejected:
+                        raise HTTPException(
+                            status_code=status.HTTP_409_CONFLICT
+                            if 'TransactionConflict' in codes
+                            else status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"Error al marcar notificaciones: {str(e)}"
+                        )
+                    chunk = [
+                        notification_id for index, notification_id in enumerate(chunk)
+                        if index not in rejected
+                    ]
+        if marked:
+            forget_entity(settings.USERS_TABLE_NAME, {'user_id': user_id})
+        return marked
+    
+    @staticmethod
+    async def mark_all_as_read(user_id: str) -> int:
+        """Marcar como leídas todas las notificaciones pendientes del índice de no leídas."""
+        table = await get_async_table(settings.NOTIFICATIONS_TABLE_NAME)
+        query_kwargs: Dict[str, Any] = {
+            'IndexName': 'UnreadIndex',
+            'KeyConditionExpression': 'unread_user_id = :user_id',
+            'ExpressionAttributeValues': {':user_id': user_id},
+            'ProjectionExpression': 'notification_id'
+        }
+        marked = 0
+        while True:
+            try:
+                response = await table.query(**query_kwargs)
+            except ClientError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Error al obtener notificaciones: {str(e)}"
+                )
+            marked += await AsyncNotificationService.mark_as_read(
+                user_id, [item['notification_id'] for item in response['Items']]
+            )
+            if 'LastEvaluatedKey' not in response:
+                return marked
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
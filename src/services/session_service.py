@@ -0,0 +1,133 @@
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime
+from typing import Tuple
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+
+from ..config.settings import settings
+from ..config.database import deserialize_item
+from ..config.async_database import get_async_table
+from ..utils.ids import generate_ulid
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Refresh token inválido o vencido",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+class AsyncSessionService:
+    """Sesiones de refresh token guardadas en DynamoDB.
+
+    El refresh token es ``<session_id>.<secreto>``; la tabla guarda solo el
+    HMAC del secreto. Renovar cuesta una escritura condicional y un HMAC, sin
+    volver a calcular el hash de la contraseña. Cada renovación rota el secreto;
+    si se presenta el secreto anterior (token reutilizado) la sesión se revoca.
+    Las sesiones vencen por TTL sin extenderse al rotar.
+    """
+
+    @staticmethod
+    def token_digest(secret: str) -> str:
+        key = (settings.REFRESH_TOKEN_SECRET_KEY or settings.JWT_SECRET_KEY).encode('utf-8')
+        return hmac.new(key, secret.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _parse(refresh_token: str) -> Tuple[str, str]:
+        session_id, separator, secret = refresh_token.partition('.')
+        if not separator or not session_id or not secret:
+            raise _invalid_refresh_token()
+        return session_id, secret
+
+    @staticmethod
+    async def create_session(user_id: str) -> str:
+        """Abrir una sesión y retornar su refresh token."""
+        session_id = generate_ulid()
+        secret = secrets.token_urlsafe(32)
+        now = int(time.time())
+        table = await get_async_table(settings.SESSIONS_TABLE_NAME)
+        await table.put_item(
+            Item={
+                'session_id': session_id,
+                'user_id': user_id,
+                'token_hash': AsyncSessionService.token_digest(secret),
+                'created_at': datetime.utcnow().isoformat(),
+                'expires_at': now + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+            },
+            ConditionExpression='attribute_not_exists(session_id)'
+        )
+        return f"{session_id}.{secret}"
+
+    @staticmethod
+    async def rotate(refresh_token: str) -> Tuple[str, str]:
+        """Rotar el refresh token.
+
+        Retorna ``(user_id, nuevo_refresh_token)``.
+        """
+        session_id, secret = AsyncSessionService._parse(refresh_token)
+        presented_hash = AsyncSessionService.token_digest(secret)
+        new_secret = secrets.token_urlsafe(32)
+        table = await get_async_table(settings.SESSIONS_TABLE_NAME)
+        try:
+            response = await table.update_item(
+                Key={'session_id': session_id},
+                UpdateExpression=(
+                    'SET token_hash = :new_hash, previous_token_hash = :presented_hash, rotated_at = :rotated_at'
+                ),
+                # El TTL elimina con retraso: el vencimiento se revisa aquí
+                ConditionExpression='token_hash = :presented_hash AND expires_at > :now',
+                ExpressionAttributeValues={
+                    ':new_hash': AsyncSessionService.token_digest(new_secret),
+                    ':presented_hash': presented_hash,
+                    ':rotated_at': datetime.utcnow().isoformat(),
+                    ':now': int(time.time())
+                },
+                ReturnValues='ALL_NEW',
+                ReturnValuesOnConditionCheckFailure='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Error al renovar la sesión: {str(e)}"
+                )
+            existing = deserialize_item(e.response.get('Item', {}))
+            if existing and hmac.compare_digest(existing.get('previous_token_hash', ''), presented_hash):
+                # Un token ya rotado volvió a usarse: pudo ser robado
+                await AsyncSessionService._delete(session_id)
+            raise _invalid_refresh_token()
+
+        return response['Attributes']['user_id'], f"{session_id}.{new_secret}"
+
+    @staticmethod
+    async def revoke(refresh_token: str) -> None:
+        """Cerrar la sesión del refresh token vigente."""
+        session_id, secret = AsyncSessionService._parse(refresh_token)
+        table = await get_async_table(settings.SESSIONS_TABLE_NAME)
+        try:
+            await table.delete_item(
+                Key={'session_id': session_id},
+                ConditionExpression='token_hash = :presented_hash',
+                ExpressionAttributeValues={':presented_hash': AsyncSessionService.token_digest(secret)}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise _invalid_refresh_token()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al cerrar la sesión: {str(e)}"
+            )
+
+    @staticmethod
+    async def _delete(session_id: str) -> None:
+        table = await get_async_table(settings.SESSIONS_TABLE_NAME)
+        try:
+            await table.delete_item(Key={'session_id': session_id})
+        except ClientError:
+            # La sesión vence sola por TTL
+            pass
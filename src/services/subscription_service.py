@@ -0,0 +1,324 @@
+import asyncio
+from decimal import Decimal
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, status
+
+from ..config.settings import settings
+from ..config.database import get_cancellation_codes, get_cancellation_item
+from .user_service import AsyncUserService
+from .fund_service import FundService, AsyncFundService
+from .transaction_service import TransactionService, AsyncTransactionService
+from .notification_service import NotificationService
+from .idempotency_service import append_idempotency_completion
+
+CONDITIONAL_CHECK_FAILED = 'ConditionalCheckFailed'
+
+# Atributos mínimos leídos por cada operación
+SUBSCRIPTION_USER_ATTRIBUTES = ('balance', 'notification_preference', 'phone')
+CANCELLATION_SUBSCRIPTION_ATTRIBUTES = ('status', 'invested_amount', 'transaction_id')
+
+
+class SubscriptionService:
+    """Validación y construcción de las escrituras transaccionales de suscripción y cancelación."""
+
+    @staticmethod
+    def prepare_subscription(
+        user_id: str,
+        fund_id: str,
+        amount: Optional[Decimal],
+        user: Dict[str, Any],
+        fund: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Validar la suscripción y construir los items de la escritura transaccional.
+
+        Retorna los ``TransactItems`` y la respuesta para el cliente.
+        """
+        current_balance = Decimal(str(user['balance']))
+        minimum_amount = Decimal(str(fund['minimum_amount']))
+        
+        # Determinar monto de inversión
+        investment_amount = amount or minimum_amount
+        
+        if investment_amount < minimum_amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El monto mínimo para este fondo es COP ${minimum_amount:,.0f}"
+            )
+        
+        if current_balance < investment_amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No tiene saldo disponible para vincularse al fondo"
+            )
+        
+        new_balance = current_balance - investment_amount
+        transaction_id = TransactionService.generate_transaction_id()
+        
+        transaction_item = TransactionService.build_transaction_item(
+            user_id=user_id,
+            transaction_id=transaction_id,
+            fund_id=fund_id,
+            transaction_type="subscription",
+            amount=investment_amount,
+            balance_before=current_balance,
+            balance_after=new_balance,
+            notification=NotificationService.build_outbox_entry(
+                user_id, user, fund_name=fund['name']
+            )
+        )
+        subscription_item = FundService.build_subscription_item(
+            user_id=user_id,
+            fund_id=fund_id,
+            amount=investment_amount,
+            transaction_id=transaction_id
+        )
+        
+        transact_items = [
+            {
+                'Update': {
+                    'TableName': settings.USERS_TABLE_NAME,
+                    'Key': {'user_id': user_id},
+                    'UpdateExpression': 'SET balance = :balance_after, updated_at = :updated_at',
+                    'ConditionExpression': 'balance = :balance_before AND balance >= :amount',
+                    'ExpressionAttributeValues': {
+                        ':balance_before': current_balance,
+                        ':balance_after': new_balance,
+                        ':amount': investment_amount,
+                        ':updated_at': datetime.utcnow().isoformat()
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }
+            },
+            {
+                'Put': {
+                    'TableName': settings.USER_FUNDS_TABLE_NAME,
+                    'Item': subscription_item,
+                    'ConditionExpression': 'attribute_not_exists(user_id) OR #status <> :active',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {':active': 'active'}
+                }
+            },
+            {
+                'Put': {
+                    'TableName': settings.TRANSACTIONS_TABLE_NAME,
+                    'Item': transaction_item
+                }
+            }
+        ]
+        
+        result = {
+            "message": "Suscripción exitosa",
+            "transaction_id": transaction_id,
+            "fund_name": fund['name'],
+            "invested_amount": investment_amount,
+            "new_balance": new_balance,
+            "notification_sent": user['notification_preference']
+        }
+        append_idempotency_completion(transact_items, result)
+        return transact_items, result
+    
+    @staticmethod
+    def validate_cancellable(subscription: Optional[Dict[str, Any]]) -> None:
+        """Verificar que exista una suscripción activa para cancelar."""
+        if not subscription:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No se encontró suscripción a este fondo"
+            )
+        
+        if subscription['status'] != 'active':
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La suscripción ya está cancelada"
+            )
+    
+    @staticmethod
+    def prepare_cancellation(
+        user_id: str,
+        fund_id: str,
+        subscription: Dict[str, Any],
+        user: Dict[str, Any],
+        fund: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Construir los items de la escritura transaccional de cancelación.
+
+        Retorna los ``TransactItems`` y la respuesta para el cliente.
+        """
+        current_balance = Decimal(str(user['balance']))
+        invested_amount = Decimal(str(subscription['invested_amount']))
+        
+        new_balance = current_balance + invested_amount
+        transaction_id = TransactionService.generate_transaction_id()
+        timestamp = datetime.utcnow().isoformat()
+        
+        transaction_item = TransactionService.build_transaction_item(
+            user_id=user_id,
+            transaction_id=transaction_id,
+            fund_id=fund_id,
+            transaction_type="cancellation",
+            amount=invested_amount,
+            balance_before=current_balance,
+            balance_after=new_balance,
+            notification=NotificationService.build_outbox_entry(
+                user_id, user, fund_name=fund['name']
+            )
+        )
+        
+        transact_items = [
+            {
+                'Update': {
+                    'TableName': settings.USERS_TABLE_NAME,
+                    'Key': {'user_id': user_id},
+                    'UpdateExpression': 'SET balance = :balance_after, updated_at = :updated_at',
+                    'ConditionExpression': 'balance = :balance_before',
+                    'ExpressionAttributeValues': {
+                        ':balance_before': current_balance,
+                        ':balance_after': new_balance,
+                        ':updated_at': timestamp
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }
+            },
+            {
+                'Update': {
+                    'TableName': settings.USER_FUNDS_TABLE_NAME,
+                    'Key': {'user_id': user_id, 'fund_id': fund_id},
+                    'UpdateExpression': (
+                        'SET #status = :cancelled, cancellation_date = :date, '
+                        'cancellation_transaction_id = :transaction_id'
+                    ),
+                    'ConditionExpression': '#status = :active AND transaction_id = :subscription_transaction_id',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {
+                        ':cancelled': 'cancelled',
+                        ':active': 'active',
+                        ':date': timestamp,
+                        ':transaction_id': transaction_id,
+                        ':subscription_transaction_id': subscription['transaction_id']
+                    }
+                }
+            },
+            {
+                'Put': {
+                    'TableName': settings.TRANSACTIONS_TABLE_NAME,
+                    'Item': transaction_item
+                }
+            }
+        ]
+        
+        result = {
+            "message": "Cancelación exitosa",
+            "transaction_id": transaction_id,
+            "fund_name": fund['name'],
+            "returned_amount": invested_amount,
+            "new_balance": new_balance,
+            "notification_sent": user['notification_preference']
+        }
+        append_idempotency_completion(transact_items, result)
+        return transact_items, result
+    
+    @staticmethod
+    def raise_for_cancelled_transaction(error: ClientError, subscription_message: str) -> None:
+        """Traducir la cancelación de la transacción a un error HTTP.
+
+        Se asume que el item 0 es la actualización del saldo y el item 1 la
+        escritura sobre la suscripción. Los cambios de saldo concurrentes se
+        reintentan antes de llegar aquí.
+        """
+        error_code = error.response['Error']['Code']
+        if error_code != 'TransactionCanceledException':
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al procesar la operación: {str(error)}"
+            )
+        
+        codes = get_cancellation_codes(error)
+        
+        if len(codes) > 1 and codes[1] == CONDITIONAL_CHECK_FAILED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=subscription_message
+            )
+        
+        if codes and codes[0] == CONDITIONAL_CHECK_FAILED and not get_cancellation_item(error, 0):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+        
+        # Escritura concurrente sobre los mismos items
+        raise TransactionService.balance_conflict()
+
+
+class AsyncSubscriptionService:
+    """Suscripciones y cancelaciones sobre el cliente aioboto3.
+
+    Las lecturas independientes se ejecutan en paralelo, así que la latencia
+    es la de la lectura más lenta y no la suma de todas.
+    """
+
+    @staticmethod
+    async def subscribe(user_id: str, fund_id: str, amount: Optional[Decimal] = None) -> Dict[str, Any]:
+        """Suscribir al usuario a un fondo con un único TransactWriteItems.
+
+        El débito del saldo, la suscripción, la transacción y la notificación
+        se confirman juntos. Las condiciones garantizan que el saldo no cambió
+        desde la lectura y alcanza para el monto, y que no existe una
+        suscripción activa al fondo. Si otra operación cambió el saldo, la
+        suscripción se valida y se reintenta con el saldo vigente.
+        """
+        user, fund = await asyncio.gather(
+            AsyncUserService.get_user_by_email(user_id, attributes=SUBSCRIPTION_USER_ATTRIBUTES),
+            AsyncFundService.get_fund_by_id(fund_id)
+        )
+        
+        return await AsyncTransactionService.write_balance_change(
+            user_id,
+            user,
+            lambda current_user: SubscriptionService.prepare_subscription(
+                user_id, fund_id, amount, current_user, fund
+            ),
+            lambda error: SubscriptionService.raise_for_cancelled_transaction(
+                error, subscription_message="Ya está suscrito a este fondo"
+            )
+        )
+    
+    @staticmethod
+    async def cancel(user_id: str, fund_id: str) -> Dict[str, Any]:
+        """Cancelar la suscripción a un fondo con un único TransactWriteItems.
+
+        El crédito del saldo, el cambio de estado de la suscripción, la
+        transacción y la notificación se confirman juntos; la escritura exige
+        que la suscripción siga activa. Si otra operación cambió el saldo, se
+        reintenta con el saldo vigente.
+        """
+        subscription, user, fund = await asyncio.gather(
+            AsyncFundService.get_subscription(
+                user_id, fund_id, attributes=CANCELLATION_SUBSCRIPTION_ATTRIBUTES
+            ),
+            AsyncUserService.get_user_by_email(user_id, attributes=SUBSCRIPTION_USER_ATTRIBUTES),
+            AsyncFundService.get_fund_by_id(fund_id),
+            return_exceptions=True
+        )
+        
+        # La suscripción se valida primero: sin ella no importan los otros errores
+        if isinstance(subscription, BaseException):
+            raise subscription
+        SubscriptionService.validate_cancellable(subscription)
+        for read in (user, fund):
+            if isinstance(read, BaseException):
+                raise read
+        
+        return await AsyncTransactionService.write_balance_change(
+            user_id,
+            user,
+            lambda current_user: SubscriptionService.prepare_cancellation(
+                user_id, fund_id, subscription, current_user, fund
+            ),
+            lambda error: SubscriptionService.raise_for_cancelled_transaction(
+                error, subscription_message="La suscripción ya está cancelada"
+            )
+        )
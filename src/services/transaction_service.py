@@ -1,99 +1,139 @@
-import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
 from ..config.settings import settings
+from ..config.database import get_cancellation_codes, get_cancellation_item
+from ..config.async_database import get_async_client, get_async_table
+from ..utils.ids import generate_ulid, ulid_lower_bound, ulid_upper_bound
+from ..utils.pagination import encode_cursor, decode_cursor, clamp_page_size
+from .user_service import AsyncUserService
+from .notification_service import NotificationService
+from .idempotency_service import append_idempotency_completion
+from ..utils.unit_of_work import apply_committed, forget_entity
 
-# Configuración de DynamoDB
-dynamodb = boto3.resource('dynamodb')
-transactions_table = dynamodb.Table(settings.TRANSACTIONS_TABLE_NAME)
+# Atributos del usuario leídos por un depósito
+DEPOSIT_USER_ATTRIBUTES = ('balance', 'notification_preference', 'phone')
+
+# Intentos de una escritura sobre el saldo cuando otra lo cambia a la vez
+BALANCE_WRITE_MAX_ATTEMPTS = 3
+
+CONDITIONAL_CHECK_FAILED = 'ConditionalCheckFailed'
+
+# Construye los ``TransactItems`` y la respuesta a partir del usuario vigente
+PrepareBalanceWrite = Callable[[Dict[str, Any]], Tuple[List[Dict[str, Any]], Dict[str, Any]]]
 
 
 class TransactionService:
+    """Construcción de transacciones y validaciones de depósitos, sin acceso a DynamoDB."""
+
     @staticmethod
     def generate_transaction_id() -> str:
-        """Generar un ID único para transacción."""
-        return str(uuid.uuid4())
+        """Generar un ID único para transacción, ordenable por fecha de creación."""
+        return generate_ulid()
     
     @staticmethod
-    def create_transaction(
+    def build_transaction_item(
         user_id: str,
+        transaction_id: str,
         fund_id: str,
         transaction_type: str,
         amount: Decimal,
         balance_before: Decimal,
         balance_after: Decimal,
-        transaction_status: str = "completed"
-    ) -> str:
-        """Crear una nueva transacción."""
-        transaction_id = str(uuid.uuid4())
-        timestamp = datetime.utcnow().isoformat()
-        
-        transaction_item = {
+        transaction_status: str = "completed",
+        notification: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Construir el item de una transacción.
+
+        ``notification`` es la entrada del outbox que el worker de
+        notificaciones procesa desde el stream de la tabla.
+        """
+        item = {
             'user_id': user_id,
             'transaction_id': transaction_id,
             'fund_id': fund_id,
             'transaction_type': transaction_type,
             'amount': amount,
-            'timestamp': timestamp,
+            'timestamp': datetime.utcnow().isoformat(),
             'status': transaction_status,
             'balance_before': balance_before,
             'balance_after': balance_after
         }
-        
-        try:
-            transactions_table.put_item(Item=transaction_item)
-            return transaction_id
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al crear transacción: {str(e)}"
-            )
+        if notification is not None:
+            item['notification'] = notification
+        return item
     
     @staticmethod
-    def get_user_transactions(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
-        """Obtener transacciones del usuario."""
-        try:
-            response = transactions_table.query(
-                KeyConditionExpression='user_id = :user_id',
-                ExpressionAttributeValues={':user_id': user_id},
-                ScanIndexForward=False,  # Orden descendente por timestamp
-                Limit=limit
-            )
-            
-            transactions = []
-            for item in response['Items']:
-                transactions.append({
-                    'user_id': item['user_id'],
-                    'transaction_id': item['transaction_id'],
-                    'fund_id': item['fund_id'],
-                    'transaction_type': item['transaction_type'],
-                    'amount': item['amount'],
-                    'timestamp': item['timestamp'],
-                    'status': item['status'],
-                    'balance_before': item['balance_before'],
-                    'balance_after': item['balance_after']
-                })
-            
-            return transactions
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al obtener transacciones: {str(e)}"
-            )
+    def transactions_query(
+        user_id: str,
+        limit: Optional[int],
+        cursor: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> Dict[str, Any]:
+        """Parámetros de la consulta del historial de transacciones."""
+        page_size = clamp_page_size(
+            limit,
+            settings.TRANSACTIONS_DEFAULT_PAGE_SIZE,
+            settings.TRANSACTIONS_MAX_PAGE_SIZE
+        )
+        # El rango por ULID solo se aplica si se pide una ventana de fechas: las
+        # transacciones anteriores a los ULID tienen IDs uuid4 sin orden temporal
+        # y sin filtro deben seguir apareciendo en el historial
+        key_condition = 'user_id = :user_id'
+        values: Dict[str, Any] = {':user_id': user_id}
+        if since is not None and until is not None:
+            key_condition += ' AND transaction_id BETWEEN :lower AND :upper'
+            values[':lower'] = ulid_lower_bound(since)
+            values[':upper'] = ulid_upper_bound(until)
+        elif since is not None:
+            key_condition += ' AND transaction_id >= :lower'
+            values[':lower'] = ulid_lower_bound(since)
+        elif until is not None:
+            key_condition += ' AND transaction_id <= :upper'
+            values[':upper'] = ulid_upper_bound(until)
+        query_kwargs: Dict[str, Any] = {
+            'KeyConditionExpression': key_condition,
+            'ExpressionAttributeValues': values,
+            'ScanIndexForward': False,  # Orden descendente por ID (ULID)
+            'Limit': page_size
+        }
+        start_key = decode_cursor(cursor, scope=user_id)
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+        
+        return query_kwargs
     
     @staticmethod
-    def process_deposit(
+    def transactions_page(
         user_id: str,
-        amount: Decimal,
-        current_balance: Decimal
-    ) -> Dict[str, Any]:
-        """Procesar un depósito de dinero."""
+        response: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Formatear una página del historial y su cursor siguiente."""
+        transactions = []
+        for item in response['Items']:
+            transactions.append({
+                'user_id': item['user_id'],
+                'transaction_id': item['transaction_id'],
+                'fund_id': item['fund_id'],
+                'transaction_type': item['transaction_type'],
+                'amount': item['amount'],
+                'timestamp': item['timestamp'],
+                'status': item['status'],
+                'balance_before': item['balance_before'],
+                'balance_after': item['balance_after']
+            })
+        
+        next_cursor = encode_cursor(response.get('LastEvaluatedKey'), scope=user_id)
+        return transactions, next_cursor
+    
+    @staticmethod
+    def validate_deposit_amount(amount: Decimal) -> None:
+        """Validar que el monto del depósito esté dentro de los límites."""
         # Validaciones
         min_deposit = settings.MIN_DEPOSIT_AMOUNT
         max_deposit = settings.MAX_DEPOSIT_AMOUNT
@@ -115,24 +155,191 @@ class TransactionService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"El monto máximo de depósito es COP ${max_deposit:,.0f}"
             )
-        
-        # Calcular nuevo balance
+    
+    @staticmethod
+    def prepare_deposit(
+        user_id: str,
+        amount: Decimal,
+        user: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Construir los items de la escritura transaccional de un depósito.
+
+        Retorna los ``TransactItems`` y la respuesta para el cliente. El item 0
+        es la actualización del saldo, condicionada a que no haya cambiado
+        desde la lectura.
+        """
+        current_balance = Decimal(str(user['balance']))
         new_balance = current_balance + amount
         
-        # Crear transacción
-        transaction_id = TransactionService.create_transaction(
+        transaction_id = TransactionService.generate_transaction_id()
+        transaction_item = TransactionService.build_transaction_item(
             user_id=user_id,
+            transaction_id=transaction_id,
             fund_id="DEPOSIT",
             transaction_type="deposit",
             amount=amount,
             balance_before=current_balance,
-            balance_after=new_balance
+            balance_after=new_balance,
+            notification=NotificationService.build_outbox_entry(user_id, user)
         )
         
-        return {
+        transact_items = [
+            {
+                'Update': {
+                    'TableName': settings.USERS_TABLE_NAME,
+                    'Key': {'user_id': user_id},
+                    'UpdateExpression': 'SET balance = :balance_after, updated_at = :updated_at',
+                    'ConditionExpression': 'balance = :balance_before',
+                    'ExpressionAttributeValues': {
+                        ':balance_before': current_balance,
+                        ':balance_after': new_balance,
+                        ':updated_at': datetime.utcnow().isoformat()
+                    },
+                    'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+                }
+            },
+            {
+                'Put': {
+                    'TableName': settings.TRANSACTIONS_TABLE_NAME,
+                    'Item': transaction_item
+                }
+            }
+        ]
+        result = {
+            'message': 'Depósito realizado exitosamente',
             'transaction_id': transaction_id,
-            'amount': amount,
-            'balance_before': current_balance,
-            'balance_after': new_balance,
-            'timestamp': datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+            'amount_deposited': amount,
+            'previous_balance': current_balance,
+            'new_balance': new_balance,
+            'timestamp': transaction_item['timestamp']
+        }
+        append_idempotency_completion(transact_items, result)
+        return transact_items, result
+    
+    @staticmethod
+    def balance_changed_user(error: ClientError) -> Optional[Dict[str, Any]]:
+        """Usuario vigente si la transacción se canceló solo porque su saldo cambió.
+
+        La actualización del saldo es el item 0 y pide
+        ``ReturnValuesOnConditionCheckFailure=ALL_OLD``, así que la cancelación
+        trae el item tal como estaba al evaluarse la condición. Retorna ``None``
+        si falló otro item o el usuario no existe.
+        """
+        if error.response['Error']['Code'] != 'TransactionCanceledException':
+            return None
+        codes = get_cancellation_codes(error)
+        if not codes or codes[0] != CONDITIONAL_CHECK_FAILED:
+            return None
+        if any(code not in (None, 'None') for code in codes[1:]):
+            return None
+        return get_cancellation_item(error, 0) or None
+    
+    @staticmethod
+    def raise_for_deposit_error(error: ClientError) -> None:
+        """Traducir el fallo de la transacción de un depósito a un error HTTP."""
+        if error.response['Error']['Code'] == 'TransactionCanceledException':
+            codes = get_cancellation_codes(error)
+            if codes and codes[0] == CONDITIONAL_CHECK_FAILED and not get_cancellation_item(error, 0):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Usuario no encontrado"
+                )
+            raise TransactionService.balance_conflict()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al procesar depósito: {str(error)}"
+        )
+    
+    @staticmethod
+    def balance_conflict() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="La operación entró en conflicto con otra en curso, intente nuevamente"
+        )
+
+
+class AsyncTransactionService:
+    """Operaciones de transacciones y depósitos sobre el cliente aioboto3."""
+
+    @staticmethod
+    async def get_user_transactions(
+        user_id: str,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Obtener transacciones del usuario por páginas, de la más reciente a la más antigua.
+
+        Como los IDs de transacción son ULID, ``since`` y ``until`` se traducen
+        en un rango sobre la llave de ordenamiento. Retorna la página y el
+        cursor firmado de la siguiente, o ``None`` si no hay más resultados. El
+        cursor solo es válido para el mismo usuario.
+        """
+        query_kwargs = TransactionService.transactions_query(
+            user_id, limit, cursor, since, until
+        )
+        table = await get_async_table(settings.TRANSACTIONS_TABLE_NAME)
+        
+        try:
+            response = await table.query(**query_kwargs)
+            return TransactionService.transactions_page(user_id, response)
+        except ClientError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener transacciones: {str(e)}"
+            )
+    
+    @staticmethod
+    async def process_deposit(user_id: str, amount: Decimal) -> Dict[str, Any]:
+        """Procesar un depósito de dinero con un único TransactWriteItems.
+
+        El nuevo saldo, la transacción con la entrada del outbox y, si la
+        solicitud trae llave de idempotencia, su respuesta se confirman juntos.
+        La condición sobre el saldo leído evita pisar escrituras concurrentes;
+        si otra operación lo cambió, se reintenta con el saldo vigente.
+        """
+        TransactionService.validate_deposit_amount(amount)
+        
+        user = await AsyncUserService.get_user_by_email(user_id, attributes=DEPOSIT_USER_ATTRIBUTES)
+        return await AsyncTransactionService.write_balance_change(
+            user_id,
+            user,
+            lambda current_user: TransactionService.prepare_deposit(user_id, amount, current_user),
+            TransactionService.raise_for_deposit_error
+        )
+    
+    @staticmethod
+    async def write_balance_change(
+        user_id: str,
+        user: Dict[str, Any],
+        prepare: PrepareBalanceWrite,
+        raise_for_error: Callable[[ClientError], None]
+    ) -> Dict[str, Any]:
+        """Confirmar una escritura transaccional cuyo item 0 es el saldo del usuario.
+
+        El saldo se actualiza con la condición de que no haya cambiado desde
+        la lectura. Si otra operación lo cambió, la escritura se reconstruye
+        con el usuario que devuelve la cancelación, sin leerlo de nuevo, hasta
+        ``BALANCE_WRITE_MAX_ATTEMPTS`` veces. ``raise_for_error`` traduce
+        cualquier otro fallo.
+        """
+        key = {'user_id': user_id}
+        client = await get_async_client()
+        for _ in range(BALANCE_WRITE_MAX_ATTEMPTS):
+            transact_items, result = prepare(user)
+            try:
+                await client.transact_write_items(TransactItems=transact_items)
+            except ClientError as e:
+                # El saldo en memoria ya no es confiable
+                forget_entity(settings.USERS_TABLE_NAME, key)
+                current_user = TransactionService.balance_changed_user(e)
+                if current_user is None:
+                    raise_for_error(e)
+                    raise
+                user = current_user
+                continue
+            apply_committed(settings.USERS_TABLE_NAME, key, {'balance': result['new_balance']})
+            return result
+        
+        raise TransactionService.balance_conflict()
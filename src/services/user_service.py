@@ -1,45 +1,32 @@
 import uuid
 from datetime import datetime
-from decimal import Decimal
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional
 
-import boto3
 from botocore.exceptions import ClientError
 from fastapi import HTTPException, status
 
 from ..config.settings import settings
+from ..config.async_database import get_async_table
+from ..utils.unit_of_work import load_entity, forget_entity
 
-# Configuración de DynamoDB
-dynamodb = boto3.resource('dynamodb')
-users_table = dynamodb.Table(settings.USERS_TABLE_NAME)
+# Atributos leídos por defecto en cada caso de uso
+USER_PUBLIC_ATTRIBUTES = (
+    'user_id', 'balance', 'email', 'phone',
+    'notification_preference', 'created_at', 'updated_at'
+)
+USER_AUTH_ATTRIBUTES = ('user_id', 'email', 'password_hash')
 
 
 class UserService:
+    """Construcción y filtrado de items de usuario, sin acceso a DynamoDB."""
+
     @staticmethod
-    def create_user(email: str, phone: str, hashed_password: str, notification_preference: str) -> Dict[str, Any]:
-        """Crear un nuevo usuario en la base de datos."""
-        user_id = str(uuid.uuid4())
+    def build_user_item(email: str, phone: str, hashed_password: str, notification_preference: str) -> Dict[str, Any]:
+        """Construir el item de un usuario nuevo con el saldo inicial."""
         timestamp = datetime.utcnow().isoformat()
-        
-        # Verificar si el usuario ya existe
-        try:
-            response = users_table.get_item(Key={'user_id': email})
-            if 'Item' in response:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="El usuario ya existe"
-                )
-        except ClientError as e:
-            if e.response['Error']['Code'] != 'ResourceNotFoundException':
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Error al verificar usuario existente"
-                )
-        
-        # Crear nuevo usuario
-        user_item = {
+        return {
             'user_id': email,
-            'internal_id': user_id,
+            'internal_id': str(uuid.uuid4()),
             'email': email,
             'phone': phone,
             'password_hash': hashed_password,
@@ -48,78 +35,83 @@ class UserService:
             'created_at': timestamp,
             'updated_at': timestamp
         }
-        
+    
+    @staticmethod
+    def to_public_user(user: Dict[str, Any], attributes: Iterable[str] = USER_PUBLIC_ATTRIBUTES) -> Dict[str, Any]:
+        """Filtrar un item de usuario a los atributos solicitados."""
+        return {attribute: user[attribute] for attribute in attributes if attribute in user}
+
+
+class AsyncUserService:
+    """Operaciones de usuarios sobre el cliente aioboto3."""
+
+    @staticmethod
+    async def create_user(email: str, phone: str, hashed_password: str, notification_preference: str) -> Dict[str, Any]:
+        """Crear un nuevo usuario con una única escritura condicional."""
+        user_item = UserService.build_user_item(
+            email, phone, hashed_password, notification_preference
+        )
+        table = await get_async_table(settings.USERS_TABLE_NAME)
         try:
-            users_table.put_item(Item=user_item)
-            return {
-                'user_id': email,
-                'balance': settings.INITIAL_USER_BALANCE,
-                'email': email,
-                'phone': phone,
-                'notification_preference': notification_preference,
-                'created_at': timestamp,
-                'updated_at': timestamp
-            }
+            await table.put_item(
+                Item=user_item,
+                ConditionExpression='attribute_not_exists(user_id)'
+            )
+            return UserService.to_public_user(user_item)
         except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El usuario ya existe"
+                )
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al crear usuario: {str(e)}"
             )
     
     @staticmethod
-    def get_user_by_email(email: str) -> Dict[str, Any]:
+    async def get_user_by_email(email: str, attributes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         """Obtener usuario por email."""
+        attributes = list(attributes or USER_PUBLIC_ATTRIBUTES)
         try:
-            response = users_table.get_item(Key={'user_id': email})
-            if 'Item' not in response:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Usuario no encontrado"
-                )
-            
-            user = response['Item']
-            return {
-                'user_id': user['user_id'],
-                'balance': user['balance'],
-                'email': user['email'],
-                'phone': user['phone'],
-                'notification_preference': user['notification_preference'],
-                'created_at': user['created_at'],
-                'updated_at': user['updated_at']
-            }
+            user = await load_entity(settings.USERS_TABLE_NAME, {'user_id': email}, attributes)
         except ClientError as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error al obtener usuario: {str(e)}"
             )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuario no encontrado"
+            )
+        return UserService.to_public_user(user, attributes)
     
     @staticmethod
-    def get_user_with_password(email: str) -> Dict[str, Any]:
+    async def get_user_with_password(email: str) -> Optional[Dict[str, Any]]:
         """Obtener usuario con contraseña para autenticación."""
         try:
-            response = users_table.get_item(Key={'user_id': email})
-            if 'Item' not in response:
-                return None
-            return response['Item']
+            return await load_entity(settings.USERS_TABLE_NAME, {'user_id': email}, USER_AUTH_ATTRIBUTES)
         except ClientError:
             return None
     
     @staticmethod
-    def update_user_balance(email: str, new_balance: Decimal) -> None:
-        """Actualizar el balance del usuario."""
-        timestamp = datetime.utcnow().isoformat()
-        
+    async def update_password_hash(email: str, password_hash: str) -> None:
+        """Reemplazar el hash de la contraseña del usuario.
+
+        Los errores de DynamoDB se propagan como ``ClientError`` para que el
+        login decida si ignorarlos.
+        """
+        table = await get_async_table(settings.USERS_TABLE_NAME)
         try:
-            users_table.update_item(
+            await table.update_item(
                 Key={'user_id': email},
-                UpdateExpression='SET balance = :balance, updated_at = :updated_at',
+                UpdateExpression='SET password_hash = :password_hash, updated_at = :updated_at',
+                ConditionExpression='attribute_exists(user_id)',
                 ExpressionAttributeValues={
-                    ':balance': new_balance,
-                    ':updated_at': timestamp
+                    ':password_hash': password_hash,
+                    ':updated_at': datetime.utcnow().isoformat()
                 }
             )
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error al actualizar balance: {str(e)}"
-            )
\ No newline at end of file
+        finally:
+            forget_entity(settings.USERS_TABLE_NAME, {'user_id': email})
@@ -0,0 +1,67 @@
+"""Backends de archivo para datos que salen de las tablas calientes."""
+
+import gzip
+import json
+import os
+from datetime import date
+from typing import Any, Dict, List
+
+
+class ArchivePartitionWriter:
+    """Escribe registros JSONL comprimidos con gzip en una partición.
+
+    El archivo se escribe con un nombre temporal y se renombra al cerrarse,
+    así un archivo visible siempre está completo.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._temp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = gzip.open(self._temp_path, 'wt', encoding='utf-8')
+        self.records = 0
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str))
+        self._file.write('\n')
+        self.records += 1
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+class LocalArchiveBackend:
+    """Archivo en el sistema de archivos local, particionado por fecha.
+
+    Estructura: ``<root>/<dataset>/date=YYYY-MM-DD/part-<run_id>.jsonl.gz``.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def partition_path(self, dataset: str, partition_date: date, run_id: str) -> str:
+        return os.path.join(
+            self.root, dataset, f"date={partition_date.isoformat()}", f"part-{run_id}.jsonl.gz"
+        )
+
+    def open_partition(self, dataset: str, partition_date: date, run_id: str) -> ArchivePartitionWriter:
+        return ArchivePartitionWriter(self.partition_path(dataset, partition_date, run_id))
+
+    def read_partition(self, dataset: str, partition_date: date) -> List[Dict[str, Any]]:
+        """Leer todos los registros archivados de una fecha."""
+        directory = os.path.join(self.root, dataset, f"date={partition_date.isoformat()}")
+        if not os.path.isdir(directory):
+            return []
+        records = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.jsonl.gz'):
+                continue
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as archive_file:
+                records.extend(json.loads(line) for line in archive_file if line.strip())
+        return records
@@ -1,20 +1,42 @@
 """Authentication utilities for FastAPI."""
 
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from ..config.settings import settings
 from ..services.auth_service import AuthService
 from ..services.user_service import UserService
 from ..models.schemas import User
 
 security = HTTPBearer()
 
+def get_authorizer_identity(request: Request) -> Optional[str]:
+    """Email verificado por el Lambda authorizer, si el request pasó por él.
+
+    Mangum deja el evento de API Gateway en ``scope["aws.event"]``; el contexto
+    del authorizer solo lo escribe API Gateway, el cliente no puede enviarlo.
+    """
+    if not settings.TRUST_AUTHORIZER_CONTEXT:
+        return None
+    event = request.scope.get("aws.event") or {}
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    return authorizer.get("email")
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
     """
     Get the current user email based on the JWT token.
     """
+    # El authorizer ya verificó el token: no se vuelve a decodificar
+    email = get_authorizer_identity(request)
+    if email:
+        return email
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
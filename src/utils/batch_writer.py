@@ -0,0 +1,122 @@
+"""Escritura de items en lotes con BatchWriteItem."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import settings
+from ..config.database import dynamodb, backoff_delay
+
+# Límite de items por llamada a BatchWriteItem
+BATCH_WRITE_MAX_ITEMS = 25
+
+
+class BufferedBatchWriter:
+    """Acumula escrituras de una tabla y las envía en llamadas de hasta 25 items.
+
+    El buffer se vacía al llenarse, cuando el item más antiguo supera
+    ``max_age_seconds`` (se revisa en cada escritura) o al salir del bloque
+    ``with``. Los
+    ``UnprocessedItems`` se reintentan con backoff exponencial con jitter.
+    """
+
+    def __init__(self, table_name: str, max_age_seconds: Optional[float] = None):
+        self.table_name = table_name
+        self.max_age_seconds = (
+            settings.BATCH_WRITER_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        )
+        self._lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._started = time.monotonic()
+        self.items_written = 0
+        self.batches = 0
+        self.retries = 0
+        self.write_seconds = 0.0
+
+    def __enter__(self) -> 'BufferedBatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.flush()
+
+    def put(self, item: Dict[str, Any]) -> None:
+        """Agregar un item al buffer, enviando el lote si corresponde."""
+        self._add({'PutRequest': {'Item': item}})
+
+    def delete(self, key: Dict[str, Any]) -> None:
+        """Agregar el borrado de una llave al buffer."""
+        self._add({'DeleteRequest': {'Key': key}})
+
+    def _add(self, request: Dict[str, Any]) -> None:
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(request)
+            ready = (
+                len(self._buffer) >= BATCH_WRITE_MAX_ITEMS
+                or time.monotonic() - self._oldest >= self.max_age_seconds
+            )
+            batch = self._take() if ready else None
+        if batch:
+            self._write(batch)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        batch = self._buffer[:BATCH_WRITE_MAX_ITEMS]
+        self._buffer = self._buffer[BATCH_WRITE_MAX_ITEMS:]
+        self._oldest = time.monotonic() if self._buffer else None
+        return batch
+
+    def flush(self) -> None:
+        """Enviar todo lo pendiente en el buffer."""
+        while True:
+            with self._lock:
+                batch = self._take() if self._buffer else None
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.monotonic()
+        request_items = {self.table_name: batch}
+        attempt = 0
+        try:
+            while request_items:
+                response = dynamodb.batch_write_item(RequestItems=request_items)
+                with self._lock:
+                    self.batches += 1
+                request_items = response.get('UnprocessedItems') or {}
+                if not request_items:
+                    break
+                attempt += 1
+                if attempt > settings.DYNAMODB_BATCH_MAX_RETRIES:
+                    raise ClientError(
+                        {'Error': {
+                            'Code': 'UnprocessedItems',
+                            'Message': f'Quedaron items sin escribir en {self.table_name}'
+                        }},
+                        'BatchWriteItem'
+                    )
+                with self._lock:
+                    self.retries += 1
+                time.sleep(backoff_delay(attempt))
+        finally:
+            unprocessed = len(request_items.get(self.table_name, []))
+            with self._lock:
+                self.items_written += len(batch) - unprocessed
+                self.write_seconds += time.monotonic() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de rendimiento del writer."""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            return {
+                'items_written': self.items_written,
+                'batches': self.batches,
+                'retries': self.retries,
+                'pending': len(self._buffer),
+                'write_seconds': round(self.write_seconds, 3),
+                'items_per_second': round(self.items_written / elapsed, 1) if elapsed > 0 else 0.0
+            }
@@ -0,0 +1,96 @@
+"""Pool de hilos acotado para trabajo de CPU desde handlers async."""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List
+
+
+class ExecutorSaturatedError(Exception):
+    """No hay cupo en el pool ni en su cola de espera."""
+
+
+class BoundedExecutor:
+    """Pool de hilos con un límite de trabajos en espera.
+
+    Como mucho ``max_workers`` trabajos se ejecutan a la vez y ``max_queue``
+    esperan turno; por encima de eso ``run`` falla de inmediato con
+    ``ExecutorSaturatedError`` en lugar de encolar sin límite. Se registra por
+    separado el tiempo en cola y el tiempo de cómputo de cada trabajo.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, name: str, samples: int = 1000):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_ms: Deque[float] = deque(maxlen=samples)
+        self._compute_ms: Deque[float] = deque(maxlen=samples)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError()
+            self._pending += 1
+
+    def _release(self, wait_ms: float, compute_ms: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            self._wait_ms.append(wait_ms)
+            self._compute_ms.append(compute_ms)
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Ejecutar ``function(*args)`` en el pool sin bloquear el event loop."""
+        self._acquire()
+        submitted = time.perf_counter()
+        timings = {'started': submitted}
+
+        def call() -> Any:
+            timings['started'] = time.perf_counter()
+            return function(*args)
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            self._release(0.0, 0.0)
+            raise
+        # El cupo se libera cuando termina el hilo, aunque el request se cancele
+        future.add_done_callback(lambda _: self._release(
+            (timings['started'] - submitted) * 1000,
+            (time.perf_counter() - timings['started']) * 1000
+        ))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _summary(samples: List[float]) -> Dict[str, float]:
+        if not samples:
+            return {}
+        ordered = sorted(samples)
+        p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+        return {
+            'p50': round(ordered[len(ordered) // 2], 1),
+            'p95': round(ordered[p95_index], 1),
+            'max': round(ordered[-1], 1)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            wait_ms = list(self._wait_ms)
+            compute_ms = list(self._compute_ms)
+            report = {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._pending,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
+        report['wait_ms'] = self._summary(wait_ms)
+        report['compute_ms'] = self._summary(compute_ms)
+        return report
@@ -0,0 +1,155 @@
+"""Cachés en memoria que viven mientras el contenedor Lambda está caliente."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class VersionedTTLCache:
+    """Caché con expiración por TTL e invalidación por versión.
+
+    Cada entrada guarda la versión vigente cuando empezó su carga. Invalidar
+    incrementa la versión, así que todas las entradas previas quedan obsoletas
+    de inmediato, incluidas las que un cargador en curso intente guardar
+    después de la invalidación.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Any, float, int]] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obtener un valor vigente o ``None``."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, version = entry
+                if version == self._version and now < expires_at:
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        """Guardar un valor; se descarta si la versión ya no es la vigente."""
+        with self._lock:
+            if version is None:
+                version = self._version
+            if version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, version)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Obtener un valor de la caché o cargarlo con ``loader``.
+
+        Los resultados ``None`` no se guardan.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        version = self.version
+        value = loader()
+        if value is not None:
+            self.set(key, value, version)
+        return value
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Variante de ``get_or_load`` para cargadores asíncronos."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        version = self.version
+        value = await loader()
+        if value is not None:
+            self.set(key, value, version)
+        return value
+
+    def invalidate(self) -> None:
+        """Invalidar todas las entradas."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de uso de la caché."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'version': self._version,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+
+class ExpiringLRUCache:
+    """Caché LRU acotada donde cada entrada trae su propio vencimiento.
+
+    ``expires_at`` es un epoch en segundos (reloj de pared), como el ``exp``
+    de un JWT. Al superar ``max_entries`` se descarta la menos usada.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Obtener un valor vigente o ``None``."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """Guardar un valor hasta ``expires_at``."""
+        if expires_at <= time.time() or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de uso de la caché."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,186 @@
+"""Cargador por request que agrupa lecturas puntuales de DynamoDB.
+
+Las llamadas a ``load_item`` hechas durante el mismo ciclo del event loop se
+acumulan y se despachan juntas en un único ``BatchGetItem`` (una entrada por
+tabla), y cada llamador recibe su propio resultado. Dentro de un request, la
+misma llave se lee una sola vez.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..config.async_database import async_batch_get_request, get_async_table
+from ..config.database import build_projection, BATCH_GET_MAX_KEYS
+
+# Grupo de lecturas: tabla y atributos proyectados (``None`` = item completo)
+GroupKey = Tuple[str, Optional[Tuple[str, ...]]]
+ItemKey = Tuple[Tuple[str, Any], ...]
+
+
+def _item_key(key: Dict[str, Any]) -> ItemKey:
+    return tuple(sorted(key.items()))
+
+
+class DynamoDBLoader:
+    """Agrupa y deduplica las lecturas por llave primaria de un request."""
+
+    def __init__(self):
+        self._pending: Dict[GroupKey, Dict[ItemKey, Tuple[Dict[str, Any], asyncio.Future]]] = {}
+        self._futures: Dict[Tuple[GroupKey, ItemKey], asyncio.Future] = {}
+        self._dispatch_scheduled = False
+        # El event loop solo guarda referencias débiles a las tareas
+        self._tasks: Set[asyncio.Task] = set()
+        self.loads = 0
+        self.deduplicated = 0
+        self.batches = 0
+
+    async def load(
+        self,
+        table_name: str,
+        key: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener un item por llave; ``None`` si no existe."""
+        if attributes is not None:
+            # Las llaves se proyectan siempre para poder asociar los resultados
+            attributes = tuple(sorted(set(attributes) | set(key)))
+        group: GroupKey = (table_name, attributes)
+        item_key = _item_key(key)
+        self.loads += 1
+        
+        future = self._futures.get((group, item_key))
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[(group, item_key)] = future
+        self._pending.setdefault(group, {})[item_key] = (key, future)
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop.call_soon(self._dispatch)
+        return await asyncio.shield(future)
+
+    def forget(self, table_name: str, key: Dict[str, Any]) -> None:
+        """Descartar las lecturas ya resueltas de un item para que la próxima vaya a DynamoDB."""
+        item_key = _item_key(key)
+        for group, cached_key in list(self._futures):
+            if group[0] == table_name and cached_key == item_key:
+                del self._futures[(group, cached_key)]
+
+    def _dispatch(self) -> None:
+        """Despachar las lecturas acumuladas en el ciclo actual."""
+        pending, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+        for request in self._build_requests(pending):
+            self.batches += 1
+            task = asyncio.ensure_future(self._execute(request))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _build_requests(pending) -> List[Dict[GroupKey, List[Tuple[Dict[str, Any], asyncio.Future]]]]:
+        """Repartir las lecturas en llamadas de hasta 100 llaves.
+
+        Una llamada admite cada tabla una sola vez, así que dos proyecciones
+        distintas sobre la misma tabla van en llamadas separadas.
+        """
+        requests: List[Dict[GroupKey, List[Tuple[Dict[str, Any], asyncio.Future]]]] = []
+        for group, entries in pending.items():
+            entries = list(entries.values())
+            while entries:
+                request = next(
+                    (
+                        candidate for candidate in requests
+                        if group[0] not in {table for table, _ in candidate}
+                        and sum(len(value) for value in candidate.values()) < BATCH_GET_MAX_KEYS
+                    ),
+                    None
+                )
+                if request is None:
+                    request = {}
+                    requests.append(request)
+                room = BATCH_GET_MAX_KEYS - sum(len(value) for value in request.values())
+                request[group], entries = entries[:room], entries[room:]
+        return requests
+
+    async def _execute(self, request: Dict[GroupKey, List[Tuple[Dict[str, Any], asyncio.Future]]]) -> None:
+        request_items = {
+            table_name: {
+                'Keys': [key for key, _ in entries],
+                **build_projection(attributes)
+            }
+            for (table_name, attributes), entries in request.items()
+        }
+        try:
+            responses = await async_batch_get_request(request_items)
+        except Exception as exc:  # pylint: disable=broad-except
+            for entries in request.values():
+                for _, future in entries:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        
+        for (table_name, _), entries in request.items():
+            key_names = list(entries[0][0]) if entries else []
+            found = {
+                _item_key({name: item.get(name) for name in key_names}): item
+                for item in responses.get(table_name, [])
+            }
+            for key, future in entries:
+                if not future.done():
+                    future.set_result(found.get(_item_key(key)))
+
+    def stats(self) -> Dict[str, int]:
+        """Métricas del cargador en el request actual."""
+        return {
+            'loads': self.loads,
+            'deduplicated': self.deduplicated,
+            'batches': self.batches
+        }
+
+
+_current_loader: ContextVar[Optional[DynamoDBLoader]] = ContextVar('dynamodb_loader', default=None)
+
+
+def get_request_loader() -> Optional[DynamoDBLoader]:
+    """Obtener el cargador del request actual, si existe."""
+    return _current_loader.get()
+
+
+@contextmanager
+def request_loader_scope() -> Iterator[DynamoDBLoader]:
+    """Activar un cargador nuevo durante el request."""
+    loader = DynamoDBLoader()
+    token = _current_loader.set(loader)
+    try:
+        yield loader
+    finally:
+        _current_loader.reset(token)
+
+
+def forget_item(table_name: str, key: Dict[str, Any]) -> None:
+    """Descartar del cargador del request la lectura de un item que acaba de cambiar."""
+    loader = get_request_loader()
+    if loader is not None:
+        loader.forget(table_name, key)
+
+
+async def load_item(
+    table_name: str,
+    key: Dict[str, Any],
+    attributes: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Leer un item por llave a través del cargador del request.
+
+    Fuera de un request (scripts, workers) se hace un ``GetItem`` directo.
+    """
+    loader = get_request_loader()
+    if loader is not None:
+        return await loader.load(table_name, key, attributes)
+    table = await get_async_table(table_name)
+    response = await table.get_item(Key=key, **build_projection(attributes))
+    return response.get('Item')
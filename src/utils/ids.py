@@ -0,0 +1,48 @@
+"""Generación de identificadores ordenables por tiempo (formato ULID)."""
+
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+# Alfabeto Base32 de Crockford; su orden ASCII coincide con su valor numérico
+_CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_TIMESTAMP_LENGTH = 10
+_RANDOMNESS_LENGTH = 16
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(_CROCKFORD_ALPHABET[index])
+    return ''.join(reversed(chars))
+
+
+def _to_milliseconds(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def generate_ulid(timestamp_ms: Optional[int] = None) -> str:
+    """Generar un ULID de 26 caracteres.
+
+    Los primeros 10 caracteres codifican los milisegundos desde epoch y los
+    16 restantes 80 bits aleatorios, así que el orden lexicográfico sigue el
+    orden de creación. No usa estado compartido ni bloqueos.
+    """
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    randomness = int.from_bytes(os.urandom(10), 'big')
+    return _encode(timestamp_ms, _TIMESTAMP_LENGTH) + _encode(randomness, _RANDOMNESS_LENGTH)
+
+
+def ulid_lower_bound(moment: datetime) -> str:
+    """Menor ULID posible para el instante dado, útil en consultas por rango."""
+    return _encode(_to_milliseconds(moment), _TIMESTAMP_LENGTH) + '0' * _RANDOMNESS_LENGTH
+
+
+def ulid_upper_bound(moment: datetime) -> str:
+    """Mayor ULID posible para el instante dado, útil en consultas por rango."""
+    return _encode(_to_milliseconds(moment), _TIMESTAMP_LENGTH) + 'Z' * _RANDOMNESS_LENGTH
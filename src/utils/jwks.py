@@ -0,0 +1,141 @@
+"""Llaves de firma de los JWT y su publicación como JWKS.
+
+Con ``JWT_ALGORITHM=RS256`` los tokens se firman con ``JWT_PRIVATE_KEY`` y
+llevan en el encabezado el ``kid`` de la llave (huella RFC 7638), así que otros
+servicios pueden verificarlos localmente con ``/.well-known/jwks.json``.
+
+Rotación de llaves:
+
+1. Publicar la nueva llave pública en ``JWT_ADDITIONAL_PUBLIC_KEYS`` y esperar
+   ``JWKS_CACHE_MAX_AGE_SECONDS`` para que los consumidores la tengan en caché.
+2. Cambiar ``JWT_PRIVATE_KEY`` por la nueva y dejar la pública anterior en
+   ``JWT_ADDITIONAL_PUBLIC_KEYS`` mientras haya tokens vigentes firmados con ella.
+3. Retirar la llave anterior.
+
+Con ``HS256`` se mantiene la firma con el secreto compartido y el JWKS queda vacío.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from jose import JWTError, jwk, jwt
+
+from ..config.settings import settings
+
+ASYMMETRIC_ALGORITHMS = ('RS256',)
+PEM_PUBLIC_KEY_END = '-----END PUBLIC KEY-----'
+
+
+def _b64url(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def public_jwk(pem: str, algorithm: str = ASYMMETRIC_ALGORITHMS[0]) -> Dict[str, str]:
+    """Campos públicos del JWK de una llave RSA en PEM (privada o pública)."""
+    fields = jwk.construct(pem, algorithm).public_key().to_dict()
+    return {name: fields[name] for name in ('kty', 'e', 'n')}
+
+
+def key_thumbprint(fields: Dict[str, str]) -> str:
+    """``kid`` según RFC 7638: SHA-256 de los campos obligatorios del JWK en orden canónico."""
+    canonical = json.dumps(
+        {name: fields[name] for name in ('e', 'kty', 'n')}, separators=(',', ':'), sort_keys=True
+    )
+    return _b64url(hashlib.sha256(canonical.encode('utf-8')).digest())
+
+
+def split_public_keys(pem_bundle: Optional[str]) -> List[str]:
+    """Separar varias llaves públicas PEM concatenadas en una sola variable."""
+    if not pem_bundle:
+        return []
+    return [
+        block.strip() + '\n' + PEM_PUBLIC_KEY_END + '\n'
+        for block in pem_bundle.split(PEM_PUBLIC_KEY_END)
+        if block.strip()
+    ]
+
+
+class KeyRing:
+    """Llave de firma activa y llaves públicas aceptadas, por ``kid``.
+
+    Las llaves de verificación ya construidas se guardan por ``kid`` durante
+    la vida del contenedor.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret_key: Optional[str] = None,
+        private_key_pem: Optional[str] = None,
+        additional_public_keys_pem: Optional[str] = None
+    ):
+        self.algorithm = algorithm
+        self.active_kid: Optional[str] = None
+        self._secret_key = secret_key
+        self._private_key_pem = private_key_pem
+        self._public_keys: Dict[str, Dict[str, str]] = {}
+        self._verification_keys: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            return
+        if not private_key_pem:
+            raise ValueError(f"JWT_PRIVATE_KEY es obligatoria con {algorithm}")
+        self.active_kid = self._add_public_key(private_key_pem)
+        for pem in split_public_keys(additional_public_keys_pem):
+            self._add_public_key(pem)
+
+    def _add_public_key(self, pem: str) -> str:
+        fields = public_jwk(pem, self.algorithm)
+        kid = key_thumbprint(fields)
+        self._public_keys[kid] = {**fields, 'kid': kid, 'use': 'sig', 'alg': self.algorithm}
+        return kid
+
+    @property
+    def asymmetric(self) -> bool:
+        return self.algorithm in ASYMMETRIC_ALGORITHMS
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        """Firmar los claims con la llave activa."""
+        if not self.asymmetric:
+            return jwt.encode(claims, self._secret_key, algorithm=self.algorithm)
+        return jwt.encode(
+            claims, self._private_key_pem, algorithm=self.algorithm, headers={'kid': self.active_kid}
+        )
+
+    def verification_key(self, token: str) -> Any:
+        """Llave para verificar el token según el ``kid`` de su encabezado."""
+        if not self.asymmetric:
+            return self._secret_key
+        kid = jwt.get_unverified_header(token).get('kid')
+        with self._lock:
+            key = self._verification_keys.get(kid)
+            if key is None:
+                fields = self._public_keys.get(kid)
+                if fields is None:
+                    raise JWTError("kid desconocido")
+                key = self._verification_keys[kid] = jwk.construct(fields, self.algorithm)
+        return key
+
+    def decode(self, token: str) -> Dict[str, Any]:
+        """Verificar firma y vencimiento; solo se acepta el algoritmo configurado."""
+        return jwt.decode(token, self.verification_key(token), algorithms=[self.algorithm])
+
+    def jwks(self) -> Dict[str, List[Dict[str, str]]]:
+        """Documento JWKS con las llaves públicas aceptadas."""
+        return {'keys': list(self._public_keys.values())}
+
+
+@functools.lru_cache(maxsize=None)
+def get_key_ring() -> KeyRing:
+    """Llaves compartidas mientras el contenedor está caliente."""
+    return KeyRing(
+        settings.JWT_ALGORITHM,
+        secret_key=settings.JWT_SECRET_KEY,
+        private_key_pem=settings.JWT_PRIVATE_KEY,
+        additional_public_keys_pem=settings.JWT_ADDITIONAL_PUBLIC_KEYS
+    )
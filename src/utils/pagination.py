@@ -0,0 +1,75 @@
+"""Utilidades de paginación por cursor sobre DynamoDB."""
+
+import base64
+import hashlib
+import hmac
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from ..config.settings import settings
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload: bytes, scope: str) -> bytes:
+    message = scope.encode('utf-8') + b'.' + payload
+    return hmac.new(settings.CURSOR_SECRET_KEY.encode('utf-8'), message, hashlib.sha256).digest()
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]], scope: str = '') -> Optional[str]:
+    """Convertir un ``LastEvaluatedKey`` en un cursor opaco y firmado.
+
+    ``scope`` se incluye en la firma para que el cursor solo sea válido en el
+    mismo contexto en que se emitió (por ejemplo, el mismo usuario).
+    """
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(
+        last_evaluated_key, separators=(',', ':'), sort_keys=True, default=str
+    ).encode('utf-8')
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload, scope))}"
+
+
+def decode_cursor(cursor: Optional[str], scope: str = '') -> Optional[Dict[str, Any]]:
+    """Verificar un cursor del cliente y convertirlo en un ``ExclusiveStartKey``."""
+    if not cursor:
+        return None
+    invalid_cursor = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Cursor inválido"
+    )
+    try:
+        encoded_payload, encoded_signature = cursor.split('.', 1)
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, TypeError):
+        raise invalid_cursor
+    if not hmac.compare_digest(signature, _sign(payload, scope)):
+        raise invalid_cursor
+    try:
+        key = json.loads(payload)
+    except ValueError:
+        raise invalid_cursor
+    if not isinstance(key, dict):
+        raise invalid_cursor
+    return key
+
+
+def clamp_page_size(limit: Optional[int], default: int, maximum: int) -> int:
+    """Acotar el tamaño de página solicitado."""
+    if limit is None:
+        return default
+    if limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El límite debe ser mayor que cero"
+        )
+    return min(limit, maximum)
@@ -0,0 +1,43 @@
+"""Verificación de los tokens de acceso.
+
+Solo depende de ``jose`` y de la configuración, así que el Lambda authorizer
+la importa sin cargar FastAPI ni passlib.
+"""
+
+import hashlib
+
+from jose import JWTError
+
+from ..config.settings import settings
+from .cache import ExpiringLRUCache
+from .jwks import get_key_ring
+
+
+class InvalidTokenError(Exception):
+    """El token no tiene firma válida, está vencido o no trae ``sub``."""
+
+
+# Tokens ya verificados, por digest del token, hasta su propio ``exp``
+verified_token_cache = ExpiringLRUCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+def verify_access_token(token: str) -> str:
+    """Email (``sub``) del token de acceso verificado."""
+    # El digest evita guardar el token en claro como llave
+    token_digest = hashlib.sha256(token.encode('utf-8')).digest()
+    email = verified_token_cache.get(token_digest)
+    if email is not None:
+        return email
+
+    try:
+        payload = get_key_ring().decode(token)
+    except JWTError as e:
+        raise InvalidTokenError(str(e)) from e
+    email = payload.get("sub")
+    if email is None:
+        raise InvalidTokenError("El token no trae sub")
+
+    # Sin ``exp`` no hay un vencimiento seguro para la entrada
+    if isinstance(payload.get("exp"), (int, float)):
+        verified_token_cache.set(token_digest, email, payload["exp"])
+    return email
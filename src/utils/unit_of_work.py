@@ -0,0 +1,158 @@
+"""Unidad de trabajo por request con mapa de identidad.
+
+Cada item leído por llave primaria se guarda una sola vez por request: las
+lecturas repetidas devuelven el mismo objeto y, si piden atributos que aún no
+se leyeron, solo se consultan los faltantes. Las escrituras siguen en los
+servicios; tras confirmarlas se reflejan aquí con ``apply_committed`` o, si
+fallan, se descarta el item con ``forget_entity``.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .dataloader import load_item, forget_item
+
+IdentityKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+_MISSING = object()
+
+
+class UnitOfWork:
+    """Mapa de identidad de un request."""
+
+    def __init__(self):
+        self._identity: Dict[IdentityKey, Any] = {}
+        self._loaded_attributes: Dict[IdentityKey, Optional[Set[str]]] = {}
+        self.hits = 0
+        self.loads = 0
+
+    @staticmethod
+    def _identity_key(table_name: str, key: Dict[str, Any]) -> IdentityKey:
+        return table_name, tuple(sorted(key.items()))
+
+    async def get(
+        self,
+        table_name: str,
+        key: Dict[str, Any],
+        attributes: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Obtener un item por llave, leyendo solo lo que aún no está en memoria.
+
+        ``attributes=None`` pide el item completo.
+        """
+        identity_key = self._identity_key(table_name, key)
+        requested = set(attributes) if attributes is not None else None
+        item = self._identity.get(identity_key, _MISSING)
+        loaded = self._loaded_attributes.get(identity_key, set())
+
+        if item is not _MISSING:
+            if item is None:
+                self.hits += 1
+                return None
+            if loaded is None or (requested is not None and requested <= loaded):
+                self.hits += 1
+                return item
+
+        # Solo se leen los atributos que faltan
+        to_load = requested
+        if requested is not None and loaded:
+            to_load = requested - loaded
+        self.loads += 1
+        values = await load_item(table_name, key, to_load)
+
+        current = self._identity.get(identity_key, _MISSING)
+        if values is None:
+            if current is _MISSING:
+                self._identity[identity_key] = None
+            return current if isinstance(current, dict) else None
+
+        if not isinstance(current, dict):
+            current = dict(values)
+            self._identity[identity_key] = current
+        else:
+            current.update(values)
+
+        if to_load is None:
+            self._loaded_attributes[identity_key] = None
+        elif self._loaded_attributes.get(identity_key, set()) is not None:
+            self._loaded_attributes[identity_key] = (
+                self._loaded_attributes.get(identity_key, set()) | to_load | set(key)
+            )
+        return current
+
+    def apply_committed(self, table_name: str, key: Dict[str, Any], values: Dict[str, Any]) -> None:
+        """Reflejar en memoria valores que una escritura ya persistió."""
+        identity_key = self._identity_key(table_name, key)
+        item = self._identity.get(identity_key)
+        if isinstance(item, dict):
+            item.update(values)
+            loaded = self._loaded_attributes.get(identity_key, set())
+            if loaded is not None:
+                self._loaded_attributes[identity_key] = loaded | set(values)
+
+    def forget(self, table_name: str, key: Dict[str, Any]) -> None:
+        """Descartar un item para forzar su próxima lectura.
+
+        También se descarta la lectura guardada por el cargador del request,
+        que de otro modo devolvería el mismo resultado.
+        """
+        identity_key = self._identity_key(table_name, key)
+        self._identity.pop(identity_key, None)
+        self._loaded_attributes.pop(identity_key, None)
+        forget_item(table_name, key)
+
+    def stats(self) -> Dict[str, int]:
+        """Métricas del mapa de identidad en el request actual."""
+        return {
+            'hits': self.hits,
+            'loads': self.loads,
+            'items': len(self._identity)
+        }
+
+
+_current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar('unit_of_work', default=None)
+
+
+def get_unit_of_work() -> Optional[UnitOfWork]:
+    """Obtener la unidad de trabajo del request actual, si existe."""
+    return _current_unit_of_work.get()
+
+
+@contextmanager
+def unit_of_work_scope() -> Iterator[UnitOfWork]:
+    """Activar una unidad de trabajo nueva durante el request."""
+    unit_of_work = UnitOfWork()
+    token = _current_unit_of_work.set(unit_of_work)
+    try:
+        yield unit_of_work
+    finally:
+        _current_unit_of_work.reset(token)
+
+
+async def load_entity(
+    table_name: str,
+    key: Dict[str, Any],
+    attributes: Optional[Iterable[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Leer un item a través del mapa de identidad del request, si hay uno activo."""
+    unit_of_work = get_unit_of_work()
+    if unit_of_work is not None:
+        return await unit_of_work.get(table_name, key, attributes)
+    return await load_item(table_name, key, attributes)
+
+
+def apply_committed(table_name: str, key: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """Reflejar en el mapa de identidad del request una escritura ya persistida."""
+    unit_of_work = get_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.apply_committed(table_name, key, values)
+
+
+def forget_entity(table_name: str, key: Dict[str, Any]) -> None:
+    """Descartar un item del request tras una escritura fallida o con resultado incierto."""
+    unit_of_work = get_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.forget(table_name, key)
+    else:
+        forget_item(table_name, key)
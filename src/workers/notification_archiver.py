@@ -0,0 +1,152 @@
+"""Archivo de notificaciones antiguas.
+
+Recorre el ``StatusIndex`` de la tabla de notificaciones buscando las que ya
+terminaron (``sent`` o ``dead_letter``) y son anteriores al corte, incluidas
+las vencidas que el TTL aún no eliminó. Las escribe como JSONL comprimido
+particionado por fecha de creación y, una vez cerrados los archivos, las
+elimina de la tabla con BatchWriteItem. Las que seguían sin leer se descuentan
+del contador del usuario.
+
+Uso::
+
+    python -m src.workers.notification_archiver --older-than-days 30 --archive-dir archive
+"""
+
+import argparse
+import json
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import settings
+from ..config.database import get_table
+from ..utils.archive import ArchivePartitionWriter, LocalArchiveBackend
+from ..utils.batch_writer import BufferedBatchWriter
+from ..utils.ids import generate_ulid
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DATASET = 'notifications'
+ARCHIVABLE_STATUSES = ('sent', 'dead_letter')
+
+# Atributos que solo sirven en la tabla caliente y no se archivan
+HOT_ONLY_ATTRIBUTES = ('unread_user_id', 'expires_at')
+
+
+def _archivable_notifications(table, cutoff: datetime) -> Iterator[Dict[str, Any]]:
+    """Notificaciones terminadas anteriores al corte, página por página."""
+    for notification_status in ARCHIVABLE_STATUSES:
+        query_kwargs: Dict[str, Any] = {
+            'IndexName': 'StatusIndex',
+            'KeyConditionExpression': '#status = :status AND created_at < :cutoff',
+            'ExpressionAttributeNames': {'#status': 'status'},
+            'ExpressionAttributeValues': {
+                ':status': notification_status,
+                ':cutoff': cutoff.isoformat()
+            }
+        }
+        while True:
+            response = table.query(**query_kwargs)
+            yield from response['Items']
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _compact(notification: Dict[str, Any]) -> Dict[str, Any]:
+    record = {key: value for key, value in notification.items() if key not in HOT_ONLY_ATTRIBUTES}
+    record['read'] = 'unread_user_id' not in notification
+    return record
+
+
+def archive_notifications(
+    backend: LocalArchiveBackend,
+    older_than_days: Optional[int] = None,
+    delete: bool = True,
+    now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Archivar y opcionalmente eliminar las notificaciones antiguas.
+
+    Retorna un resumen con los registros por partición.
+    """
+    days = settings.NOTIFICATION_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    table = get_table(settings.NOTIFICATIONS_TABLE_NAME)
+    run_id = generate_ulid()
+
+    writers: Dict[date, ArchivePartitionWriter] = {}
+    archived_ids: List[str] = []
+    unread_by_user: Counter = Counter()
+    try:
+        for notification in _archivable_notifications(table, cutoff):
+            partition_date = datetime.fromisoformat(notification['created_at']).date()
+            writer = writers.get(partition_date)
+            if writer is None:
+                writer = writers[partition_date] = backend.open_partition(
+                    ARCHIVE_DATASET, partition_date, run_id
+                )
+            writer.write(_compact(notification))
+            archived_ids.append(notification['notification_id'])
+            if 'unread_user_id' in notification:
+                unread_by_user[notification['user_id']] += 1
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.close()
+
+    # Solo se elimina de la tabla lo que ya quedó escrito en el archivo
+    if delete and archived_ids:
+        with BufferedBatchWriter(settings.NOTIFICATIONS_TABLE_NAME) as batch_writer:
+            for notification_id in archived_ids:
+                batch_writer.delete({'notification_id': notification_id})
+        users_table = get_table(settings.USERS_TABLE_NAME)
+        for user_id, unread in unread_by_user.items():
+            try:
+                users_table.update_item(
+                    Key={'user_id': user_id},
+                    UpdateExpression='ADD unread_notifications :delta',
+                    ConditionExpression='attribute_exists(user_id)',
+                    ExpressionAttributeValues={':delta': -unread}
+                )
+            except ClientError as e:
+                # Si el usuario ya no existe no hay contador que ajustar
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+    summary = {
+        'run_id': run_id,
+        'cutoff': cutoff.isoformat(),
+        'archived': len(archived_ids),
+        'deleted': len(archived_ids) if delete else 0,
+        'partitions': {
+            partition_date.isoformat(): writer.records
+            for partition_date, writer in sorted(writers.items())
+        }
+    }
+    logger.info("Archivo de notificaciones: %s", summary)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archivar notificaciones antiguas en JSONL comprimido")
+    parser.add_argument('--older-than-days', type=int, default=None, help="Antigüedad mínima en días")
+    parser.add_argument('--archive-dir', default=settings.NOTIFICATION_ARCHIVE_DIR, help="Directorio raíz del archivo")
+    parser.add_argument('--keep', action='store_true', help="Archivar sin eliminar de la tabla")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = archive_notifications(
+        LocalArchiveBackend(args.archive_dir),
+        older_than_days=args.older_than_days,
+        delete=not args.keep
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
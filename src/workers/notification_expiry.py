@@ -0,0 +1,74 @@
+"""Contador de no leídas ante el vencimiento de notificaciones por TTL.
+
+Cuando el TTL de la tabla de notificaciones elimina una notificación que
+seguía sin leer (conserva ``unread_user_id``), este handler descuenta el
+``unread_notifications`` del usuario. Consume el stream de la tabla, filtrado
+a los ``REMOVE`` hechos por el servicio de DynamoDB; las eliminaciones del
+archivador ya ajustan el contador por su cuenta.
+
+Los registros se aplican en orden y el procesamiento se detiene en la primera
+falla, que se reporta en ``batchItemFailures``: Lambda reintenta desde ese
+registro, así que ningún descuento ya aplicado se repite.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import settings
+from ..config.database import get_table, deserialize_item
+
+logger = logging.getLogger(__name__)
+
+TTL_PRINCIPAL = 'dynamodb.amazonaws.com'
+
+
+def _expired_unread(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Notificación sin leer eliminada por el TTL, o ``None`` si el registro no aplica."""
+    if record.get('eventName') != 'REMOVE':
+        return None
+    identity = record.get('userIdentity') or {}
+    if identity.get('type') != 'Service' or identity.get('principalId') != TTL_PRINCIPAL:
+        return None
+    image = record.get('dynamodb', {}).get('OldImage')
+    if not image or 'unread_user_id' not in image:
+        return None
+    return deserialize_item(image)
+
+
+def process_records(records: List[Dict[str, Any]], users_table) -> Dict[str, Any]:
+    """Descontar las notificaciones vencidas sin leer y retornar la respuesta para Lambda."""
+    decremented = 0
+    for record in records:
+        sequence_number = record.get('dynamodb', {}).get('SequenceNumber')
+        try:
+            notification = _expired_unread(record)
+            if notification is None:
+                continue
+            try:
+                users_table.update_item(
+                    Key={'user_id': notification['unread_user_id']},
+                    UpdateExpression='ADD unread_notifications :delta',
+                    ConditionExpression='attribute_exists(user_id)',
+                    ExpressionAttributeValues={':delta': -1}
+                )
+            except ClientError as e:
+                # Si el usuario ya no existe no hay contador que ajustar
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                continue
+            decremented += 1
+        except Exception:  # pylint: disable=broad-except
+            # Se reintenta desde este registro
+            logger.exception("No se pudo descontar la notificación del registro %s", sequence_number)
+            logger.info("Notificaciones vencidas descontadas: %s", decremented)
+            return {'batchItemFailures': [{'itemIdentifier': sequence_number}]}
+
+    logger.info("Notificaciones vencidas descontadas: %s", decremented)
+    return {'batchItemFailures': []}
+
+
+def handler(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Handler de Lambda para el stream de la tabla de notificaciones."""
+    return process_records(event.get('Records', []), get_table(settings.USERS_TABLE_NAME))
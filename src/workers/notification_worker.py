@@ -0,0 +1,290 @@
+"""Worker del outbox de notificaciones.
+
+Cada transacción que mueve dinero lleva en el atributo ``notification`` la
+entrada del outbox. Este handler consume el stream de la tabla de
+transacciones, construye las notificaciones, las entrega por lotes con los
+proveedores de ``delivery_service`` y registra el estado de cada una:
+
+    pending -> sent
+    pending -> failed -> ... -> sent | dead_letter
+
+Los registros que fallan se reportan en ``batchItemFailures`` para que Lambda
+los reintente; al agotar ``NOTIFICATION_MAX_ATTEMPTS`` la notificación queda en
+``dead_letter`` y deja de reintentarse.
+
+Para probarlo localmente contra un stream guardado::
+
+    python -m src.workers.notification_worker stream.json --dry-run
+"""
+
+import argparse
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import settings
+from ..config.database import dynamodb_client, get_table, deserialize_item, get_cancellation_codes
+from ..models.enums import NotificationType
+from ..services.notification_service import NotificationService
+from ..services.delivery_service import DeliveryDispatcher, FakeProvider, build_dispatcher, get_dispatcher
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('sent', 'dead_letter')
+CONDITIONAL_CHECK_FAILED = 'ConditionalCheckFailed'
+
+
+def apply_result(
+    notification: Dict[str, Any],
+    new_status: str,
+    attempts: int,
+    error: Optional[str] = None
+) -> Dict[str, Any]:
+    """Copia de la notificación con el resultado de un intento de entrega."""
+    updated = {
+        **notification,
+        'status': new_status,
+        'attempts': attempts,
+        'updated_at': datetime.utcnow().isoformat()
+    }
+    updated.pop('last_error', None)
+    if error is not None:
+        updated['last_error'] = error
+    return updated
+
+
+class NotificationStore:
+    """Estado de las notificaciones en la tabla de DynamoDB."""
+
+    def __init__(self):
+        self.table = get_table(settings.NOTIFICATIONS_TABLE_NAME)
+
+    def claim(self, notification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Registrar la notificación como pendiente si no existe.
+
+        La notificación y el contador de no leídas del usuario se escriben en
+        la misma transacción: el contador solo sube por notificaciones que
+        existen. Retorna el item guardado, o ``None`` si ya terminó (enviada o
+        en ``dead_letter``) o el usuario ya no existe.
+        """
+        item = {**notification, 'attempts': 0}
+        try:
+            dynamodb_client.transact_write_items(TransactItems=[
+                {
+                    'Put': {
+                        'TableName': settings.NOTIFICATIONS_TABLE_NAME,
+                        'Item': item,
+                        'ConditionExpression': 'attribute_not_exists(notification_id)'
+                    }
+                },
+                {
+                    'Update': {
+                        'TableName': settings.USERS_TABLE_NAME,
+                        'Key': {'user_id': notification['user_id']},
+                        'UpdateExpression': 'ADD unread_notifications :one',
+                        'ConditionExpression': 'attribute_exists(user_id)',
+                        'ExpressionAttributeValues': {':one': 1}
+                    }
+                }
+            ])
+            return item
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            codes = get_cancellation_codes(e)
+            notification_exists = codes[:1] == [CONDITIONAL_CHECK_FAILED]
+            if not notification_exists and codes[1:2] == [CONDITIONAL_CHECK_FAILED]:
+                logger.warning(
+                    "Notificación %s descartada: el usuario ya no existe", notification['notification_id']
+                )
+                return None
+            if not notification_exists:
+                raise
+
+        # Registro repetido del stream: se continúa desde el estado guardado
+        stored = self.table.get_item(
+            Key={'notification_id': notification['notification_id']},
+            ConsistentRead=True
+        ).get('Item')
+        if stored is None or stored['status'] in TERMINAL_STATUSES:
+            return None
+        return stored
+
+    def mark(self, notification: Dict[str, Any], new_status: str, attempts: int, error: Optional[str] = None) -> None:
+        """Registrar el resultado de un intento de entrega.
+
+        Solo se escriben los atributos de la entrega: reescribir el item
+        completo devolvería ``unread_user_id`` si el usuario la leyó mientras
+        se entregaba. La condición sobre ``attempts`` descarta el resultado de
+        un registro repetido que ya fue superado por otro intento.
+        """
+        update_expression = 'SET #status = :status, attempts = :attempts, updated_at = :updated_at'
+        values: Dict[str, Any] = {
+            ':status': new_status,
+            ':attempts': attempts,
+            ':previous_attempts': int(notification.get('attempts', 0)),
+            ':updated_at': datetime.utcnow().isoformat()
+        }
+        if error is not None:
+            update_expression += ', last_error = :last_error'
+            values[':last_error'] = error
+        else:
+            update_expression += ' REMOVE last_error'
+        try:
+            self.table.update_item(
+                Key={'notification_id': notification['notification_id']},
+                UpdateExpression=update_expression,
+                ConditionExpression='attribute_exists(notification_id) AND attempts = :previous_attempts',
+                ExpressionAttributeNames={'#status': 'status'},
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            logger.warning(
+                "Resultado de entrega descartado para %s: la notificación cambió o ya no existe",
+                notification['notification_id']
+            )
+
+    def flush(self) -> None:
+        pass
+
+
+class MemoryNotificationStore:
+    """Estado en memoria para reproducir un stream sin DynamoDB."""
+
+    def __init__(self):
+        self.items: Dict[str, Dict[str, Any]] = {}
+
+    def claim(self, notification: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        stored = self.items.setdefault(
+            notification['notification_id'], {**notification, 'attempts': 0}
+        )
+        if stored['status'] in TERMINAL_STATUSES:
+            return None
+        return dict(stored)
+
+    def mark(self, notification: Dict[str, Any], new_status: str, attempts: int, error: Optional[str] = None) -> None:
+        self.items[notification['notification_id']] = apply_result(notification, new_status, attempts, error)
+
+    def flush(self) -> None:
+        pass
+
+
+def _transaction_from_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extraer la transacción nueva de un registro del stream, si tiene outbox."""
+    if record.get('eventName') != 'INSERT':
+        return None
+    image = record.get('dynamodb', {}).get('NewImage')
+    if not image or 'notification' not in image:
+        return None
+    return deserialize_item(image)
+
+
+def process_records(records: List[Dict[str, Any]], store, dispatcher: DeliveryDispatcher) -> Dict[str, Any]:
+    """Procesar registros del stream y retornar la respuesta para Lambda."""
+    pending_by_channel: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    sequence_numbers: Dict[str, str] = {}
+    failures: List[str] = []
+
+    for record in records:
+        sequence_number = record.get('dynamodb', {}).get('SequenceNumber')
+        try:
+            transaction = _transaction_from_record(record)
+            notification = NotificationService.render_from_transaction(transaction) if transaction else None
+            if notification is None:
+                continue
+            claimed = store.claim(notification)
+        except Exception:  # pylint: disable=broad-except
+            # El registro se reintenta en la siguiente invocación
+            logger.exception("No se pudo registrar la notificación del registro %s", sequence_number)
+            failures.append(sequence_number)
+            continue
+        if claimed is None:
+            continue
+        pending_by_channel[claimed['type']].append(claimed)
+        sequence_numbers[claimed['notification_id']] = sequence_number
+
+    stats = {'sent': 0, 'failed': 0, 'dead_letter': 0}
+    try:
+        results = dispatcher.deliver(pending_by_channel)
+        for notifications in pending_by_channel.values():
+            for notification in notifications:
+                notification_id = notification['notification_id']
+                error = results.get(notification_id)
+                attempts = int(notification.get('attempts', 0)) + 1
+                if error is None:
+                    new_status = 'sent'
+                elif attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                    new_status = 'dead_letter'
+                else:
+                    new_status = 'failed'
+                store.mark(notification, new_status, attempts, error)
+                stats[new_status] += 1
+                if new_status == 'failed':
+                    failures.append(sequence_numbers[notification_id])
+        store.flush()
+    except Exception:  # pylint: disable=broad-except
+        # Sin el estado guardado, todo el lote vuelve a procesarse (al menos una vez)
+        logger.exception("No se pudo guardar el estado de las notificaciones")
+        failures.extend(sequence_numbers.values())
+
+    logger.info("Notificaciones procesadas: %s", stats)
+    logger.info("Entrega por canal: %s", dispatcher.report())
+    return {
+        'batchItemFailures': [
+            {'itemIdentifier': sequence_number}
+            for sequence_number in dict.fromkeys(failures)
+            if sequence_number is not None
+        ]
+    }
+
+
+def handler(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Handler de Lambda para el stream de la tabla de transacciones."""
+    return process_records(event.get('Records', []), NotificationStore(), get_dispatcher())
+
+
+def load_stream_file(path: str) -> List[Dict[str, Any]]:
+    """Leer un evento de stream guardado (JSON con ``Records`` o un registro por línea)."""
+    with open(path, encoding='utf-8') as stream_file:
+        content = stream_file.read()
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    if isinstance(parsed, dict):
+        return parsed.get('Records', [parsed])
+    return parsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reproducir un stream de transacciones en el worker de notificaciones")
+    parser.add_argument('stream_file', help="Evento de DynamoDB Streams guardado en disco")
+    parser.add_argument('--dry-run', action='store_true', help="Usar un estado en memoria en lugar de DynamoDB")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.dry_run:
+        store = MemoryNotificationStore()
+        dispatcher = DeliveryDispatcher(
+            {channel.value: FakeProvider(channel.value) for channel in NotificationType},
+            {channel.value: 1 for channel in NotificationType}
+        )
+    else:
+        store = NotificationStore()
+        dispatcher = build_dispatcher()
+    response = process_records(load_stream_file(args.stream_file), store, dispatcher)
+    dispatcher.close()
+    print(json.dumps(response, indent=2))
+    print(json.dumps(dispatcher.report(), indent=2))
+    if args.dry_run:
+        print(json.dumps(store.items, indent=2, default=str, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
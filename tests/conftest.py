@@ -0,0 +1,25 @@
+"""Configuración común de las pruebas.
+
+Los servicios leen la configuración al importarse, así que las variables se
+definen antes de cargar ``src``. Las pruebas reemplazan las llamadas a
+DynamoDB; las credenciales falsas evitan que alguna llegue a AWS.
+"""
+
+import os
+
+TEST_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'USERS_TABLE_NAME': 'users-test',
+    'FUNDS_TABLE_NAME': 'funds-test',
+    'USER_FUNDS_TABLE_NAME': 'user-funds-test',
+    'TRANSACTIONS_TABLE_NAME': 'transactions-test',
+    'NOTIFICATIONS_TABLE_NAME': 'notifications-test',
+    'IDEMPOTENCY_TABLE_NAME': 'idempotency-test',
+    'SESSIONS_TABLE_NAME': 'sessions-test',
+}
+
+for name, value in TEST_ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import authorizer
+from src.utils.jwks import get_key_ring
+from src.utils.tokens import verified_token_cache
+
+METHOD_ARN = 'arn:aws:execute-api:us-east-1:123456789012:abc123/dev/GET/users/me'
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    verified_token_cache.clear()
+    yield
+    verified_token_cache.clear()
+
+
+def access_token(**claims):
+    payload = {'sub': 'ana@example.com', 'exp': datetime.utcnow() + timedelta(minutes=5), **claims}
+    return get_key_ring().sign({name: value for name, value in payload.items() if value is not None})
+
+
+def authorize(authorization_token):
+    return authorizer.handler({'authorizationToken': authorization_token, 'methodArn': METHOD_ARN})
+
+
+def test_valid_token_is_allowed_on_every_route_of_the_stage():
+    policy = authorize(f"Bearer {access_token()}")
+
+    assert policy['principalId'] == 'ana@example.com'
+    statement = policy['policyDocument']['Statement'][0]
+    assert statement['Effect'] == 'Allow'
+    assert statement['Resource'] == 'arn:aws:execute-api:us-east-1:123456789012:abc123/dev/*/*'
+    assert policy['context'] == {'email': 'ana@example.com'}
+
+
+@pytest.mark.parametrize('authorization_token', [
+    '',
+    'Bearer',
+    'Basic dXN1YXJpbzpjbGF2ZQ==',
+    'Bearer no-es-un-jwt',
+])
+def test_missing_or_malformed_tokens_are_unauthorized(authorization_token):
+    with pytest.raises(Exception, match='^Unauthorized$'):
+        authorize(authorization_token)
+
+
+def test_expired_token_is_unauthorized():
+    token = access_token(exp=datetime.utcnow() - timedelta(minutes=1))
+
+    with pytest.raises(Exception, match='^Unauthorized$'):
+        authorize(f"Bearer {token}")
+
+
+def test_token_without_subject_is_unauthorized():
+    with pytest.raises(Exception, match='^Unauthorized$'):
+        authorize(f"Bearer {access_token(sub=None)}")
+
+
+def test_unexpected_verification_error_is_unauthorized(monkeypatch):
+    def broken_verify(token):
+        raise RuntimeError("llave no disponible")
+
+    monkeypatch.setattr(authorizer, 'verify_access_token', broken_verify)
+
+    with pytest.raises(Exception, match='^Unauthorized$'):
+        authorize(f"Bearer {access_token()}")
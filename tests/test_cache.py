@@ -0,0 +1,77 @@
+import asyncio
+
+from src.utils import cache
+from src.utils.cache import VersionedTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock.monotonic)
+    catalog = VersionedTTLCache(ttl_seconds=60)
+
+    catalog.set('fund', {'fund_id': '1'})
+    assert catalog.get('fund') == {'fund_id': '1'}
+
+    clock.now += 60
+    assert catalog.get('fund') is None
+
+
+def test_invalidate_discards_every_entry():
+    catalog = VersionedTTLCache(ttl_seconds=60)
+    catalog.set('fund', {'fund_id': '1'})
+
+    catalog.invalidate()
+
+    assert catalog.get('fund') is None
+    assert catalog.stats()['invalidations'] == 1
+
+
+def test_load_started_before_an_invalidation_is_not_stored():
+    catalog = VersionedTTLCache(ttl_seconds=60)
+
+    def stale_loader():
+        # Otra escritura invalida la caché mientras se carga
+        catalog.invalidate()
+        return {'fund_id': '1', 'minimum_amount': 75000}
+
+    assert catalog.get_or_load('fund', stale_loader)['minimum_amount'] == 75000
+    assert catalog.get('fund') is None
+
+
+def test_get_or_load_async_reuses_the_cached_value():
+    catalog = VersionedTTLCache(ttl_seconds=60)
+    loads = []
+
+    async def loader():
+        loads.append(True)
+        return {'fund_id': '1'}
+
+    async def scenario():
+        first = await catalog.get_or_load_async('fund', loader)
+        second = await catalog.get_or_load_async('fund', loader)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert len(loads) == 1
+
+
+def test_missing_values_are_not_cached():
+    catalog = VersionedTTLCache(ttl_seconds=60)
+    loads = []
+
+    def loader():
+        loads.append(True)
+
+    catalog.get_or_load('fund', loader)
+    catalog.get_or_load('fund', loader)
+
+    assert len(loads) == 2
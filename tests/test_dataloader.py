@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.utils import dataloader
+from src.utils.dataloader import load_item, request_loader_scope
+
+USERS = 'users-test'
+FUNDS = 'funds-test'
+
+
+@pytest.fixture
+def batch_gets(monkeypatch):
+    """Responder cada BatchGetItem con los items que existen."""
+    calls = []
+    stored = {
+        USERS: [{'user_id': 'ana@example.com', 'balance': 100}],
+        FUNDS: [{'fund_id': str(fund_id), 'name': f'FONDO_{fund_id}'} for fund_id in range(1, 151)]
+    }
+
+    async def fake_batch_get_request(request_items):
+        calls.append(request_items)
+        responses = {}
+        for table_name, request in request_items.items():
+            key_name = next(iter(request['Keys'][0]))
+            wanted = {key[key_name] for key in request['Keys']}
+            responses[table_name] = [item for item in stored[table_name] if item[key_name] in wanted]
+        return responses
+
+    monkeypatch.setattr(dataloader, 'async_batch_get_request', fake_batch_get_request)
+    return calls
+
+
+def run_in_request(coroutine_function):
+    async def scoped():
+        with request_loader_scope() as loader:
+            return await coroutine_function(), loader.stats()
+    return asyncio.run(scoped())
+
+
+def test_reads_in_the_same_loop_cycle_share_one_batch(batch_gets):
+    async def scenario():
+        return await asyncio.gather(
+            load_item(USERS, {'user_id': 'ana@example.com'}, ['balance']),
+            load_item(FUNDS, {'fund_id': '1'}),
+            load_item(FUNDS, {'fund_id': '2'}),
+            load_item(USERS, {'user_id': 'nadie@example.com'}, ['balance'])
+        )
+
+    (user, first_fund, second_fund, missing), stats = run_in_request(scenario)
+
+    assert user['balance'] == 100
+    assert (first_fund['name'], second_fund['name']) == ('FONDO_1', 'FONDO_2')
+    assert missing is None
+    assert len(batch_gets) == 1
+    assert batch_gets[0][USERS]['ProjectionExpression']
+    assert stats['batches'] == 1
+
+
+def test_repeated_key_is_read_once_per_request(batch_gets):
+    async def scenario():
+        first = await load_item(FUNDS, {'fund_id': '1'})
+        second = await load_item(FUNDS, {'fund_id': '1'})
+        return first, second
+
+    (first, second), stats = run_in_request(scenario)
+
+    assert first == second
+    assert len(batch_gets) == 1
+    assert stats['deduplicated'] == 1
+
+
+def test_more_than_one_hundred_keys_are_split_into_several_calls(batch_gets):
+    async def scenario():
+        return await asyncio.gather(*[
+            load_item(FUNDS, {'fund_id': str(fund_id)}) for fund_id in range(1, 151)
+        ])
+
+    funds, _ = run_in_request(scenario)
+
+    assert [fund['fund_id'] for fund in funds] == [str(fund_id) for fund_id in range(1, 151)]
+    assert sorted(len(call[FUNDS]['Keys']) for call in batch_gets) == [50, 100]
+
+
+def test_failed_batch_is_raised_to_every_caller(monkeypatch):
+    async def failing_batch_get_request(request_items):
+        raise RuntimeError("DynamoDB no disponible")
+
+    monkeypatch.setattr(dataloader, 'async_batch_get_request', failing_batch_get_request)
+
+    async def scenario():
+        return await asyncio.gather(
+            load_item(FUNDS, {'fund_id': '1'}),
+            load_item(FUNDS, {'fund_id': '2'}),
+            return_exceptions=True
+        )
+
+    results, _ = run_in_request(scenario)
+    assert all(isinstance(result, RuntimeError) for result in results)
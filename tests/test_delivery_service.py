@@ -0,0 +1,55 @@
+import pytest
+
+from src.config.settings import settings
+from src.services import delivery_service
+from src.services.delivery_service import FakeProvider, build_dispatcher, get_dispatcher
+
+
+@pytest.fixture
+def delivery_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'SMTP_HOST', None)
+    monkeypatch.setattr(settings, 'SMS_GATEWAY_URL', None)
+    get_dispatcher.cache_clear()
+    yield
+    get_dispatcher.cache_clear()
+
+
+def test_unconfigured_channels_fail_without_the_fake_delivery_opt_in(monkeypatch, delivery_settings):
+    monkeypatch.setattr(settings, 'ALLOW_FAKE_DELIVERY', False)
+
+    with pytest.raises(ValueError, match='SMTP_HOST, SMS_GATEWAY_URL'):
+        build_dispatcher()
+
+
+def test_fake_delivery_opt_in_uses_in_memory_providers(monkeypatch, delivery_settings):
+    monkeypatch.setattr(settings, 'ALLOW_FAKE_DELIVERY', True)
+
+    dispatcher = build_dispatcher()
+    try:
+        assert all(isinstance(provider, FakeProvider) for provider in dispatcher.providers.values())
+    finally:
+        dispatcher.close()
+
+
+def test_get_dispatcher_reuses_the_dispatcher(monkeypatch, delivery_settings):
+    monkeypatch.setattr(settings, 'ALLOW_FAKE_DELIVERY', True)
+    built = []
+    original_build_dispatcher = delivery_service.build_dispatcher
+
+    def counting_build_dispatcher():
+        built.append(original_build_dispatcher())
+        return built[-1]
+
+    monkeypatch.setattr(delivery_service, 'build_dispatcher', counting_build_dispatcher)
+
+    assert get_dispatcher() is get_dispatcher()
+    assert len(built) == 1
+    built[0].close()
+
+
+def test_delivery_provider_requires_send_batch():
+    class IncompleteProvider(delivery_service.DeliveryProvider):
+        channel = 'email'
+
+    with pytest.raises(TypeError):
+        IncompleteProvider()
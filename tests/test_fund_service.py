@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src.services import fund_service
+from src.services.fund_service import AsyncFundService, fund_catalog_cache
+
+FUND_ITEM = {
+    'fund_id': '1',
+    'name': 'FPV_BTG_PACTUAL_RECAUDADORA',
+    'minimum_amount': 75000,
+    'category': 'FPV',
+    'is_active': True,
+    'created_at': '2024-01-01T00:00:00'
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_fund_cache():
+    fund_catalog_cache.invalidate()
+    yield
+    fund_catalog_cache.invalidate()
+
+
+def test_get_funds_by_ids_loads_and_caches_missing_funds(monkeypatch):
+    calls = []
+
+    async def fake_async_batch_get_items(table_name, keys):
+        calls.append(keys)
+        return [dict(FUND_ITEM)]
+
+    monkeypatch.setattr(fund_service, 'async_batch_get_items', fake_async_batch_get_items)
+
+    funds = asyncio.run(AsyncFundService.get_funds_by_ids(['1', '2']))
+    assert funds == {'1': FUND_ITEM}
+    assert calls == [[{'fund_id': '1'}, {'fund_id': '2'}]]
+    assert fund_catalog_cache.get(('fund', '1')) == FUND_ITEM
+
+    # El fondo leído queda en caché; solo el inexistente se vuelve a consultar
+    assert asyncio.run(AsyncFundService.get_funds_by_ids(['1'])) == {'1': FUND_ITEM}
+    assert len(calls) == 1
+
+
+class FakeFundsTable:
+    def __init__(self):
+        self.scans = []
+
+    async def scan(self, **kwargs):
+        self.scans.append(kwargs)
+        return {'Items': [dict(FUND_ITEM)], 'LastEvaluatedKey': {'fund_id': '1'}}
+
+
+def test_list_funds_cursor_is_bound_to_the_active_filter(monkeypatch):
+    table = FakeFundsTable()
+
+    async def fake_get_async_table(table_name):
+        return table
+
+    monkeypatch.setattr(fund_service, 'get_async_table', fake_get_async_table)
+
+    _, cursor = asyncio.run(AsyncFundService.list_funds(active_only=True, limit=1))
+    assert cursor is not None
+
+    next_page, _ = asyncio.run(AsyncFundService.list_funds(active_only=True, limit=1, cursor=cursor))
+    assert len(next_page) == 1
+    assert table.scans[-1]['ExclusiveStartKey'] == {'fund_id': '1'}
+
+    # El mismo cursor no sirve para continuar el listado sin filtro
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncFundService.list_funds(active_only=False, limit=1, cursor=cursor))
+    assert error.value.status_code == 400
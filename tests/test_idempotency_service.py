@@ -0,0 +1,171 @@
+import asyncio
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from src.services import idempotency_service
+from src.services.idempotency_service import (
+    REPLAY_HEADER,
+    AsyncIdempotencyService,
+    append_idempotency_completion
+)
+
+USER_ID = 'ana@example.com'
+PAYLOAD = {'amount': 50000}
+
+
+class FakeIdempotencyTable:
+    def __init__(self, existing=None):
+        self.existing = existing
+        self.puts = []
+        self.updates = []
+        self.deletes = []
+
+    async def put_item(self, **kwargs):
+        self.puts.append(kwargs)
+        if self.existing is not None:
+            raise ClientError(
+                {
+                    'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Conditional check failed'},
+                    'Item': self.existing
+                },
+                'PutItem'
+            )
+        return {}
+
+    async def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        return {}
+
+    async def delete_item(self, **kwargs):
+        self.deletes.append(kwargs)
+        return {}
+
+
+@pytest.fixture
+def idempotency_table(monkeypatch):
+    def install(table):
+        async def fake_get_async_table(table_name):
+            return table
+        monkeypatch.setattr(idempotency_service, 'get_async_table', fake_get_async_table)
+        return table
+    return install
+
+
+def execute(action, idempotency_key='clave-1'):
+    return asyncio.run(
+        AsyncIdempotencyService.execute(USER_ID, 'deposit', idempotency_key, PAYLOAD, action)
+    )
+
+
+def failing_action(status_code, detail='Error'):
+    async def action():
+        raise HTTPException(status_code=status_code, detail=detail)
+    return action
+
+
+def test_successful_action_stores_the_response(idempotency_table):
+    table = idempotency_table(FakeIdempotencyTable())
+
+    async def action():
+        return {'new_balance': 150000}
+
+    assert execute(action) == {'new_balance': 150000}
+    values = table.updates[0]['ExpressionAttributeValues']
+    assert values[':status_code'] == 200
+    assert json.loads(values[':body']) == {'new_balance': 150000}
+
+
+def test_completion_inside_the_transaction_is_not_written_again(idempotency_table):
+    table = idempotency_table(FakeIdempotencyTable())
+    transact_items = []
+
+    async def action():
+        append_idempotency_completion(transact_items, {'new_balance': 150000})
+        return {'new_balance': 150000}
+
+    execute(action)
+
+    assert transact_items[0]['Update']['ConditionExpression'] == '#status = :in_progress'
+    assert table.updates == []
+
+
+def test_conflict_releases_the_key(idempotency_table):
+    table = idempotency_table(FakeIdempotencyTable())
+
+    with pytest.raises(HTTPException) as error:
+        execute(failing_action(409))
+
+    assert error.value.status_code == 409
+    assert len(table.deletes) == 1
+    assert table.updates == []
+
+
+def test_client_error_is_stored_as_the_final_response(idempotency_table):
+    table = idempotency_table(FakeIdempotencyTable())
+
+    with pytest.raises(HTTPException):
+        execute(failing_action(400, 'Saldo insuficiente'))
+
+    values = table.updates[0]['ExpressionAttributeValues']
+    assert values[':status_code'] == 400
+    assert json.loads(values[':body']) == {'detail': 'Saldo insuficiente'}
+    assert table.deletes == []
+
+
+def test_server_error_keeps_the_key_locked(idempotency_table):
+    table = idempotency_table(FakeIdempotencyTable())
+
+    with pytest.raises(HTTPException):
+        execute(failing_action(500))
+
+    # La escritura pudo confirmarse: la llave queda bloqueada hasta vencer
+    assert table.updates == []
+    assert table.deletes == []
+
+
+def test_completed_key_replays_the_stored_response(idempotency_table):
+    idempotency_table(FakeIdempotencyTable(existing={
+        'idempotency_key': {'S': 'ana@example.com#deposit#clave-1'},
+        'status': {'S': 'completed'},
+        'request_hash': {'S': AsyncIdempotencyService.request_hash(PAYLOAD)},
+        'response_status': {'N': '200'},
+        'response_body': {'S': '{"new_balance": 150000}'}
+    }))
+    calls = []
+
+    async def action():
+        calls.append(True)
+
+    response = execute(action)
+
+    assert calls == []
+    assert response.status_code == 200
+    assert json.loads(response.body) == {'new_balance': 150000}
+    assert response.headers[REPLAY_HEADER] == 'true'
+
+
+def test_key_reused_with_other_data_is_rejected(idempotency_table):
+    idempotency_table(FakeIdempotencyTable(existing={
+        'idempotency_key': {'S': 'ana@example.com#deposit#clave-1'},
+        'status': {'S': 'completed'},
+        'request_hash': {'S': 'otra-huella'}
+    }))
+
+    with pytest.raises(HTTPException) as error:
+        execute(failing_action(500))
+    assert error.value.status_code == 422
+
+
+def test_key_in_progress_is_a_conflict(idempotency_table):
+    idempotency_table(FakeIdempotencyTable(existing={
+        'idempotency_key': {'S': 'ana@example.com#deposit#clave-1'},
+        'status': {'S': 'in_progress'},
+        'request_hash': {'S': AsyncIdempotencyService.request_hash(PAYLOAD)}
+    }))
+
+    with pytest.raises(HTTPException) as error:
+        execute(failing_action(500))
+    assert error.value.status_code == 409
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+from src.utils.ids import generate_ulid, ulid_lower_bound, ulid_upper_bound
+
+
+def test_ulids_sort_by_creation_time():
+    earlier = generate_ulid(1_700_000_000_000)
+    later = generate_ulid(1_700_000_000_001)
+
+    assert len(earlier) == len(later) == 26
+    assert earlier < later
+
+
+def test_ulids_in_the_same_millisecond_are_distinct():
+    assert len({generate_ulid(1_700_000_000_000) for _ in range(1000)}) == 1000
+
+
+def test_bounds_cover_every_ulid_of_the_instant():
+    moment = datetime(2024, 10, 15, 10, 0, tzinfo=timezone.utc)
+    milliseconds = int(moment.timestamp() * 1000)
+    ulid = generate_ulid(milliseconds)
+
+    assert ulid_lower_bound(moment) <= ulid <= ulid_upper_bound(moment)
+    assert ulid_upper_bound(moment - timedelta(milliseconds=1)) < ulid
+    assert ulid < ulid_lower_bound(moment + timedelta(milliseconds=1))
+
+
+def test_naive_datetimes_are_read_as_utc():
+    moment = datetime(2024, 10, 15, 10, 0)
+
+    assert ulid_lower_bound(moment) == ulid_lower_bound(moment.replace(tzinfo=timezone.utc))
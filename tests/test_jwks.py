@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import JWTError, jwt
+
+from src.utils.jwks import KeyRing, get_key_ring
+
+
+def generate_key_pair():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode('ascii')
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('ascii')
+    return private_pem, public_pem
+
+
+@pytest.fixture(scope='module')
+def key_pairs():
+    return generate_key_pair(), generate_key_pair()
+
+
+def claims():
+    return {'sub': 'ana@example.com', 'exp': datetime.utcnow() + timedelta(minutes=5)}
+
+
+def test_rs256_tokens_carry_the_published_kid(key_pairs):
+    (private_pem, _), _ = key_pairs
+    key_ring = KeyRing('RS256', private_key_pem=private_pem)
+
+    token = key_ring.sign(claims())
+
+    assert jwt.get_unverified_header(token)['kid'] == key_ring.active_kid
+    assert [key['kid'] for key in key_ring.jwks()['keys']] == [key_ring.active_kid]
+    assert key_ring.decode(token)['sub'] == 'ana@example.com'
+
+
+def test_tokens_signed_with_a_rotated_key_still_verify(key_pairs):
+    (old_private_pem, old_public_pem), (new_private_pem, _) = key_pairs
+    old_token = KeyRing('RS256', private_key_pem=old_private_pem).sign(claims())
+
+    key_ring = KeyRing('RS256', private_key_pem=new_private_pem, additional_public_keys_pem=old_public_pem)
+
+    assert len(key_ring.jwks()['keys']) == 2
+    assert key_ring.decode(old_token)['sub'] == 'ana@example.com'
+
+
+def test_tokens_with_an_unknown_kid_are_rejected(key_pairs):
+    (old_private_pem, _), (new_private_pem, _) = key_pairs
+    old_token = KeyRing('RS256', private_key_pem=old_private_pem).sign(claims())
+
+    with pytest.raises(JWTError):
+        KeyRing('RS256', private_key_pem=new_private_pem).decode(old_token)
+
+
+def test_hs256_publishes_an_empty_jwks():
+    key_ring = KeyRing('HS256', secret_key='secreto')
+
+    assert key_ring.jwks() == {'keys': []}
+    assert key_ring.decode(key_ring.sign(claims()))['sub'] == 'ana@example.com'
+
+
+def test_get_key_ring_is_built_once():
+    assert get_key_ring() is get_key_ring()
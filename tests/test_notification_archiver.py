@@ -0,0 +1,128 @@
+from datetime import date, datetime
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.config.settings import settings
+from src.utils.archive import LocalArchiveBackend
+from src.workers import notification_archiver
+from src.workers.notification_archiver import ARCHIVE_DATASET, archive_notifications
+
+NOW = datetime(2024, 12, 1)
+
+
+def notification(notification_id, user_id, created_at, unread=False):
+    item = {
+        'notification_id': notification_id,
+        'user_id': user_id,
+        'status': 'sent',
+        'created_at': created_at,
+        'expires_at': 1735689600
+    }
+    if unread:
+        item['unread_user_id'] = user_id
+    return item
+
+
+class FakeNotificationsTable:
+    def __init__(self, items):
+        self.items = items
+
+    def query(self, **kwargs):
+        wanted = kwargs['ExpressionAttributeValues']
+        return {'Items': [
+            item for item in self.items
+            if item['status'] == wanted[':status'] and item['created_at'] < wanted[':cutoff']
+        ]}
+
+
+class FakeUsersTable:
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        if kwargs['Key']['user_id'] in self.missing:
+            raise ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Conditional check failed'}},
+                'UpdateItem'
+            )
+
+
+class FakeBatchWriter:
+    deleted = []
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def delete(self, key):
+        FakeBatchWriter.deleted.append(key)
+
+
+@pytest.fixture
+def archiver_tables(monkeypatch):
+    def install(notifications, missing_users=()):
+        tables = {
+            settings.NOTIFICATIONS_TABLE_NAME: FakeNotificationsTable(notifications),
+            settings.USERS_TABLE_NAME: FakeUsersTable(missing_users)
+        }
+        FakeBatchWriter.deleted = []
+        monkeypatch.setattr(notification_archiver, 'get_table', tables.__getitem__)
+        monkeypatch.setattr(notification_archiver, 'BufferedBatchWriter', FakeBatchWriter)
+        return tables[settings.USERS_TABLE_NAME]
+    return install
+
+
+def test_archived_unread_notifications_are_decremented_per_user(archiver_tables, tmp_path):
+    users_table = archiver_tables([
+        notification('N1', 'ana@example.com', '2024-10-01T10:00:00', unread=True),
+        notification('N2', 'ana@example.com', '2024-10-01T11:00:00', unread=True),
+        notification('N3', 'ana@example.com', '2024-10-02T10:00:00'),
+        notification('N4', 'luis@example.com', '2024-10-02T12:00:00', unread=True),
+        notification('N5', 'luis@example.com', '2024-11-25T12:00:00', unread=True)
+    ])
+    backend = LocalArchiveBackend(str(tmp_path))
+
+    summary = archive_notifications(backend, older_than_days=30, now=NOW)
+
+    assert summary['archived'] == 4
+    assert summary['partitions'] == {'2024-10-01': 2, '2024-10-02': 2}
+    assert [key['notification_id'] for key in FakeBatchWriter.deleted] == ['N1', 'N2', 'N3', 'N4']
+    deltas = {
+        update['Key']['user_id']: update['ExpressionAttributeValues'][':delta']
+        for update in users_table.updates
+    }
+    assert deltas == {'ana@example.com': -2, 'luis@example.com': -1}
+
+    archived = backend.read_partition(ARCHIVE_DATASET, date(2024, 10, 1))
+    assert [record['read'] for record in archived] == [False, False]
+    assert all('unread_user_id' not in record and 'expires_at' not in record for record in archived)
+
+
+def test_deleted_users_are_not_recreated_by_the_counter(archiver_tables, tmp_path):
+    users_table = archiver_tables(
+        [notification('N1', 'ana@example.com', '2024-10-01T10:00:00', unread=True)],
+        missing_users=['ana@example.com']
+    )
+
+    summary = archive_notifications(LocalArchiveBackend(str(tmp_path)), older_than_days=30, now=NOW)
+
+    assert summary['deleted'] == 1
+    assert users_table.updates[0]['ConditionExpression'] == 'attribute_exists(user_id)'
+
+
+def test_keep_archives_without_touching_the_tables(archiver_tables, tmp_path):
+    users_table = archiver_tables([notification('N1', 'ana@example.com', '2024-10-01T10:00:00', unread=True)])
+
+    summary = archive_notifications(LocalArchiveBackend(str(tmp_path)), older_than_days=30, delete=False, now=NOW)
+
+    assert (summary['archived'], summary['deleted']) == (1, 0)
+    assert FakeBatchWriter.deleted == []
+    assert users_table.updates == []
@@ -0,0 +1,92 @@
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from src.workers.notification_expiry import TTL_PRINCIPAL, process_records
+
+
+class FakeUsersTable:
+    def __init__(self, errors=None):
+        self.errors = dict(errors or {})
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        error = self.errors.pop(kwargs['Key']['user_id'], None)
+        if error is not None:
+            raise error
+
+
+def removed_notification(sequence_number, user_id, unread=True, principal=TTL_PRINCIPAL):
+    notification = {'notification_id': f'N{sequence_number}', 'user_id': user_id, 'status': 'sent'}
+    if unread:
+        notification['unread_user_id'] = user_id
+    serializer = TypeSerializer()
+    return {
+        'eventName': 'REMOVE',
+        'userIdentity': {'type': 'Service', 'principalId': principal},
+        'dynamodb': {
+            'OldImage': {name: serializer.serialize(value) for name, value in notification.items()},
+            'SequenceNumber': sequence_number
+        }
+    }
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'UpdateItem')
+
+
+def test_expired_unread_notifications_are_decremented():
+    users_table = FakeUsersTable()
+
+    response = process_records(
+        [removed_notification('1', 'ana@example.com'), removed_notification('2', 'luis@example.com')],
+        users_table
+    )
+
+    assert response == {'batchItemFailures': []}
+    assert [update['Key']['user_id'] for update in users_table.updates] == ['ana@example.com', 'luis@example.com']
+    assert users_table.updates[0]['ExpressionAttributeValues'] == {':delta': -1}
+
+
+def test_read_or_user_deleted_notifications_are_ignored():
+    users_table = FakeUsersTable()
+
+    response = process_records(
+        [
+            removed_notification('1', 'ana@example.com', unread=False),
+            removed_notification('2', 'ana@example.com', principal='usuario-iam')
+        ],
+        users_table
+    )
+
+    assert response == {'batchItemFailures': []}
+    assert users_table.updates == []
+
+
+def test_deleted_user_is_skipped():
+    users_table = FakeUsersTable({'ana@example.com': client_error('ConditionalCheckFailedException')})
+
+    response = process_records(
+        [removed_notification('1', 'ana@example.com'), removed_notification('2', 'luis@example.com')],
+        users_table
+    )
+
+    assert response == {'batchItemFailures': []}
+    assert len(users_table.updates) == 2
+
+
+def test_processing_stops_at_the_first_failure():
+    users_table = FakeUsersTable({'luis@example.com': client_error('ProvisionedThroughputExceededException')})
+
+    response = process_records(
+        [
+            removed_notification('1', 'ana@example.com'),
+            removed_notification('2', 'luis@example.com'),
+            removed_notification('3', 'eva@example.com')
+        ],
+        users_table
+    )
+
+    # Lambda reintenta desde el registro 2; el 1 no se vuelve a descontar
+    assert response == {'batchItemFailures': [{'itemIdentifier': '2'}]}
+    assert [update['Key']['user_id'] for update in users_table.updates] == ['ana@example.com', 'luis@example.com']
@@ -0,0 +1,196 @@
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from src.config.settings import settings
+from src.models.enums import NotificationType
+from src.services.delivery_service import DeliveryDispatcher, FakeProvider
+from src.workers import notification_worker
+from src.workers.notification_worker import MemoryNotificationStore, NotificationStore, process_records
+
+NOTIFICATION = {
+    'notification_id': 'N1',
+    'user_id': 'ana@example.com',
+    'status': 'pending',
+    'channel': 'email'
+}
+
+
+def cancelled_transaction(*codes):
+    return ClientError(
+        {
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': [{'Code': code} for code in codes]
+        },
+        'TransactWriteItems'
+    )
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def transact_write_items(self, TransactItems):
+        self.calls.append(TransactItems)
+        if self.error is not None:
+            raise self.error
+        return {}
+
+
+class FakeTable:
+    def __init__(self, item=None):
+        self.item = item
+
+    def get_item(self, Key, ConsistentRead):
+        return {'Item': self.item} if self.item is not None else {}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    def install(client, stored=None):
+        monkeypatch.setattr(notification_worker, 'dynamodb_client', client)
+        notification_store = NotificationStore()
+        notification_store.table = FakeTable(stored)
+        return notification_store
+    return install
+
+
+def test_claim_counts_the_unread_notification_in_the_same_transaction(store):
+    client = FakeClient()
+
+    claimed = store(client).claim(NOTIFICATION)
+
+    assert claimed['attempts'] == 0
+    put, update = client.calls[0]
+    assert put['Put']['Item']['notification_id'] == 'N1'
+    assert update['Update']['Key'] == {'user_id': 'ana@example.com'}
+    assert update['Update']['UpdateExpression'] == 'ADD unread_notifications :one'
+
+
+def test_repeated_claim_continues_from_the_stored_notification(store):
+    stored = {**NOTIFICATION, 'status': 'failed', 'attempts': 2}
+    client = FakeClient(cancelled_transaction('ConditionalCheckFailed', 'None'))
+
+    assert store(client, stored).claim(NOTIFICATION) == stored
+
+
+def test_repeated_claim_of_a_sent_notification_is_skipped(store):
+    client = FakeClient(cancelled_transaction('ConditionalCheckFailed', 'None'))
+
+    assert store(client, {**NOTIFICATION, 'status': 'sent'}).claim(NOTIFICATION) is None
+
+
+def test_claim_for_a_deleted_user_is_skipped(store):
+    client = FakeClient(cancelled_transaction('None', 'ConditionalCheckFailed'))
+
+    assert store(client).claim(NOTIFICATION) is None
+
+
+def stream_record(sequence_number, transaction_id, channel='email', event_name='INSERT', outbox=True):
+    transaction = {
+        'user_id': 'ana@example.com',
+        'transaction_id': transaction_id,
+        'fund_id': 'DEPOSIT',
+        'transaction_type': 'deposit',
+        'amount': 50000,
+        'timestamp': '2024-10-15T10:00:00',
+        'status': 'completed'
+    }
+    if outbox:
+        transaction['notification'] = {'channel': channel, 'recipient': 'ana@example.com'}
+    serializer = TypeSerializer()
+    return {
+        'eventName': event_name,
+        'dynamodb': {
+            'NewImage': {name: serializer.serialize(value) for name, value in transaction.items()},
+            'SequenceNumber': sequence_number
+        }
+    }
+
+
+@pytest.fixture
+def fake_dispatcher():
+    dispatchers = []
+
+    def build(fail_ids=()):
+        dispatcher = DeliveryDispatcher(
+            {channel.value: FakeProvider(channel.value, fail_ids=fail_ids) for channel in NotificationType},
+            {channel.value: 1 for channel in NotificationType}
+        )
+        dispatchers.append(dispatcher)
+        return dispatcher
+
+    yield build
+    for dispatcher in dispatchers:
+        dispatcher.close()
+
+
+def test_outbox_records_are_delivered_by_channel(fake_dispatcher):
+    store = MemoryNotificationStore()
+    dispatcher = fake_dispatcher()
+
+    response = process_records(
+        [stream_record('1', 'T1'), stream_record('2', 'T2', channel='sms')], store, dispatcher
+    )
+
+    assert response == {'batchItemFailures': []}
+    assert {item['status'] for item in store.items.values()} == {'sent'}
+    assert [len(provider.sent) for provider in dispatcher.providers.values()] == [1, 1]
+
+
+def test_records_without_outbox_are_ignored(fake_dispatcher):
+    store = MemoryNotificationStore()
+
+    response = process_records(
+        [stream_record('1', 'T1', outbox=False), stream_record('2', 'T2', event_name='MODIFY')],
+        store,
+        fake_dispatcher()
+    )
+
+    assert response == {'batchItemFailures': []}
+    assert store.items == {}
+
+
+def test_failed_delivery_is_retried_from_its_record(fake_dispatcher):
+    store = MemoryNotificationStore()
+
+    response = process_records(
+        [stream_record('1', 'T1'), stream_record('2', 'T2')], store, fake_dispatcher(fail_ids=['T2'])
+    )
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '2'}]}
+    assert store.items['T1']['status'] == 'sent'
+    assert store.items['T2']['status'] == 'failed'
+    assert store.items['T2']['attempts'] == 1
+
+
+def test_last_attempt_moves_the_notification_to_dead_letter(fake_dispatcher):
+    store = MemoryNotificationStore()
+    dispatcher = fake_dispatcher(fail_ids=['T1'])
+    record = stream_record('1', 'T1')
+
+    for _ in range(settings.NOTIFICATION_MAX_ATTEMPTS - 1):
+        process_records([record], store, dispatcher)
+    response = process_records([record], store, dispatcher)
+
+    assert response == {'batchItemFailures': []}
+    assert store.items['T1']['status'] == 'dead_letter'
+    # Una vez terminada, el registro repetido ya no se entrega
+    process_records([record], store, dispatcher)
+    assert store.items['T1']['attempts'] == settings.NOTIFICATION_MAX_ATTEMPTS
+
+
+def test_claim_error_reports_only_its_record(fake_dispatcher):
+    class FailingStore(MemoryNotificationStore):
+        def claim(self, notification):
+            if notification['notification_id'] == 'T2':
+                raise RuntimeError("DynamoDB no disponible")
+            return super().claim(notification)
+
+    store = FailingStore()
+
+    response = process_records([stream_record('1', 'T1'), stream_record('2', 'T2')], store, fake_dispatcher())
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': '2'}]}
+    assert store.items['T1']['status'] == 'sent'
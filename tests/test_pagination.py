@@ -0,0 +1,64 @@
+import pytest
+from fastapi import HTTPException
+
+from src.services.transaction_service import TransactionService
+from src.utils.pagination import clamp_page_size, decode_cursor, encode_cursor
+
+LAST_KEY = {'user_id': 'ana@example.com', 'transaction_id': '01HZX3Q4J8W5E6R7T8Y9U0I1O2'}
+
+
+def assert_invalid_cursor(cursor, scope='ana@example.com'):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, scope=scope)
+    assert error.value.status_code == 400
+
+
+def test_cursor_round_trips_within_its_scope():
+    cursor = encode_cursor(LAST_KEY, scope='ana@example.com')
+
+    assert decode_cursor(cursor, scope='ana@example.com') == LAST_KEY
+
+
+def test_last_page_has_no_cursor():
+    assert encode_cursor(None, scope='ana@example.com') is None
+    assert encode_cursor({}, scope='ana@example.com') is None
+    assert decode_cursor(None) is None
+
+
+def test_cursor_from_another_scope_is_rejected():
+    cursor = encode_cursor(LAST_KEY, scope='luis@example.com')
+
+    assert_invalid_cursor(cursor)
+
+
+def test_tampered_cursor_is_rejected():
+    cursor = encode_cursor(LAST_KEY, scope='ana@example.com')
+    other = encode_cursor({**LAST_KEY, 'user_id': 'luis@example.com'}, scope='ana@example.com')
+
+    # Firma válida de otro payload
+    assert_invalid_cursor(f"{other.split('.')[0]}.{cursor.split('.')[1]}")
+
+
+@pytest.mark.parametrize('cursor', ['sin-firma', '!!!.???', 'e30.e30'])
+def test_malformed_cursor_is_rejected(cursor):
+    assert_invalid_cursor(cursor)
+
+
+def test_transaction_history_cursor_only_works_for_its_user():
+    _, cursor = TransactionService.transactions_page(
+        'ana@example.com', {'Items': [], 'LastEvaluatedKey': LAST_KEY}
+    )
+
+    query = TransactionService.transactions_query('ana@example.com', None, cursor, None, None)
+    assert query['ExclusiveStartKey'] == LAST_KEY
+
+    with pytest.raises(HTTPException) as error:
+        TransactionService.transactions_query('luis@example.com', None, cursor, None, None)
+    assert error.value.status_code == 400
+
+
+def test_page_size_is_clamped():
+    assert clamp_page_size(None, 20, 100) == 20
+    assert clamp_page_size(500, 20, 100) == 100
+    with pytest.raises(HTTPException):
+        clamp_page_size(0, 20, 100)
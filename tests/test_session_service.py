@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from src.services import session_service
+from src.services.session_service import AsyncSessionService
+
+USER_ID = 'ana@example.com'
+
+
+class FakeSessionsTable:
+    """Tabla de sesiones en memoria con las condiciones que usa el servicio."""
+
+    def __init__(self):
+        self.items = {}
+        self.deleted = []
+
+    async def put_item(self, Item, ConditionExpression):
+        self.items[Item['session_id']] = dict(Item)
+
+    async def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        item = self.items.get(Key['session_id'])
+        values = ExpressionAttributeValues
+        if item is None or item['token_hash'] != values[':presented_hash'] or item['expires_at'] <= values[':now']:
+            serializer = TypeSerializer()
+            raise ClientError(
+                {
+                    'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Conditional check failed'},
+                    'Item': {name: serializer.serialize(value) for name, value in (item or {}).items()}
+                },
+                'UpdateItem'
+            )
+        item.update({
+            'token_hash': values[':new_hash'],
+            'previous_token_hash': values[':presented_hash'],
+            'rotated_at': values[':rotated_at']
+        })
+        return {'Attributes': dict(item)}
+
+    async def delete_item(self, Key, **kwargs):
+        self.deleted.append(Key['session_id'])
+        self.items.pop(Key['session_id'], None)
+
+
+@pytest.fixture
+def sessions_table(monkeypatch):
+    table = FakeSessionsTable()
+
+    async def fake_get_async_table(table_name):
+        return table
+
+    monkeypatch.setattr(session_service, 'get_async_table', fake_get_async_table)
+    return table
+
+
+def test_rotate_issues_a_new_refresh_token(sessions_table):
+    refresh_token = asyncio.run(AsyncSessionService.create_session(USER_ID))
+
+    user_id, rotated = asyncio.run(AsyncSessionService.rotate(refresh_token))
+
+    assert user_id == USER_ID
+    assert rotated != refresh_token
+    assert rotated.split('.')[0] == refresh_token.split('.')[0]
+
+
+def test_reusing_a_rotated_refresh_token_revokes_the_session(sessions_table):
+    refresh_token = asyncio.run(AsyncSessionService.create_session(USER_ID))
+    session_id = refresh_token.split('.')[0]
+    _, rotated = asyncio.run(AsyncSessionService.rotate(refresh_token))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSessionService.rotate(refresh_token))
+    assert error.value.status_code == 401
+    assert sessions_table.deleted == [session_id]
+
+    # El token vigente también deja de servir: la sesión se cerró
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSessionService.rotate(rotated))
+    assert error.value.status_code == 401
+
+
+def test_an_unknown_secret_does_not_revoke_the_session(sessions_table):
+    refresh_token = asyncio.run(AsyncSessionService.create_session(USER_ID))
+    session_id = refresh_token.split('.')[0]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSessionService.rotate(f"{session_id}.secreto-falso"))
+    assert error.value.status_code == 401
+    assert sessions_table.deleted == []
+
+    _, rotated = asyncio.run(AsyncSessionService.rotate(refresh_token))
+    assert rotated.startswith(session_id)
+
+
+def test_malformed_refresh_token_is_rejected(sessions_table):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSessionService.rotate('sin-separador'))
+    assert error.value.status_code == 401
@@ -0,0 +1,121 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from src.services import transaction_service
+from src.services.fund_service import AsyncFundService
+from src.services.subscription_service import AsyncSubscriptionService
+from src.services.user_service import AsyncUserService
+
+USER_ID = 'ana@example.com'
+FUND = {'fund_id': '3', 'name': 'DEUDAPRIVADA', 'minimum_amount': Decimal('50000'), 'category': 'FIC'}
+
+
+def cancelled_transaction(*reasons):
+    return ClientError(
+        {
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': list(reasons)
+        },
+        'TransactWriteItems'
+    )
+
+
+def balance_changed(balance):
+    return {
+        'Code': 'ConditionalCheckFailed',
+        'Item': {
+            'user_id': {'S': USER_ID},
+            'balance': {'N': str(balance)},
+            'notification_preference': {'S': 'email'}
+        }
+    }
+
+
+class FakeClient:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def transact_write_items(self, TransactItems):
+        self.calls.append(TransactItems)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {}
+
+
+@pytest.fixture
+def subscription_env(monkeypatch):
+    async def fake_get_user_by_email(email, attributes=None):
+        return {'balance': Decimal('100000'), 'notification_preference': 'email'}
+
+    async def fake_get_fund_by_id(fund_id):
+        return dict(FUND)
+
+    async def fake_get_subscription(user_id, fund_id, attributes=None):
+        return {'status': 'active', 'invested_amount': Decimal('50000'), 'transaction_id': 'T1'}
+
+    def install(client):
+        async def fake_get_async_client():
+            return client
+        monkeypatch.setattr(transaction_service, 'get_async_client', fake_get_async_client)
+
+    monkeypatch.setattr(AsyncUserService, 'get_user_by_email', fake_get_user_by_email)
+    monkeypatch.setattr(AsyncFundService, 'get_fund_by_id', fake_get_fund_by_id)
+    monkeypatch.setattr(AsyncFundService, 'get_subscription', fake_get_subscription)
+    return install
+
+
+def test_subscribe_retries_when_a_deposit_changes_the_balance(subscription_env):
+    client = FakeClient(cancelled_transaction(balance_changed(300000), {'Code': 'None'}, {'Code': 'None'}))
+    subscription_env(client)
+
+    result = asyncio.run(AsyncSubscriptionService.subscribe(USER_ID, '3'))
+
+    assert result['new_balance'] == Decimal('250000')
+    assert len(client.calls) == 2
+    assert client.calls[1][0]['Update']['ExpressionAttributeValues'][':balance_before'] == Decimal('300000')
+
+
+def test_subscribe_rejects_when_the_current_balance_is_not_enough(subscription_env):
+    client = FakeClient(cancelled_transaction(balance_changed(20000), {'Code': 'None'}, {'Code': 'None'}))
+    subscription_env(client)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSubscriptionService.subscribe(USER_ID, '3'))
+    assert error.value.status_code == 400
+    assert len(client.calls) == 1
+
+
+def test_subscribe_to_an_active_subscription_is_rejected(subscription_env):
+    client = FakeClient(cancelled_transaction({'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}))
+    subscription_env(client)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSubscriptionService.subscribe(USER_ID, '3'))
+    assert error.value.status_code == 400
+    assert error.value.detail == "Ya está suscrito a este fondo"
+
+
+def test_cancel_retries_when_a_deposit_changes_the_balance(subscription_env):
+    client = FakeClient(cancelled_transaction(balance_changed(300000), {'Code': 'None'}, {'Code': 'None'}))
+    subscription_env(client)
+
+    result = asyncio.run(AsyncSubscriptionService.cancel(USER_ID, '3'))
+
+    assert result['returned_amount'] == Decimal('50000')
+    assert result['new_balance'] == Decimal('350000')
+    assert len(client.calls) == 2
+
+
+def test_cancel_of_an_already_cancelled_subscription_is_rejected(subscription_env):
+    client = FakeClient(cancelled_transaction({'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}))
+    subscription_env(client)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncSubscriptionService.cancel(USER_ID, '3'))
+    assert error.value.status_code == 400
+    assert error.value.detail == "La suscripción ya está cancelada"
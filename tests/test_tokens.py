@@ -0,0 +1,67 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.utils import tokens
+from src.utils.cache import ExpiringLRUCache
+from src.utils.jwks import get_key_ring
+from src.utils.tokens import InvalidTokenError, verify_access_token, verified_token_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    verified_token_cache.clear()
+    yield
+    verified_token_cache.clear()
+
+
+def access_token(subject='ana@example.com', minutes=5):
+    return get_key_ring().sign({'sub': subject, 'exp': datetime.utcnow() + timedelta(minutes=minutes)})
+
+
+def test_verified_tokens_are_not_decoded_again(monkeypatch):
+    token = access_token()
+    assert verify_access_token(token) == 'ana@example.com'
+
+    def unavailable_key_ring():
+        raise AssertionError("El token ya verificado no se vuelve a decodificar")
+
+    monkeypatch.setattr(tokens, 'get_key_ring', unavailable_key_ring)
+    hits = verified_token_cache.stats()['hits']
+
+    assert verify_access_token(token) == 'ana@example.com'
+    assert verified_token_cache.stats()['hits'] == hits + 1
+
+
+def test_invalid_tokens_are_not_cached():
+    with pytest.raises(InvalidTokenError):
+        verify_access_token('no-es-un-jwt')
+    with pytest.raises(InvalidTokenError):
+        verify_access_token(access_token(minutes=-1))
+
+    assert verified_token_cache.stats()['size'] == 0
+
+
+def test_cache_entries_expire_with_the_token(monkeypatch):
+    token_cache = ExpiringLRUCache(max_entries=10)
+    now = time.time()
+    token_cache.set('token', 'ana@example.com', now + 60)
+
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+
+    assert token_cache.get('token') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    token_cache = ExpiringLRUCache(max_entries=2)
+    expires_at = time.time() + 60
+    token_cache.set('first', 'ana@example.com', expires_at)
+    token_cache.set('second', 'luis@example.com', expires_at)
+    token_cache.get('first')
+
+    token_cache.set('third', 'eva@example.com', expires_at)
+
+    assert token_cache.get('second') is None
+    assert token_cache.get('first') == 'ana@example.com'
+    assert token_cache.stats()['evictions'] == 1
@@ -0,0 +1,103 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from src.services import transaction_service
+from src.services.transaction_service import AsyncTransactionService
+from src.services.user_service import AsyncUserService
+
+USER_ID = 'ana@example.com'
+
+
+def cancelled_transaction(*reasons):
+    return ClientError(
+        {
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': list(reasons)
+        },
+        'TransactWriteItems'
+    )
+
+
+def balance_changed(balance):
+    """Cancelación del item 0 con el usuario vigente, como la devuelve DynamoDB."""
+    return {
+        'Code': 'ConditionalCheckFailed',
+        'Item': {
+            'user_id': {'S': USER_ID},
+            'balance': {'N': str(balance)},
+            'notification_preference': {'S': 'email'}
+        }
+    }
+
+
+class FakeClient:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def transact_write_items(self, TransactItems):
+        self.calls.append(TransactItems)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {}
+
+
+@pytest.fixture
+def deposit_env(monkeypatch):
+    reads = []
+
+    async def fake_get_user_by_email(email, attributes=None):
+        reads.append(email)
+        return {'balance': Decimal('100000'), 'notification_preference': 'email'}
+
+    def install(client):
+        async def fake_get_async_client():
+            return client
+        monkeypatch.setattr(transaction_service, 'get_async_client', fake_get_async_client)
+        return reads
+
+    monkeypatch.setattr(AsyncUserService, 'get_user_by_email', fake_get_user_by_email)
+    return install
+
+
+def test_deposit_retries_with_the_balance_returned_by_the_cancellation(deposit_env):
+    client = FakeClient(cancelled_transaction(balance_changed(150000), {'Code': 'None'}))
+    reads = deposit_env(client)
+
+    result = asyncio.run(AsyncTransactionService.process_deposit(USER_ID, Decimal('50000')))
+
+    assert result['previous_balance'] == Decimal('150000')
+    assert result['new_balance'] == Decimal('200000')
+    assert len(client.calls) == 2
+    # El reintento no vuelve a leer el usuario
+    assert reads == [USER_ID]
+    retried_update = client.calls[1][0]['Update']['ExpressionAttributeValues']
+    assert retried_update[':balance_before'] == Decimal('150000')
+    assert retried_update[':balance_after'] == Decimal('200000')
+
+
+def test_deposit_gives_up_after_repeated_conflicts(deposit_env):
+    client = FakeClient(*[
+        cancelled_transaction(balance_changed(100000 + attempt), {'Code': 'None'})
+        for attempt in range(transaction_service.BALANCE_WRITE_MAX_ATTEMPTS)
+    ])
+    deposit_env(client)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncTransactionService.process_deposit(USER_ID, Decimal('50000')))
+    assert error.value.status_code == 409
+    assert len(client.calls) == transaction_service.BALANCE_WRITE_MAX_ATTEMPTS
+
+
+def test_deposit_for_a_deleted_user_is_not_found(deposit_env):
+    client = FakeClient(cancelled_transaction({'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}))
+    deposit_env(client)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(AsyncTransactionService.process_deposit(USER_ID, Decimal('50000')))
+    assert error.value.status_code == 404
+    assert len(client.calls) == 1
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from src.utils import dataloader
+from src.utils.dataloader import request_loader_scope
+from src.utils.unit_of_work import apply_committed, forget_entity, load_entity, unit_of_work_scope
+
+USERS = 'users-test'
+KEY = {'user_id': 'ana@example.com'}
+
+
+@pytest.fixture
+def batch_gets(monkeypatch):
+    """Registrar cada BatchGetItem y responder con el saldo actual."""
+    calls = []
+    state = {'balance': 100}
+
+    async def fake_batch_get_request(request_items):
+        calls.append(request_items)
+        return {USERS: [{**KEY, 'balance': state['balance'], 'phone': '+573001112233'}]}
+
+    monkeypatch.setattr(dataloader, 'async_batch_get_request', fake_batch_get_request)
+    return calls, state
+
+
+def run_in_request(coroutine_function):
+    async def scoped():
+        with request_loader_scope(), unit_of_work_scope():
+            return await coroutine_function()
+    return asyncio.run(scoped())
+
+
+def test_repeated_reads_return_the_same_item(batch_gets):
+    calls, _ = batch_gets
+
+    async def scenario():
+        first = await load_entity(USERS, KEY, ['balance'])
+        second = await load_entity(USERS, KEY, ['balance'])
+        return first, second
+
+    first, second = run_in_request(scenario)
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_forget_entity_reads_again_from_dynamodb(batch_gets):
+    calls, state = batch_gets
+
+    async def scenario():
+        before = await load_entity(USERS, KEY, ['balance'])
+        state['balance'] = 250
+        forget_entity(USERS, KEY)
+        after = await load_entity(USERS, KEY, ['balance'])
+        return before['balance'], after['balance']
+
+    # Sin descartar también la lectura del cargador se repetiría el saldo anterior
+    assert run_in_request(scenario) == (100, 250)
+    assert len(calls) == 2
+
+
+def test_apply_committed_updates_the_item_without_reading(batch_gets):
+    calls, _ = batch_gets
+
+    async def scenario():
+        await load_entity(USERS, KEY, ['balance'])
+        apply_committed(USERS, KEY, {'balance': 300})
+        return await load_entity(USERS, KEY, ['balance'])
+
+    assert run_in_request(scenario)['balance'] == 300
+    assert len(calls) == 1